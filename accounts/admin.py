@@ -32,7 +32,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'location', 'created_at', 'email_notifications')
     list_filter = ('email_notifications', 'created_at')
     search_fields = ('user__username', 'user__email', 'bio', 'location')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'last_digest_sent_at')
     
     fieldsets = (
         ('User Info', {
@@ -43,7 +43,7 @@ class UserProfileAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Preferences', {
-            'fields': ('email_notifications',)
+            'fields': ('email_notifications', 'last_digest_sent_at')
         }),
         ('Metadata', {
             'fields': ('created_at', 'updated_at'),
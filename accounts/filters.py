@@ -0,0 +1,60 @@
+"""
+Filters for the staff user list, shared by the user_management page and the
+users export so both select exactly the same rows.
+"""
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Lower
+
+from posts.models import DeletionRequest
+from thoughtnest.dates import date_bounds
+
+# Upper bound for prefix ranges: sorts after any character a prefix can continue with
+_PREFIX_END = '\U0010ffff'
+
+
+def _prefix_match(field, term):
+	"""
+	Case-insensitive prefix match written as a range on LOWER(field), so the
+	LOWER() expression indexes on auth_user can serve it (LIKE '%x%' cannot).
+	The term is lowered by the database too, so both sides fold the same way:
+	SQLite's LOWER() only folds ASCII, so there "élise" does not find "Élise"
+	but "ÉLISE" and "Élise" do.
+	"""
+	term = Lower(Value(term))
+	return Q(**{f'{field}__gte': term, f'{field}__lt': Concat(term, Value(_PREFIX_END))})
+
+
+def user_search_filter(search_query):
+	"""Username / email / first or last name prefix search; "ann lee" matches first + last name"""
+	condition = _prefix_match('username_lower', search_query) | _prefix_match('email_lower', search_query)
+	first, _, rest = search_query.partition(' ')
+	rest = rest.strip()
+	if rest:
+		condition |= _prefix_match('first_name_lower', first) & _prefix_match('last_name_lower', rest)
+	else:
+		condition |= _prefix_match('first_name_lower', first) | _prefix_match('last_name_lower', first)
+	return condition
+
+
+def filter_user_profiles(users, params):
+	"""Apply the user list's ?q=, ?joined_date_from= and ?joined_date_to= to a UserProfile queryset"""
+	users = users.exclude(user_id__in=DeletionRequest.objects.filter(
+		# Users queued for deletion disappear at once
+		kind=DeletionRequest.KIND_USER,
+	).exclude(status=DeletionRequest.STATUS_DONE).values('target_id'))
+
+	search_query = params.get('q', '').strip()
+	if search_query:
+		users = users.alias(
+			username_lower=Lower('user__username'),
+			email_lower=Lower('user__email'),
+			first_name_lower=Lower('user__first_name'),
+			last_name_lower=Lower('user__last_name'),
+		).filter(user_search_filter(search_query))
+
+	joined_from, joined_to = date_bounds(params.get('joined_date_from'), params.get('joined_date_to'))
+	if joined_from:
+		users = users.filter(user__date_joined__gte=joined_from)
+	if joined_to:
+		users = users.filter(user__date_joined__lt=joined_to)
+	return users
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-17 19:19
+
+from django.db import migrations, models
+
+# auth_user belongs to django.contrib.auth, so its expression indexes for the
+# user_management prefix search are created here with plain SQL (valid on
+# SQLite and PostgreSQL).
+USER_SEARCH_COLUMNS = ('username', 'email', 'first_name', 'last_name')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_userprofile_avatar'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-created_at', '-id'], name='userprofile_created_idx'),
+        ),
+        *[
+            migrations.RunSQL(
+                f'CREATE INDEX IF NOT EXISTS accounts_user_{column}_lower_idx ON auth_user (LOWER({column}))',
+                f'DROP INDEX IF EXISTS accounts_user_{column}_lower_idx',
+            )
+            for column in USER_SEARCH_COLUMNS
+        ],
+    ]
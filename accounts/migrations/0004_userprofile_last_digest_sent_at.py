@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_digest_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -23,6 +23,8 @@ class UserProfile(models.Model):
     
     # Preferences
     email_notifications = models.BooleanField(default=True, help_text="Receive email notifications")
+    # Set by notifications.digest; rate-limits digests to one per NOTIFICATION_DIGEST_INTERVAL
+    last_digest_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
     # newsletter_subscription field removed
     
     # Metadata
@@ -33,6 +35,10 @@ class UserProfile(models.Model):
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
         ordering = ['-created_at']
+        indexes = [
+            # user_management keyset pagination
+            models.Index(fields=['-created_at', '-id'], name='userprofile_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
@@ -45,17 +51,24 @@ class UserProfile(models.Model):
         """Check if user is an admin (staff or superuser)"""
         return self.user.is_staff or self.user.is_superuser
     
+    def get_stats(self):
+        """Stored AuthorStats row for this user (looked up once per instance)"""
+        if not hasattr(self, '_author_stats'):
+            from stats.models import AuthorStats
+            self._author_stats = AuthorStats.for_user(self.user)
+        return self._author_stats
+
     def get_post_count(self):
         """Return number of posts by this user"""
-        return self.user.posts.count()
+        return self.get_stats().posts
     
     def get_total_likes(self):
         """Return total likes across all user's posts"""
-        return sum(post.likes.count() for post in self.user.posts.all())
+        return self.get_stats().likes_received
     
     def get_total_comments(self):
         """Return total comments across all user's posts"""
-        return sum(post.comments.count() for post in self.user.posts.all())
+        return self.get_stats().comments_received
 
 
 # Signal to automatically create UserProfile when User is created
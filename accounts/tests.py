@@ -1,3 +1,24 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from .filters import filter_user_profiles
+from .models import UserProfile
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user('Élise', email='elise@example.com')
+        User.objects.create_user('Bob', email='bob@example.com', first_name='Ann', last_name='Lee')
+
+    def search(self, q):
+        return sorted(filter_user_profiles(UserProfile.objects.all(), {'q': q}).values_list('user__username', flat=True))
+
+    def test_prefix_search_ignores_case(self):
+        self.assertEqual(self.search('bo'), ['Bob'])
+        self.assertEqual(self.search('ann l'), ['Bob'])
+        self.assertEqual(self.search('ELISE@'), ['Élise'])
+
+    def test_non_ascii_username(self):
+        self.assertEqual(self.search('Éli'), ['Élise'])
+        self.assertEqual(self.search('ÉLISE'), ['Élise'])
@@ -1,9 +1,10 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
 urlpatterns = [
-	path('', views.home, name='home'),
+	path('', views.ahome if settings.ASYNC_VIEWS else views.home, name='home'),
 	path('register/', views.user_register, name='register'),
 	path('login/', views.user_login, name='login'),
 	path('logout/', views.user_logout, name='logout'),
@@ -11,6 +12,7 @@ urlpatterns = [
 	path('admin-page/', views.admin_page, name='admin_page'),
 	path('profile/', views.profile, name='profile'),
 	path('profile-settings/', views.profile_settings, name='profile_settings'),
+	path('authors/<str:username>/', views.author_profile, name='author_profile'),
     path('admin/users-manage/', views.user_management, name='admin_users_manage'),
     path('admin/users/<int:pk>/delete/', views.admin_delete_user, name='admin_delete_user'),
 ]
\ No newline at end of file
@@ -1,12 +1,21 @@
 
-from django.shortcuts import render, redirect
+from datetime import timedelta
+
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import login, authenticate, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Count, Q
-from datetime import datetime, timedelta
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from accounts.filters import filter_user_profiles
 from accounts.models import UserProfile
-from posts.models import Comment, Like, Post, Category
+from posts import deletion
+from posts.models import Comment, Like, Post, live_post_count
+from stats.models import AuthorStats
+from thoughtnest.async_views import alist, arender, auser
+from thoughtnest.pagination import paginate_by_cursor
 
 
 def user_register(request):
@@ -15,7 +24,7 @@ def user_register(request):
 		return redirect('home')
 	
 	from posts.models import SiteSettings
-	settings_obj = SiteSettings.load()
+	settings_obj = SiteSettings.get_cached()
 	
 	if not settings_obj.allow_registration:
 		messages.error(request, 'User registration is currently disabled by the administrator.')
@@ -92,83 +101,118 @@ def user_logout(request):
 	return redirect('home')
 
 
-def home(request):
-	from posts.models import Post, Category, Like, SiteSettings
-	from django.db.models import Count
-	
-	settings_obj = SiteSettings.load()
-	
-	# Get published posts with related data
-	latest_posts = Post.objects.filter(status=Post.STATUS_PUBLISHED).select_related('author', 'category').prefetch_related('comments', 'likes').order_by('-created_at')[:settings_obj.posts_per_page]
+def _home_queries(request, settings_obj):
+	from posts.models import Post, Category, live_post_count
+
+	# Trending (the default tab) or newest published posts; both orders are
+	# index scans (post_published_trending_idx / post_published_created_idx)
+	tab = 'latest' if request.GET.get('tab') == 'latest' else 'trending'
+	ordering = ('-created_at',) if tab == 'latest' else ('-trending_score', '-id')
+	published = Post.objects.filter(status=Post.STATUS_PUBLISHED)
+	latest = published.select_related('author', 'category').order_by(*ordering)[:settings_obj.posts_per_page]
 	
 	# Get all categories with post counts
-	categories = Category.objects.annotate(post_count=Count('posts')).order_by('-post_count')[:5]
-	
-	# Check which posts the user has liked
-	user_liked_posts = set()
-	if request.user.is_authenticated:
-		user_liked_posts = set(Like.objects.filter(user=request.user, post__in=latest_posts).values_list('post_id', flat=True))
-	
+	categories = Category.objects.annotate(post_count=live_post_count()).order_by('-post_count')[:5]
+	return tab, published, latest, categories
+
+
+def _home_context(tab, feed_posts, categories, total_posts, user_liked_posts, settings_obj):
 	# Add user_has_liked attribute to each post
-	for post in latest_posts:
+	for post in feed_posts:
 		post.user_has_liked = post.id in user_liked_posts
 	
-	context = {
-		'latest_posts': latest_posts,
+	return {
+		'feed_posts': feed_posts,
+		'tab': tab,
 		'categories': categories,
-		'total_posts': Post.objects.filter(status=Post.STATUS_PUBLISHED).count(),
+		'total_posts': total_posts,
 		'site_settings': settings_obj,
 	}
+
+
+def home(request):
+	from posts.models import SiteSettings
+	
+	settings_obj = SiteSettings.get_cached()
+	tab, published, latest, categories = _home_queries(request, settings_obj)
+	
+	# Which posts the user has liked is matched against the same slice as a subquery
+	user_liked_posts = set()
+	if request.user.is_authenticated:
+		user_liked_posts = set(Like.objects.filter(user=request.user, post__in=latest).values_list('post_id', flat=True))
+	
+	context = _home_context(tab, list(latest), list(categories), published.count(), user_liked_posts, settings_obj)
 	return render(request, 'pages/home.html', context)
 
 
+async def ahome(request):
+	"""home() for ASYNC_VIEWS deployments"""
+	from posts.models import SiteSettings
+	
+	settings_obj = await SiteSettings.aget_cached()
+	user = await auser(request)
+	tab, published, latest, categories = _home_queries(request, settings_obj)
+	
+	user_liked_posts = set()
+	if user.is_authenticated:
+		user_liked_posts = set(await alist(Like.objects.filter(user=user, post__in=latest).values_list('post_id', flat=True)))
+	
+	context = _home_context(
+		tab, await alist(latest), await alist(categories), await published.acount(), user_liked_posts, settings_obj,
+	)
+	return await arender(request, 'pages/home.html', context)
+
+
 @login_required
 def admin_dashboard(request):
 	if not request.user.is_staff:
 		messages.error(request, 'You do not have permission to access the admin dashboard.')
 		return redirect('home')
 
-	from posts.models import Comment, Like, Post, Category, Tag
+	from posts.models import Comment, Post
+	from stats.models import DailyStats, SiteCounters
 	from django.contrib.auth import get_user_model
 	User = get_user_model()
 
-	# Core stats
-	total_posts = Post.objects.count()
-	total_comments = Comment.objects.count()
-	total_likes = Like.objects.count()
-	total_users = User.objects.count()
-	total_categories = Category.objects.count()
-	total_tags = Tag.objects.count()
-	published_posts = Post.objects.filter(status=Post.STATUS_PUBLISHED).count()
-	draft_posts = Post.objects.filter(status='draft').count()
-
-	# Recent activity (last 7 days)
-	now = datetime.now()
-	week_ago = now - timedelta(days=7)
-	day_ago = now - timedelta(days=1)
-	
-	new_posts_week = Post.objects.filter(created_at__gte=week_ago).count()
-	new_comments_week = Comment.objects.filter(created_at__gte=week_ago).count()
-	new_users_week = User.objects.filter(date_joined__gte=week_ago).count()
-	
+	# Core stats (maintained incrementally by stats signals)
+	counters = SiteCounters.load()
+	total_posts = counters.posts
+	total_comments = counters.comments
+	total_likes = counters.likes
+	total_users = counters.users
+	total_categories = counters.categories
+	total_tags = counters.tags
+	published_posts = counters.published_posts
+	draft_posts = counters.draft_posts
+
+	# Recent activity from the daily rollup: today plus the 6 days before it
+	days = DailyStats.recent(days=7)
+
+	new_posts_week = sum(day.new_posts for day in days)
+	new_comments_week = sum(day.new_comments for day in days)
+	new_users_week = sum(day.new_users for day in days)
+
+	# Rolling window rather than the calendar day; two index range counts
+	day_ago = timezone.now() - timedelta(days=1)
 	posts_last_24h = Post.objects.filter(created_at__gte=day_ago).count()
-	comments_last_24h = Comment.objects.filter(created_at__gte=day_ago).count()
+	comments_last_24h = Comment.objects.live().filter(created_at__gte=day_ago).count()
 
-	# Top posts by likes
-	top_posts = Post.objects.annotate(
-		like_count=Count('likes'),
-		comment_count=Count('comments')
-	).order_by('-like_count')[:5]
+	# Trending published posts (stored score, index scan)
+	top_posts = (
+		Post.objects.filter(status=Post.STATUS_PUBLISHED)
+		.select_related('author')
+		.order_by('-trending_score', '-id')[:5]
+	)
 
 	# Recent posts
 	recent_posts = Post.objects.select_related('author', 'category').order_by('-created_at')[:5]
 
 	# Recent comments
-	recent_comments = Comment.objects.select_related('author', 'post').order_by('-created_at')[:5]
+	recent_comments = Comment.objects.live().select_related('author', 'post').order_by('-created_at')[:5]
 
 	# Most active users
 	top_authors = User.objects.annotate(
-		post_count=Count('posts')
+		post_count=live_post_count()
 	).filter(post_count__gt=0).order_by('-post_count')[:5]
 
 	# Newest users
@@ -216,12 +260,8 @@ def admin_page(request):
 @login_required
 def profile(request):
 	"""Display user profile overview"""
-	user_post_count = Post.objects.filter(author=request.user).count()
-	user_like_count = Like.objects.filter(user=request.user).count()
-	user_comment_count = Comment.objects.filter(author=request.user).count()
-
-	my_comments = Comment.objects.filter(author=request.user).select_related('post').order_by('-created_at')[:5]
-	liked_post_ids = Like.objects.filter(user=request.user).order_by('-created_at').values_list('post_id', flat=True)[:5]
+	my_comments = Comment.objects.live().filter(author=request.user).select_related('post').order_by('-created_at')[:5]
+	liked_post_ids = Like.objects.live().filter(user=request.user).order_by('-created_at').values_list('post_id', flat=True)[:5]
 	liked_posts = Post.objects.filter(id__in=liked_post_ids)
 
 	profile = getattr(request.user, 'profile', None)
@@ -230,9 +270,6 @@ def profile(request):
 	website = profile.website if profile else ''
 
 	context = {
-		'user_post_count': user_post_count,
-		'user_like_count': user_like_count,
-		'user_comment_count': user_comment_count,
 		'my_comments': my_comments,
 		'liked_posts': liked_posts,
 		'bio': bio,
@@ -247,8 +284,8 @@ def profile(request):
 def profile_settings(request):
 	"""Profile settings — edit info, change password"""
 	profile = getattr(request.user, 'profile', None)
-	my_comments = Comment.objects.filter(author=request.user).select_related('post').order_by('-created_at')[:5]
-	liked_post_ids = Like.objects.filter(user=request.user).order_by('-created_at').values_list('post_id', flat=True)[:5]
+	my_comments = Comment.objects.live().filter(author=request.user).select_related('post').order_by('-created_at')[:5]
+	liked_post_ids = Like.objects.live().filter(user=request.user).order_by('-created_at').values_list('post_id', flat=True)[:5]
 	liked_posts = Post.objects.filter(id__in=liked_post_ids)
 
 	if request.method == 'POST':
@@ -333,42 +370,39 @@ def profile_settings(request):
 	return render(request, 'users/profile_settings.html', context)
 
 
+def author_profile(request, username):
+	"""Public author page: bio, stored stats and published posts"""
+	author = get_object_or_404(User.objects.select_related('profile', 'author_stats'), username=username, is_active=True)
+	stats = getattr(author, 'author_stats', None) or AuthorStats.for_user(author)
+
+	posts = Post.objects.filter(author=author, status=Post.STATUS_PUBLISHED).select_related('category')
+	# Keyset pagination on (created_at, id); the total comes from the stats row
+	paginator, page_obj = paginate_by_cursor(request, posts, 12, estimate_total=False)
+
+	context = {
+		'author': author,
+		'profile': getattr(author, 'profile', None),
+		'stats': stats,
+		'posts': page_obj,
+		'page_obj': page_obj,
+	}
+	return render(request, 'pages/author.html', context)
+
+
 def user_management(request):
 	if not request.user.is_staff:
 		messages.error(request, 'You do not have permission to access user management.')
 		return redirect('home')
 	
-	users = UserProfile.objects.annotate(
-		post_count=Count('user__posts'),
-		comment_count=Count('user__comments'),
-		like_count=Count('user__likes')
-	).select_related('user').order_by('-created_at')
-
-	search_query = request.GET.get('q', '').strip()
-	if search_query:
-		users = users.filter(
-			Q(user__username__icontains=search_query) |
-			Q(user__email__icontains=search_query) |
-			Q(user__first_name__icontains=search_query) |
-			Q(user__last_name__icontains=search_query)
-		)
-	
-	joined_date_from = request.GET.get('joined_date_from')
-	joined_date_to = request.GET.get('joined_date_to')
-	if joined_date_from:
-		users = users.filter(user__date_joined__gte=joined_date_from)
-		if joined_date_to:
-			users = users.filter(user__date_joined__lte=joined_date_to)
-
-	from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-	paginator = Paginator(users, 10)  # 10 users per page
-	page = request.GET.get('page')
-	try:
-		users_page = paginator.page(page)
-	except PageNotAnInteger:
-		users_page = paginator.page(1)
-	except EmptyPage:
-		users_page = paginator.page(paginator.num_pages)
+	# Counts come from the per-user AuthorStats row (one join, no per-user aggregation)
+	users = filter_user_profiles(UserProfile.objects.select_related('user').annotate(
+		post_count=Coalesce('user__author_stats__posts', 0),
+		comment_count=Coalesce('user__author_stats__comments_given', 0),
+		like_count=Coalesce('user__author_stats__likes_given', 0),
+	), request.GET)
+
+	# Keyset pagination on (created_at, id): 10 users per page
+	paginator, users_page = paginate_by_cursor(request, users, 10)
 
 	context = {
 		'users': users_page,
@@ -377,24 +411,25 @@ def user_management(request):
 	}
 	return render(request, 'admin/user_management.html', context)
 
-def admin_delete_user(request, user_id):
+@login_required
+@require_POST
+def admin_delete_user(request, pk):
 	"""Admin view to delete a user"""
 	if not request.user.is_staff:
 		messages.error(request, 'You do not have permission to perform this action.')
 		return redirect('home')
 
-	from django.contrib.auth import get_user_model
-	User = get_user_model()
-	user_to_delete = UserProfile.objects.filter(id=user_id).first()
+	user_to_delete = User.objects.filter(pk=pk, is_active=True).first()
 
 	if not user_to_delete:
 		messages.error(request, 'User not found.')
-		return redirect('user_management')
+		return redirect('admin_users_manage')
 
 	if user_to_delete == request.user:
 		messages.error(request, 'You cannot delete your own account.')
-		return redirect('user_management')
+		return redirect('admin_users_manage')
 
-	user_to_delete.delete()
+	# Deactivated and hidden now; their posts, likes and comments are purged in the background
+	deletion.schedule_user(user_to_delete, request.user)
 	messages.success(request, f'User {user_to_delete.username} has been deleted.')
-	return redirect('user_management')
\ No newline at end of file
+	return redirect('admin_users_manage')
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+gunicorn configuration, picked up automatically from the project root.
+
+SERVER_MODE selects the deployment path:
+
+    gunicorn                      # wsgi (default): sync workers, thoughtnest.wsgi
+    SERVER_MODE=asgi gunicorn     # uvicorn workers, thoughtnest.asgi (async views)
+
+SERVER_MODE is also read by settings.ASYNC_VIEWS, so set it for a single
+uvicorn process too:
+
+    SERVER_MODE=asgi uvicorn thoughtnest.asgi:application --host 0.0.0.0 --port 8000
+
+Compare the two with `python manage.py benchmark_servers`.
+"""
+import multiprocessing
+import os
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise RuntimeError(f'SERVER_MODE must be "wsgi" or "asgi", not {SERVER_MODE!r}')
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'thoughtnest.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'thoughtnest.wsgi:application'
+    worker_class = 'sync'
+    threads = int(os.environ.get('GUNICORN_THREADS', 1))
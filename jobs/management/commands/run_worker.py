@@ -0,0 +1,38 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = ('Runs queued jobs (see jobs.queue). Each --queue gets its own thread pool; start '
+            'several worker processes to scale out. SIGTERM/SIGINT stop claiming and let '
+            'running jobs finish.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues', metavar='NAME[:CONCURRENCY]',
+                            help='Queue to work, optionally with its thread count (default: default:4). Repeatable.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when no job is ready (default: 1).')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is ready or running.')
+        parser.add_argument('--stats-interval', type=float, default=30,
+                            help='Log throughput every N seconds (default: 30, 0 turns it off).')
+
+    def handle(self, *args, **options):
+        queues = {}
+        for spec in options['queues'] or ['default:4']:
+            name, _, concurrency = spec.partition(':')
+            try:
+                queues[name] = int(concurrency or 1)
+            except ValueError:
+                raise CommandError(f'Bad --queue {spec!r}; expected NAME or NAME:CONCURRENCY.')
+            if not name or queues[name] < 1:
+                raise CommandError(f'Bad --queue {spec!r}; expected NAME or NAME:CONCURRENCY.')
+
+        worker = Worker(queues, poll=options['poll'], report=self.stdout.write)
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(
+            f'Worker {worker.name} on ' + ', '.join(f'{name} ({count} threads)' for name, count in queues.items())
+        )
+        worker.run(burst=options['burst'], stats_interval=options['stats_interval'])
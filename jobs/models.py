@@ -0,0 +1,195 @@
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from thoughtnest.sqlite import immediate_atomic
+
+# Create your models here.
+
+class Job(models.Model):
+    """
+    A unit of deferred work: a registered task (see jobs.queue) and its keyword
+    arguments. Rows are claimed by `manage.py run_worker`, retried with
+    exponential backoff when the task raises, and kept for JOB_RETENTION_DAYS
+    once done so throughput and failures can be inspected in the admin.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    # last_error of a keyed job dropped in favour of an already queued duplicate
+    SUPERSEDED = 'Superseded: a job with the same key was already queued'
+
+    queue = models.CharField(max_length=64, default='default')
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField(default=0, help_text="Higher runs first")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # While queued, at most one job per non-empty key (see enqueue(key=...))
+    key = models.CharField(max_length=200, blank=True)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The claim query: ready jobs of one queue, best first
+            models.Index(
+                fields=['queue', '-priority', 'run_at', 'id'],
+                condition=Q(status='queued'), name='job_ready_idx',
+            ),
+            # Lease recovery
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='job_running_idx'),
+            # Retention purge
+            models.Index(fields=['finished_at'], condition=Q(status='done'), name='job_done_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'], condition=Q(status='queued') & ~Q(key=''), name='job_unique_queued_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    @classmethod
+    def claim(cls, queue, limit, worker):
+        """
+        Atomically take up to `limit` ready jobs from `queue` for `worker` and
+        return them. Where the backend supports it (PostgreSQL) the ready rows
+        are locked with FOR UPDATE SKIP LOCKED, so concurrent workers pass over
+        each other's rows instead of queueing on them. Elsewhere (SQLite) the
+        claim runs in a BEGIN IMMEDIATE transaction, which serializes claimers,
+        and each row is only taken if it is still queued.
+        """
+        now = timezone.now()
+        ready = (
+            cls.objects.filter(queue=queue, status=cls.QUEUED, run_at__lte=now)
+            .order_by('-priority', 'run_at', 'id')
+        )
+        claimed = {'status': cls.RUNNING, 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1}
+
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                ids = list(ready.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+                if ids:
+                    cls.objects.filter(pk__in=ids).update(**claimed)
+        else:
+            with immediate_atomic():
+                ids = [
+                    pk for pk in ready.values_list('pk', flat=True)[:limit]
+                    if cls.objects.filter(pk=pk, status=cls.QUEUED).update(**claimed)
+                ]
+        if not ids:
+            return []
+        return sorted(cls.objects.filter(pk__in=ids), key=lambda job: (-job.priority, job.run_at, job.pk))
+
+    def mark_done(self):
+        self.status = self.DONE
+        self.finished_at = timezone.now()
+        self.last_error = ''
+        type(self).objects.filter(pk=self.pk).update(
+            status=self.status, finished_at=self.finished_at, last_error='', locked_by='', locked_at=None,
+        )
+
+    def mark_failed(self, exc):
+        """
+        Schedule a retry with exponential backoff, or give up after
+        max_attempts. A keyed job is not retried while another job with the
+        same key is queued: that one does the same work, so this one is
+        marked failed as superseded.
+        """
+        self.last_error = ''.join(traceback.format_exception(exc))[-4000:]
+        now = timezone.now()
+        if self.attempts < self.max_attempts:
+            run_at = now + self.backoff(self.attempts)
+            if self._requeue(run_at=run_at, finished_at=None, last_error=self.last_error):
+                self.status = self.QUEUED
+                self.run_at = run_at
+                self.finished_at = None
+                return
+            self.last_error = f'{self.SUPERSEDED}\n\n{self.last_error}'[:4000]
+        self.status = self.FAILED
+        self.finished_at = now
+        type(self).objects.filter(pk=self.pk).update(
+            status=self.status, finished_at=self.finished_at,
+            last_error=self.last_error, locked_by='', locked_at=None,
+        )
+
+    def _requeue(self, **changes):
+        """Put this row back in the queue; False if a queued job with the same key exists"""
+        try:
+            # Savepoint: the partial unique constraint on key rejects the update
+            with transaction.atomic():
+                type(self).objects.filter(pk=self.pk).update(
+                    status=self.QUEUED, locked_by='', locked_at=None, **changes,
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    @staticmethod
+    def backoff(attempts):
+        """base * 2^(attempts - 1), capped, with +/-20% jitter so retries spread out"""
+        base = getattr(settings, 'JOB_RETRY_BASE_SECONDS', 10)
+        cap = getattr(settings, 'JOB_RETRY_MAX_SECONDS', 3600)
+        delay = min(cap, base * 2 ** max(attempts - 1, 0))
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    @classmethod
+    def requeue_expired(cls, lease_seconds):
+        """Put back jobs whose worker died mid-run (lease older than lease_seconds)"""
+        cutoff = timezone.now() - timedelta(seconds=lease_seconds)
+        expired = cls.objects.filter(status=cls.RUNNING, locked_at__lt=cutoff)
+        failed = expired.filter(attempts__gte=F('max_attempts')).update(
+            status=cls.FAILED, finished_at=timezone.now(), locked_by='', locked_at=None,
+            last_error='Lease expired on the final attempt',
+        )
+        requeued = expired.filter(key='').update(status=cls.QUEUED, run_at=timezone.now(), locked_by='', locked_at=None)
+        # Keyed jobs one by one, since a queued duplicate (or another expired
+        # row with the same key) makes the update violate the unique key
+        for job in expired.exclude(key=''):
+            if job._requeue(run_at=timezone.now()):
+                requeued += 1
+            else:
+                failed += cls.objects.filter(pk=job.pk).update(
+                    status=cls.FAILED, finished_at=timezone.now(), locked_by='', locked_at=None,
+                    last_error=cls.SUPERSEDED,
+                )
+        return requeued + failed
+
+    @classmethod
+    def purge(cls, days):
+        """Delete finished jobs older than `days` days; failed ones are kept for inspection"""
+        cutoff = timezone.now() - timedelta(days=days)
+        return cls.objects.filter(status=cls.DONE, finished_at__lt=cutoff).delete()[0]
+
+    @classmethod
+    def depths(cls):
+        """{queue: {'ready': n, 'scheduled': n, 'running': n, 'failed': n}} for dashboards and the worker log"""
+        now = timezone.now()
+        rows = cls.objects.exclude(status=cls.DONE).order_by().values('queue').annotate(
+            ready=Count('pk', filter=Q(status=cls.QUEUED, run_at__lte=now)),
+            scheduled=Count('pk', filter=Q(status=cls.QUEUED, run_at__gt=now)),
+            running=Count('pk', filter=Q(status=cls.RUNNING)),
+            failed=Count('pk', filter=Q(status=cls.FAILED)),
+        )
+        return {row.pop('queue'): row for row in rows}
@@ -0,0 +1,101 @@
+"""
+Task registry and enqueue().
+
+A task is a plain function registered with @task; its keyword arguments must
+be JSON-serializable (model instances go in as their pk). Tasks live in a
+`tasks.py` module of any installed app, which JobsConfig.ready() imports, so
+the web process and the worker see the same registry:
+
+    @task(queue='default', max_attempts=5)
+    def rollup_today():
+        ...
+
+    rollup_today.enqueue()                       # run as soon as a worker is free
+    enqueue(rollup_today, delay=60, priority=5)  # with per-call options
+
+enqueue() is a plain INSERT through the default connection, so inside
+transaction.atomic() the job is committed (or rolled back) together with the
+data it refers to and a worker can never pick it up before that data exists.
+Tasks may run more than once (a worker can die after the work but before
+marking the job done), so they should be idempotent.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+class Task:
+    def __init__(self, func, queue, priority, max_attempts):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def enqueue(self, **kwargs):
+        return enqueue(self, kwargs)
+
+
+def task(func=None, *, queue='default', priority=0, max_attempts=5):
+    """Register func as a task; usable as @task or @task(queue=..., ...)"""
+    def register(func):
+        registered = Task(func, queue, priority, max_attempts)
+        _registry[registered.name] = registered
+        return registered
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(f'No task registered as {name!r}') from None
+
+
+def enqueue(task, kwargs=None, *, delay=None, run_at=None, priority=None, queue=None, max_attempts=None, key=''):
+    """
+    Queue task(**kwargs) and return the Job, or None when `key` is given and a
+    job with the same key is already waiting (the two would do the same work).
+    delay is seconds or a timedelta; run_at an absolute time.
+    """
+    from .models import Job
+
+    if isinstance(task, str):
+        task = get_task(task)
+    if run_at is None:
+        run_at = timezone.now()
+        if delay:
+            run_at += delay if isinstance(delay, timedelta) else timedelta(seconds=delay)
+    job = Job(
+        task=task.name,
+        kwargs=kwargs or {},
+        queue=queue or task.queue,
+        priority=task.priority if priority is None else priority,
+        max_attempts=max_attempts or task.max_attempts,
+        run_at=run_at,
+        key=key,
+    )
+    if not key:
+        job.save()
+        return job
+    try:
+        # Savepoint, so a duplicate does not break the caller's transaction
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
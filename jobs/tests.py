@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Job
+from .queue import enqueue, task
+from .worker import Worker
+
+
+@task(max_attempts=3)
+def keyed_refresh():
+    pass
+
+
+class JobRetryTests(TestCase):
+    def claim_one(self):
+        [job] = Job.claim('default', 1, 'test-worker')
+        return job
+
+    def test_enqueue_with_key_skips_queued_duplicate(self):
+        first = enqueue(keyed_refresh, key='refresh')
+        self.assertIsNotNone(first)
+        self.assertIsNone(enqueue(keyed_refresh, key='refresh'))
+        # Once the first one runs, the next change needs a fresh job
+        self.claim_one()
+        self.assertIsNotNone(enqueue(keyed_refresh, key='refresh'))
+
+    def test_failed_job_is_requeued_with_backoff(self):
+        enqueue(keyed_refresh, key='refresh')
+        job = self.claim_one()
+        job.mark_failed(RuntimeError('boom'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+    def test_failed_job_gives_up_after_max_attempts(self):
+        enqueue(keyed_refresh)
+        job = self.claim_one()
+        Job.objects.filter(pk=job.pk).update(attempts=job.max_attempts)
+        job.attempts = job.max_attempts
+        job.mark_failed(RuntimeError('boom'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_is_superseded_by_queued_duplicate(self):
+        enqueue(keyed_refresh, key='refresh')
+        job = self.claim_one()
+        duplicate = enqueue(keyed_refresh, key='refresh')
+
+        job.mark_failed(RuntimeError('boom'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertTrue(job.last_error.startswith(Job.SUPERSEDED))
+        self.assertEqual(job.locked_by, '')
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.status, Job.QUEUED)
+
+    def test_expired_lease_is_requeued(self):
+        enqueue(keyed_refresh, key='refresh')
+        job = self.claim_one()
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(Job.requeue_expired(600), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_expired_lease_is_superseded_by_queued_duplicate(self):
+        enqueue(keyed_refresh, key='refresh')
+        job = self.claim_one()
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        duplicate = enqueue(keyed_refresh, key='refresh')
+
+        self.assertEqual(Job.requeue_expired(600), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.last_error, Job.SUPERSEDED)
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.status, Job.QUEUED)
+
+    def test_maintenance_error_does_not_stop_the_worker(self):
+        worker = Worker({'default': 1})
+        with mock.patch.object(Job, 'requeue_expired', side_effect=RuntimeError('db gone')):
+            with self.assertLogs('thoughtnest.jobs', 'ERROR'):
+                worker.maintain()
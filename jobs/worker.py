@@ -0,0 +1,173 @@
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from .models import Job
+from .queue import get_task
+
+logger = logging.getLogger('thoughtnest.jobs')
+
+MAINTENANCE_INTERVAL = 60
+
+
+class QueueStats:
+    __slots__ = ('done', 'retried', 'failed', 'run_seconds', 'wait_seconds')
+
+    def __init__(self):
+        self.done = self.retried = self.failed = 0
+        self.run_seconds = self.wait_seconds = 0.0
+
+    @property
+    def finished(self):
+        return self.done + self.retried + self.failed
+
+
+class Worker:
+    """
+    Claims jobs for each queue in `queues` ({name: concurrency}) and runs them
+    on a thread pool per queue, so a slow queue cannot starve the others.
+    Only free slots are claimed, which leaves the rest of the backlog to other
+    worker processes. Each pool thread keeps its own database connection.
+    """
+
+    def __init__(self, queues, poll=1.0, name=None, report=None):
+        self.queues = queues
+        self.poll = poll
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.report = report or logger.info
+        self.lease = getattr(settings, 'JOB_LEASE_SECONDS', 600)
+        self.retention = getattr(settings, 'JOB_RETENTION_DAYS', 7)
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.totals = {queue: QueueStats() for queue in queues}
+        self.window = {queue: QueueStats() for queue in queues}
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self, burst=False, stats_interval=10):
+        executors = {
+            queue: ThreadPoolExecutor(concurrency, thread_name_prefix=f'job-{queue}')
+            for queue, concurrency in self.queues.items()
+        }
+        inflight = {queue: set() for queue in self.queues}
+        started = window_started = time.monotonic()
+        next_maintenance = 0
+        try:
+            while not self.stopping.is_set():
+                if time.monotonic() >= next_maintenance:
+                    self.maintain()
+                    next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+
+                claimed = 0
+                for queue, concurrency in self.queues.items():
+                    inflight[queue] = {future for future in inflight[queue] if not future.done()}
+                    free = concurrency - len(inflight[queue])
+                    if free <= 0:
+                        continue
+                    for job in Job.claim(queue, free, self.name):
+                        inflight[queue].add(executors[queue].submit(self.execute, job))
+                        claimed += 1
+
+                if stats_interval and time.monotonic() - window_started >= stats_interval:
+                    self.report_window(time.monotonic() - window_started)
+                    window_started = time.monotonic()
+
+                if claimed:
+                    continue
+                running = set().union(*inflight.values())
+                if not running:
+                    if burst:
+                        break
+                    self.stopping.wait(self.poll)
+                else:
+                    # Wake up as soon as a slot frees instead of sleeping a full poll
+                    wait(running, timeout=self.poll, return_when=FIRST_COMPLETED)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+            connections.close_all()
+        self.report_totals(time.monotonic() - started)
+
+    def maintain(self):
+        # Housekeeping only; a failure here must not stop the worker from running jobs
+        try:
+            requeued = Job.requeue_expired(self.lease)
+            if requeued:
+                logger.warning('Recovered %d job(s) whose lease expired', requeued)
+            if self.retention:
+                Job.purge(self.retention)
+        except Exception:
+            logger.exception('Job queue maintenance failed; retrying in %ds', MAINTENANCE_INTERVAL)
+
+    def execute(self, job):
+        close_old_connections()
+        waited = (timezone.now() - job.run_at).total_seconds()
+        started = time.monotonic()
+        error = None
+        try:
+            get_task(job.task)(**job.kwargs)
+        except Exception as exc:
+            error = exc
+        elapsed = time.monotonic() - started
+        # A failed task may have left its connection unusable
+        close_old_connections()
+
+        try:
+            if error is None:
+                job.mark_done()
+            else:
+                job.mark_failed(error)
+        except Exception:
+            # The lease expires and the job is retried
+            logger.exception('Could not record the outcome of %s', job)
+            return
+
+        if error is not None:
+            level = logging.ERROR if job.status == Job.FAILED else logging.WARNING
+            logger.log(level, '%s attempt %d/%d raised %r', job, job.attempts, job.max_attempts, error)
+        with self.lock:
+            for stats in (self.totals[job.queue], self.window[job.queue]):
+                if error is None:
+                    stats.done += 1
+                elif job.status == Job.FAILED:
+                    stats.failed += 1
+                else:
+                    stats.retried += 1
+                stats.run_seconds += elapsed
+                stats.wait_seconds += max(waited, 0)
+
+    def describe(self, queue, stats, seconds):
+        finished = stats.finished
+        line = (
+            f'{queue}: {stats.done} done, {stats.retried} retried, {stats.failed} failed '
+            f'in {seconds:.1f}s ({finished / seconds if seconds else 0:.1f} jobs/s)'
+        )
+        if finished:
+            line += (
+                f', run avg {stats.run_seconds / finished * 1000:.0f} ms'
+                f', wait avg {stats.wait_seconds / finished * 1000:.0f} ms'
+            )
+        return line
+
+    def report_window(self, seconds):
+        depths = Job.depths()
+        with self.lock:
+            window, self.window = self.window, {queue: QueueStats() for queue in self.queues}
+        for queue, stats in window.items():
+            depth = depths.get(queue, {})
+            self.report(
+                f'{self.describe(queue, stats, seconds)}; '
+                f'{depth.get("ready", 0)} ready, {depth.get("scheduled", 0)} scheduled'
+            )
+
+    def report_totals(self, seconds):
+        for queue, stats in self.totals.items():
+            self.report(f'total {self.describe(queue, stats, seconds)}')
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import NotificationEvent
+
+# Register your models here.
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'post', 'actor', 'created_at')
+    list_filter = ('kind',)
+    list_select_related = ('post', 'actor')
+    raw_id_fields = ('post', 'actor', 'comment')
@@ -0,0 +1,152 @@
+"""
+Email digests of likes and comments for post authors.
+
+send_digests() is the periodic batcher (run it with `manage.py send_digests
+--every N`). Each run:
+
+1. deletes events that will never be sent: older than
+   NOTIFICATION_EVENT_MAX_AGE_DAYS, for authors who turned
+   UserProfile.email_notifications off or have no email address, on the
+   author's own posts, on posts queued for deletion, or for likes that
+   were taken back;
+2. picks authors with pending events who have not had a digest in the last
+   NOTIFICATION_DIGEST_INTERVAL seconds (the per-recipient rate limit);
+3. builds one message per author and sends them through a single backend
+   connection with send_messages(), at most NOTIFICATION_EMAILS_PER_SECOND
+   and NOTIFICATION_MAX_EMAILS_PER_RUN per run (the relay-wide limits);
+4. after each batch is handed to the backend, deletes its events and stamps
+   UserProfile.last_digest_sent_at, so a failed send leaves them for the
+   next run.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from posts.models import Like
+
+from .models import NotificationEvent
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def send_digests(*, connection=None, rate=None, max_emails=None):
+    """Run one batching pass; returns counts for reporting"""
+    rate = _setting('NOTIFICATION_EMAILS_PER_SECOND', 10) if rate is None else rate
+    max_emails = _setting('NOTIFICATION_MAX_EMAILS_PER_RUN', 1000) if max_emails is None else max_emails
+    now = timezone.now()
+    result = {'emails': 0, 'events': 0, 'dropped': 0, 'waiting': 0, 'seconds': 0.0}
+
+    high_water = NotificationEvent.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if high_water is None:
+        return result
+    # Events recorded while this run is sending wait for the next one
+    pending = NotificationEvent.objects.filter(pk__lte=high_water)
+    result['dropped'] = drop_undeliverable(pending, now)
+
+    sendable = pending.filter(Q(kind=NotificationEvent.LIKE) | Q(comment__approved=True))
+    recent = now - timedelta(seconds=_setting('NOTIFICATION_DIGEST_INTERVAL', 3600))
+    limited = Q(post__author__profile__last_digest_sent_at__gt=recent)
+    recipients = list(
+        sendable.exclude(limited).order_by('post__author_id')
+        .values_list('post__author_id', flat=True).distinct()[:max_emails]
+    )
+    result['waiting'] = sendable.filter(limited).values('post__author_id').distinct().count()
+    if not recipients:
+        return result
+
+    chunk_size = max(int(rate), 1) if rate else 100
+    started = time.monotonic()
+    connection = connection or get_connection()
+    with connection:
+        for offset in range(0, len(recipients), chunk_size):
+            chunk_started = time.monotonic()
+            chunk = recipients[offset:offset + chunk_size]
+            events = list(
+                sendable.filter(post__author_id__in=chunk).order_by('pk').values(
+                    'pk', 'kind', 'post_id', 'post__title', 'actor__username',
+                    'post__author_id', 'post__author__username', 'post__author__first_name', 'post__author__email',
+                )
+            )
+            messages = build_messages(events)
+            connection.send_messages(messages)
+            with transaction.atomic():
+                NotificationEvent.objects.filter(pk__in=[event['pk'] for event in events]).delete()
+                UserProfile.objects.filter(user_id__in=chunk).update(last_digest_sent_at=now)
+            result['emails'] += len(messages)
+            result['events'] += len(events)
+            if rate:
+                # Stay under the relay's per-second limit
+                time.sleep(max(0.0, len(chunk) / rate - (time.monotonic() - chunk_started)))
+    result['seconds'] = time.monotonic() - started
+    return result
+
+
+def drop_undeliverable(pending, now):
+    max_age = timedelta(days=_setting('NOTIFICATION_EVENT_MAX_AGE_DAYS', 7))
+    liked = Like.objects.filter(post_id=OuterRef('post_id'), user_id=OuterRef('actor_id'))
+    undeliverable = (
+        Q(created_at__lt=now - max_age)
+        # Post (or its author) queued for deletion: the link would 404
+        | Q(post__deleted_at__isnull=False)
+        | Q(post__author__profile__email_notifications=False)
+        | Q(post__author__email='')
+        | Q(actor_id=F('post__author_id'))
+        | Q(kind=NotificationEvent.LIKE) & ~Exists(liked)
+    )
+    return pending.filter(undeliverable).delete()[0]
+
+
+def build_messages(events):
+    """One EmailMessage per recipient, grouping their events by post"""
+    site_url = _setting('SITE_URL', 'http://localhost:8000').rstrip('/')
+    by_recipient = defaultdict(list)
+    for event in events:
+        by_recipient[event['post__author_id']].append(event)
+
+    messages = []
+    for recipient_events in by_recipient.values():
+        first = recipient_events[0]
+        posts = {}
+        for event in recipient_events:
+            post = posts.setdefault(event['post_id'], {
+                'title': event['post__title'],
+                'url': site_url + reverse('post_detail', args=[event['post_id']]),
+                'likers': [], 'commenters': [], 'likes': 0, 'comments': 0,
+            })
+            key = 'likes' if event['kind'] == NotificationEvent.LIKE else 'comments'
+            post[key] += 1
+            names = post['likers' if key == 'likes' else 'commenters']
+            if event['actor__username'] not in names:
+                names.append(event['actor__username'])
+
+        likes = sum(post['likes'] for post in posts.values())
+        comments = sum(post['comments'] for post in posts.values())
+        parts = []
+        if likes:
+            parts.append(f"{likes} new like{'s' if likes != 1 else ''}")
+        if comments:
+            parts.append(f"{comments} new comment{'s' if comments != 1 else ''}")
+        context = {
+            'name': first['post__author__first_name'] or first['post__author__username'],
+            'posts': list(posts.values()),
+            'likes': likes,
+            'comments': comments,
+            'settings_url': site_url + reverse('profile_settings'),
+        }
+        messages.append(EmailMessage(
+            subject=f"ThoughtNest: {' and '.join(parts)} on your posts",
+            body=render_to_string('notifications/digest_email.txt', context),
+            to=[first['post__author__email']],
+        ))
+    return messages
@@ -0,0 +1,103 @@
+import random
+import re
+import time
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+
+from accounts.models import UserProfile
+from notifications.digest import send_digests
+from posts.models import Comment, Like, Post
+
+WRITE_RE = re.compile(r'^\s*(INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+
+class WriteCounter:
+    """execute_wrapper counting write statements, optionally only those touching `tables`"""
+
+    def __init__(self, tables=()):
+        self.tables = tables
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if WRITE_RE.match(sql) and (not self.tables or any(table in sql for table in self.tables)):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ('Simulates a burst of likes and comments on a few authors\' posts, then digests them '
+            'with the locmem email backend, all inside a rolled-back transaction. Reports DB '
+            'writes per event and emails/s against sending one email per event.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--authors', type=int, default=20,
+                            help='Spread the burst over the posts of this many authors (default: 20).')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        authors = list(
+            Post.objects.values('author_id').annotate(n=Count('pk')).order_by('-n')
+            .values_list('author_id', flat=True)[:options['authors']]
+        )
+        posts = list(Post.objects.filter(author_id__in=authors).values_list('pk', flat=True))
+        actors = list(get_user_model().objects.exclude(pk__in=authors).values_list('pk', flat=True)[:5000])
+        if not posts or not actors:
+            raise CommandError('Not enough posts and users; run seed_data first.')
+
+        with transaction.atomic():
+            # Every author in the burst is reachable and due a digest
+            User = get_user_model()
+            for author in User.objects.filter(pk__in=authors, email=''):
+                User.objects.filter(pk=author.pk).update(email=f'{author.username}@example.com')
+            UserProfile.objects.filter(user_id__in=authors).update(email_notifications=True, last_digest_sent_at=None)
+
+            recorded = WriteCounter(tables=('notifications_notificationevent',))
+            events = 0
+            with connection.execute_wrapper(recorded):
+                while events < options['events']:
+                    post_id, actor_id = rng.choice(posts), rng.choice(actors)
+                    if events % 2:
+                        Comment.objects.create(post_id=post_id, author_id=actor_id, content='Benchmark comment')
+                    else:
+                        try:
+                            with transaction.atomic():
+                                Like.objects.create(post_id=post_id, user_id=actor_id)
+                        except IntegrityError:
+                            continue
+                    events += 1
+
+            digested = WriteCounter()
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+                mail.outbox = []
+                with connection.execute_wrapper(digested):
+                    result = send_digests(rate=0, max_emails=events)
+                sent = len(mail.outbox)
+
+                # The same events as one email each, a connection per message
+                mail.outbox = []
+                started = time.monotonic()
+                for index in range(events):
+                    mail.send_mail('ThoughtNest: new activity', 'Someone liked your post.', None, ['author@example.com'])
+                per_event_seconds = time.monotonic() - started
+            transaction.set_rollback(True)
+
+        seconds = result['seconds']
+        self.stdout.write(f'{events} events on the posts of {len(authors)} authors (rolled back afterwards)')
+        self.stdout.write(f'  recording: {recorded.count / events:.2f} DB writes per event')
+        self.stdout.write(
+            f'  digests:   {sent} emails over 1 connection for {result["events"]} events '
+            f'({result["events"] / max(sent, 1):.0f} events/email) in {seconds:.3f}s = '
+            f'{sent / seconds if seconds else 0:.0f} emails/s, {result["events"] / seconds if seconds else 0:.0f} events/s; '
+            f'{digested.count} DB writes ({digested.count / events:.3f} per event)'
+        )
+        self.stdout.write(
+            f'  per event: {events} emails over {events} connections in {per_event_seconds:.3f}s = '
+            f'{events / per_event_seconds if per_event_seconds else 0:.0f} emails/s, same events/s'
+        )
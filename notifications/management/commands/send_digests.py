@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.digest import send_digests
+
+
+class Command(BaseCommand):
+    help = ('Coalesces pending like/comment events into one digest email per post author and '
+            'sends them over a single connection. Schedule it (cron, or --every N).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, help='Repeat every N seconds until interrupted.')
+        parser.add_argument('--rate', type=float,
+                            help='Emails per second (default: NOTIFICATION_EMAILS_PER_SECOND; 0 = unpaced).')
+        parser.add_argument('--max-emails', type=int, help='Emails per run (default: NOTIFICATION_MAX_EMAILS_PER_RUN).')
+
+    def handle(self, *args, **options):
+        while True:
+            result = send_digests(rate=options['rate'], max_emails=options['max_emails'])
+            rate = result['emails'] / result['seconds'] if result['seconds'] else 0.0
+            self.stdout.write(
+                f'Sent {result["emails"]} digest(s) covering {result["events"]} event(s) in '
+                f'{result["seconds"]:.2f}s ({rate:.1f} emails/s); dropped {result["dropped"]} '
+                f'undeliverable event(s); {result["waiting"]} author(s) waiting for their digest interval.'
+            )
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Like, Post
+
+# Create your models here.
+
+class NotificationEvent(models.Model):
+    """
+    Something a post author should hear about, recorded with one INSERT when
+    it happens and consumed by notifications.digest.send_digests(), which
+    coalesces each author's events into one email and deletes them. The
+    recipient is not stored; it is the post's author at digest time.
+
+    The foreign keys are indexed even though the table only holds events that
+    have not been digested yet: deleting a post, user or comment cascades
+    here, and without an index each of those deletes scans the whole table
+    while holding the write lock, which costs far more than the extra index
+    writes on the like/comment path.
+    """
+    LIKE = 'like'
+    COMMENT = 'comment'
+    KIND_CHOICES = [
+        (LIKE, 'Like'),
+        (COMMENT, 'Comment'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    comment = models.ForeignKey(
+        Comment, on_delete=models.CASCADE, null=True, blank=True, related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} on post #{self.post_id} by user #{self.actor_id}"
+
+
+@receiver(post_save, sender=Like)
+def record_like(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        NotificationEvent.objects.create(kind=NotificationEvent.LIKE, post_id=instance.post_id, actor_id=instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment(sender, instance, created, raw=False, **kwargs):
+    # Comments held for moderation wait in the queue until approved
+    if created and not raw and instance.author_id is not None:
+        NotificationEvent.objects.create(
+            kind=NotificationEvent.COMMENT, post_id=instance.post_id, actor_id=instance.author_id, comment=instance,
+        )
@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import Post, Category, Tag, Comment, Like
+from .models import Post, Category, Tag, Comment, Like, DeletionRequest, ImportCheckpoint
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-	list_display = ('title', 'author', 'category', 'status', 'created_at')
+	list_display = ('title', 'author', 'category', 'status', 'like_count', 'comment_count', 'created_at')
 	list_filter = ('status', 'category', 'created_at')
 	search_fields = ('title', 'content')
 	fields = ('title', 'author', 'category', 'tags', 'content', 'status', 'created_at', 'updated_at')
@@ -31,3 +31,15 @@ class CommentAdmin(admin.ModelAdmin):
 class LikeAdmin(admin.ModelAdmin):
 	list_display = ('post', 'user', 'created_at')
 	search_fields = ('post__title', 'user__username')
+
+@admin.register(DeletionRequest)
+class DeletionRequestAdmin(admin.ModelAdmin):
+	list_display = ('kind', 'label', 'status', 'deleted', 'total', 'requested_by', 'created_at', 'finished_at')
+	list_filter = ('kind', 'status')
+	readonly_fields = ('kind', 'target_id', 'label', 'status', 'requested_by', 'total', 'deleted', 'last_error', 'created_at', 'updated_at', 'finished_at')
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+	list_display = ('kind', 'source', 'rows', 'imported', 'skipped', 'updated_at', 'finished_at')
+	list_filter = ('kind',)
+	readonly_fields = ('kind', 'source', 'rows', 'imported', 'skipped', 'first_created', 'last_created', 'created_at', 'updated_at', 'finished_at')
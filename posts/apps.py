@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from thoughtnest.sqlite import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid='thoughtnest.sqlite.configure_connection')
@@ -0,0 +1,210 @@
+"""
+Deferred, chunked deletion of users, posts, categories, tags and comments.
+
+Deleting a popular post or a prolific user with Model.delete() runs the whole
+cascade in one request: Django loads every dependent row to fire its signals
+and holds one long write transaction over the comment, like and post tables.
+Instead, schedule_*() marks the target and queues a DeletionRequest:
+
+- the mark hides the target at once. Posts, categories and tags get
+  deleted_at, which their default manager filters out. A user is deactivated
+  and their posts are marked;
+- posts.tasks.purge_deletion then removes the dependents in chunks, one
+  short transaction each. A chunk is at most DELETION_CHUNK_SIZE rows and is
+  shrunk while chunks take longer than DELETION_CHUNK_SECONDS, since a row's
+  cost varies (signals, search index, cascades). Comment and like chunks go
+  through CounterQuerySet.delete(), so Post counters, SiteCounters and
+  AuthorStats are adjusted as rows go. After DELETION_TIME_SLICE seconds the
+  task re-queues itself rather than holding a worker for the whole purge;
+- only one purge runs at a time (claim()), so purges do not queue up on the
+  write lock behind each other; the others wait for their turn;
+- the target row itself is deleted last.
+
+Each phase selects "rows still left", so a purge that fails or is interrupted
+simply resumes when the job is retried.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils import timezone
+
+from jobs.queue import enqueue
+from thoughtnest.sqlite import immediate_atomic
+
+from . import page_cache
+from .models import Category, Comment, DeletionRequest, Like, Post, Tag
+
+
+def _setting(name, default):
+	return getattr(settings, name, default)
+
+
+def _schedule(kind, target_id, label, requested_by):
+	request = DeletionRequest.objects.create(
+		kind=kind, target_id=target_id, label=label[:200], requested_by=requested_by,
+	)
+	request.total = rows_left(request)
+	DeletionRequest.objects.filter(pk=request.pk).update(total=request.total)
+	enqueue('posts.tasks.purge_deletion', {'request_id': request.pk}, key=f'deletion:{request.pk}')
+	page_cache.bump_version()
+	return request
+
+
+def schedule_post(post, requested_by=None):
+	with immediate_atomic():
+		Post.objects.filter(pk=post.pk).update(deleted_at=timezone.now())
+		return _schedule(DeletionRequest.KIND_POST, post.pk, post.title, requested_by)
+
+
+def schedule_user(user, requested_by=None):
+	with immediate_atomic():
+		get_user_model().objects.filter(pk=user.pk).update(is_active=False)
+		Post.objects.filter(author=user).update(deleted_at=timezone.now())
+		return _schedule(DeletionRequest.KIND_USER, user.pk, user.username, requested_by)
+
+
+def schedule_category(category, requested_by=None):
+	with immediate_atomic():
+		Category.objects.filter(pk=category.pk).update(deleted_at=timezone.now())
+		return _schedule(DeletionRequest.KIND_CATEGORY, category.pk, category.name, requested_by)
+
+
+def schedule_tag(tag, requested_by=None):
+	with immediate_atomic():
+		Tag.objects.filter(pk=tag.pk).update(deleted_at=timezone.now())
+		return _schedule(DeletionRequest.KIND_TAG, tag.pk, tag.name, requested_by)
+
+
+def schedule_comment_wipe(requested_by=None):
+	"""Delete every comment that exists now; later ones are kept"""
+	with immediate_atomic():
+		high_water = Comment.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+		return _schedule(DeletionRequest.KIND_COMMENTS, high_water, 'all comments', requested_by)
+
+
+def _delete(manager):
+	"""Chunk remover deleting through `manager`; counts only that model's rows"""
+	def remove(ids):
+		return manager.filter(pk__in=ids).delete()[1].get(manager.model._meta.label, 0)
+	return remove
+
+
+def _update(manager, **values):
+	return lambda ids: manager.filter(pk__in=ids).update(**values)
+
+
+def phases(request):
+	"""(rows left, how to remove a chunk of them) in the order they must go"""
+	target = request.target_id
+	User = get_user_model()
+	if request.kind == DeletionRequest.KIND_POST:
+		posts = [target]
+		steps = []
+	elif request.kind == DeletionRequest.KIND_USER:
+		posts = Post.all_objects.filter(author_id=target).values('pk')
+		steps = [
+			# Comments outlive their author (author is SET_NULL), as with User.delete()
+			(Comment.objects.filter(author_id=target), _update(Comment.objects, author=None)),
+			(Like.objects.filter(user_id=target), _delete(Like.objects)),
+		]
+	elif request.kind == DeletionRequest.KIND_CATEGORY:
+		return [
+			(Post.all_objects.filter(category_id=target), _update(Post.all_objects, category=None)),
+			(Category.all_objects.filter(pk=target), _delete(Category.all_objects)),
+		]
+	elif request.kind == DeletionRequest.KIND_TAG:
+		links = Post.tags.through.objects
+		return [
+			(links.filter(tag_id=target), _delete(links)),
+			(Tag.all_objects.filter(pk=target), _delete(Tag.all_objects)),
+		]
+	elif request.kind == DeletionRequest.KIND_COMMENTS:
+		return [(Comment.objects.filter(pk__lte=target), _delete(Comment.objects))]
+	else:
+		raise ValueError(f'Unknown deletion kind {request.kind!r}')
+
+	steps += [
+		(Comment.objects.filter(post_id__in=posts), _delete(Comment.objects)),
+		(Like.objects.filter(post_id__in=posts), _delete(Like.objects)),
+		(Post.all_objects.filter(pk__in=posts), _delete(Post.all_objects)),
+	]
+	if request.kind == DeletionRequest.KIND_USER:
+		steps.append((User._base_manager.filter(pk=target), _delete(User._base_manager)))
+	return steps
+
+
+def rows_left(request):
+	"""
+	Rows the phases still have to remove, in the units purge() counts in
+	`deleted`. Rows cascaded by a removal (notification events, M2M links)
+	are left out on both sides.
+	"""
+	return sum(remaining.count() for remaining, remove in phases(request))
+
+
+def claim(request):
+	"""
+	Mark `request` running unless another purge is running; returns whether it
+	may go ahead. A running request that has not moved for a few time slices
+	lost its worker and no longer holds the turn.
+	"""
+	stale = timezone.now() - timedelta(seconds=3 * _setting('DELETION_TIME_SLICE', 20) + 30)
+	with immediate_atomic():
+		# Locking every open request serializes claimers on Postgres too
+		active = DeletionRequest.objects.select_for_update().exclude(status=DeletionRequest.STATUS_DONE)
+		for pk, status, updated_at in active.values_list('pk', 'status', 'updated_at'):
+			if pk != request.pk and status == DeletionRequest.STATUS_RUNNING and updated_at >= stale:
+				return False
+		DeletionRequest.objects.filter(pk=request.pk).update(
+			status=DeletionRequest.STATUS_RUNNING, updated_at=timezone.now(),
+		)
+	return True
+
+
+def purge(request, chunk_size=None, time_slice=None):
+	"""
+	Work through `request` for up to time_slice seconds. Returns True when
+	everything is gone, False when there is more left for the next slice.
+	"""
+	chunk_size = chunk_size or _setting('DELETION_CHUNK_SIZE', 100)
+	chunk_seconds = _setting('DELETION_CHUNK_SECONDS', 0.25)
+	time_slice = _setting('DELETION_TIME_SLICE', 20) if time_slice is None else time_slice
+	deadline = time.monotonic() + time_slice
+	# Comments and likes may have come or gone since the last slice
+	DeletionRequest.objects.filter(pk=request.pk).update(total=F('deleted') + rows_left(request))
+	DeletionRequest.objects.filter(pk=request.pk, status=DeletionRequest.STATUS_PENDING).update(
+		status=DeletionRequest.STATUS_RUNNING,
+	)
+
+	size = chunk_size
+	for remaining, remove in phases(request):
+		while True:
+			if time.monotonic() >= deadline:
+				# Hand the turn to the next waiting purge
+				DeletionRequest.objects.filter(pk=request.pk).update(status=DeletionRequest.STATUS_PENDING)
+				return False
+			# One short write transaction per chunk keeps other writers moving
+			started = time.monotonic()
+			with immediate_atomic():
+				ids = list(remaining.order_by('pk').values_list('pk', flat=True)[:size])
+				if not ids:
+					break
+				removed = remove(ids)
+				DeletionRequest.objects.filter(pk=request.pk).update(
+					deleted=F('deleted') + removed, updated_at=timezone.now(),
+				)
+			elapsed = time.monotonic() - started
+			if elapsed > chunk_seconds:
+				size = max(1, size // 2)
+			elif elapsed < chunk_seconds / 2:
+				size = min(chunk_size, size * 2)
+
+	DeletionRequest.objects.filter(pk=request.pk).update(
+		status=DeletionRequest.STATUS_DONE, total=F('deleted'), finished_at=timezone.now(), updated_at=timezone.now(),
+		last_error='',
+	)
+	page_cache.bump_version()
+	return True
@@ -0,0 +1,77 @@
+"""
+Datasets behind the staff exports (the admin export view and the export_data
+command). Each one pairs the queryset and filters of its admin list page with
+a flat values() projection, so rows are read as tuples without building
+model instances or following relations one row at a time.
+"""
+from accounts.filters import filter_user_profiles
+from accounts.models import UserProfile
+from thoughtnest.streaming import iter_values
+
+from .filters import filter_admin_comments, filter_admin_likes, filter_admin_posts
+from .models import Comment, Like, Post
+
+
+class Dataset:
+    def __init__(self, queryset, filter, columns):
+        self.queryset = queryset
+        self.filter = filter
+        # (column name, values() path) pairs
+        self.columns = columns
+
+    @property
+    def names(self):
+        return [name for name, _ in self.columns]
+
+    def rows(self, params, chunk_size):
+        """Row tuples for the list page's GET parameters `params`"""
+        queryset = self.filter(self.queryset(), params)
+        return iter_values(queryset, [path for _, path in self.columns], chunk_size)
+
+
+DATASETS = {
+    'posts': Dataset(lambda: Post.objects.all(), filter_admin_posts, [
+        ('id', 'id'),
+        ('title', 'title'),
+        ('author', 'author__username'),
+        ('category', 'category__name'),
+        ('status', 'status'),
+        ('likes', 'like_count'),
+        ('comments', 'comment_count'),
+        ('approved_comments', 'approved_comment_count'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]),
+    'comments': Dataset(lambda: Comment.objects.all(), filter_admin_comments, [
+        ('id', 'id'),
+        ('post_id', 'post_id'),
+        ('post_title', 'post__title'),
+        ('author', 'author__username'),
+        ('approved', 'approved'),
+        ('content', 'content'),
+        ('created_at', 'created_at'),
+    ]),
+    'likes': Dataset(lambda: Like.objects.all(), filter_admin_likes, [
+        ('id', 'id'),
+        ('post_id', 'post_id'),
+        ('post_title', 'post__title'),
+        ('user', 'user__username'),
+        ('created_at', 'created_at'),
+    ]),
+    'users': Dataset(lambda: UserProfile.objects.all(), filter_user_profiles, [
+        ('id', 'user_id'),
+        ('username', 'user__username'),
+        ('email', 'user__email'),
+        ('first_name', 'user__first_name'),
+        ('last_name', 'user__last_name'),
+        ('is_staff', 'user__is_staff'),
+        ('is_active', 'user__is_active'),
+        ('date_joined', 'user__date_joined'),
+        ('last_login', 'user__last_login'),
+        ('location', 'location'),
+        ('website', 'website'),
+        ('posts', 'user__author_stats__posts'),
+        ('comments', 'user__author_stats__comments_given'),
+        ('likes', 'user__author_stats__likes_given'),
+    ]),
+}
@@ -0,0 +1,68 @@
+"""
+Filters for the staff post, comment and like lists, shared by the admin pages
+and their exports so both select exactly the same rows.
+
+Each function takes a queryset and the request's GET parameters (any mapping)
+and returns the filtered queryset; ordering and select_related are left to
+the caller.
+"""
+from django.db.models import Q
+
+from thoughtnest.dates import date_range_start
+
+from .search import matching_post_ids
+
+
+def _person_search(prefix, user_search):
+    return (
+        Q(**{f'{prefix}__username__icontains': user_search}) |
+        Q(**{f'{prefix}__first_name__icontains': user_search}) |
+        Q(**{f'{prefix}__last_name__icontains': user_search})
+    )
+
+
+def filter_admin_posts(posts, params):
+    """?search= (full text or author name), ?category=, ?status="""
+    search_query = params.get('search', '').strip()
+    category_id = params.get('category', '').strip()
+    status = params.get('status', '').strip()
+
+    if search_query:
+        posts = posts.filter(
+            Q(pk__in=matching_post_ids(
+                search_query,
+                category=category_id or None,
+                status=status or None,
+            )) |
+            _person_search('author', search_query)
+        )
+    if category_id:
+        posts = posts.filter(category_id=category_id)
+    if status:
+        posts = posts.filter(status=status)
+    return posts
+
+
+def _filter_activity(queryset, params, person):
+    user_search = params.get('user_search', '').strip()
+    post_id = params.get('post', '')
+
+    queryset = queryset.live()
+    if user_search:
+        queryset = queryset.filter(_person_search(person, user_search))
+    if post_id:
+        queryset = queryset.filter(post_id=post_id)
+    range_start = date_range_start(params.get('date_range', ''))
+    if range_start:
+        queryset = queryset.filter(created_at__gte=range_start)
+    return queryset
+
+
+def filter_admin_comments(comments, params):
+    """?user_search= (author name), ?post=, ?date_range="""
+    return _filter_activity(comments, params, 'author')
+
+
+def filter_admin_likes(likes, params):
+    """?user_search= (liker name), ?post=, ?date_range="""
+    return _filter_activity(likes, params, 'user')
@@ -0,0 +1,460 @@
+"""
+Bulk import of users, posts and comments from another platform
+(`manage.py import_content`).
+
+Creating rows one at a time, as post_create does, costs a handful of queries
+per row: a get_or_create per tag, then post_save handlers for the profile,
+counters, stats and the search index. The importer streams the source file
+instead and handles it in batches, each in one write transaction:
+
+- authors, categories and tags are resolved through in-memory name -> pk
+  maps. Only the names missing from a map are loaded, with one IN query per
+  batch, and missing categories and tags are created with one bulk insert;
+- rows, their tag links and their ImportedObject entries go in with
+  bulk_create, which fires no signals;
+- what those signals would have done is applied once per batch: profiles
+  and AuthorStats rows for new users, Post counters and AuthorStats
+  recounted for the posts and people touched, SiteCounters bumped by the
+  batch totals, and the new posts indexed for search;
+- the ImportCheckpoint advances, so a rerun of the same file resumes after
+  the last committed batch.
+
+Records are JSON objects, one per line, or CSV rows with a header:
+
+- users:    username, email, first_name, last_name, password (an existing
+            Django password hash; anything else leaves the password
+            unusable), is_active, date_joined, bio, location, website,
+            twitter, github, linkedin
+- posts:    id, title, content, author (username), category (name), tags
+            (a list, or a comma separated string), status, created_at,
+            updated_at
+- comments: id, post (a post id from the posts file), author (username;
+            empty for a deleted user), content, approved, created_at
+
+`id` is the record's id on the source platform; it is optional except on
+posts that comments refer to.
+"""
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import connections, router
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from accounts.models import UserProfile
+from stats.models import AuthorStats, DailyStats, SiteCounters
+from thoughtnest.sqlite import immediate_atomic
+
+from . import page_cache, search
+from .models import (
+	Category, Comment, ImportCheckpoint, ImportedObject, Post, Tag, counted_rows_bulk_created,
+)
+from .tags import MAX_TAGS_PER_POST, normalize_tag_name
+
+PROFILE_FIELDS = ('bio', 'location', 'website', 'twitter', 'github', 'linkedin')
+
+_TRUE = {'1', 'true', 'yes', 'y', 't', 'on'}
+
+
+class SkipRecord(Exception):
+	"""The record cannot be imported; the message says why"""
+
+
+@contextmanager
+def explicit_timestamps(*models):
+	"""Let bulk_create keep the given created_at / updated_at values instead of now()"""
+	fields = [
+		field for model in models for field in model._meta.concrete_fields
+		if getattr(field, 'auto_now_add', False) or getattr(field, 'auto_now', False)
+	]
+	saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+	for field in fields:
+		field.auto_now = field.auto_now_add = False
+	try:
+		yield
+	finally:
+		for field, auto_now, auto_now_add in saved:
+			field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+# -- reading ---------------------------------------------------------------
+
+def guess_format(path):
+	name = path[:-3] if path.endswith('.gz') else path
+	return 'csv' if name.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(path, format=None, skip=0):
+	"""
+	Yield one dict per record of a JSONL or CSV file ('-' reads stdin, a .gz
+	name is decompressed on the fly), leaving out the first `skip` records.
+	A JSON line that does not parse to an object yields None.
+	"""
+	format = format or guess_format(path)
+	if path == '-':
+		stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+	elif path.endswith('.gz'):
+		stream = gzip.open(path, 'rt', encoding='utf-8-sig', newline='')
+	else:
+		stream = open(path, encoding='utf-8-sig', newline='')
+
+	with stream:
+		if format == 'csv':
+			yield from itertools.islice(csv.DictReader(stream), skip, None)
+			return
+		lines = (line for line in stream if line.strip())
+		# Skipped lines are counted, not parsed
+		for line in itertools.islice(lines, skip, None):
+			try:
+				record = json.loads(line)
+			except ValueError:
+				record = None
+			yield record if isinstance(record, dict) else None
+
+
+def _text(record, field, max_length=None):
+	value = record.get(field)
+	value = '' if value is None else str(value).strip()
+	return value[:max_length] if max_length else value
+
+
+def _required(record, field, max_length=None):
+	value = _text(record, field, max_length)
+	if not value:
+		raise SkipRecord(f'no {field}')
+	return value
+
+
+def _flag(record, field, default):
+	value = record.get(field)
+	if value is None or value == '':
+		return default
+	if isinstance(value, bool):
+		return value
+	return str(value).strip().lower() in _TRUE
+
+
+def _timestamp(value, default):
+	"""ISO 8601 datetime or date, or Unix seconds; naive times are in the site time zone"""
+	if value is None or value == '':
+		return default
+	if isinstance(value, (int, float)):
+		return datetime.fromtimestamp(value, dt_timezone.utc)
+	value = str(value).strip()
+	try:
+		parsed = parse_datetime(value)
+		if parsed is None:
+			day = parse_date(value)
+			parsed = datetime.combine(day, time.min) if day else None
+	except ValueError:
+		parsed = None
+	if parsed is None:
+		raise SkipRecord('bad timestamp')
+	if timezone.is_naive(parsed):
+		parsed = timezone.make_aware(parsed)
+	return parsed
+
+
+def _tag_names(value):
+	"""A list or comma separated string -> unique normalized tag names"""
+	if not value:
+		return []
+	raw = value.split(',') if isinstance(value, str) else value
+	names = []
+	for item in raw:
+		name = normalize_tag_name(str(item))
+		if name and name not in names:
+			names.append(name)
+	return names[:MAX_TAGS_PER_POST]
+
+
+def _password(value):
+	if value:
+		try:
+			identify_hasher(value)
+			return value
+		except ValueError:
+			pass
+	return make_password(None)
+
+
+# -- lookups ---------------------------------------------------------------
+
+class Lookups:
+	"""
+	name -> pk maps for one import run. Categories and tags are loaded whole
+	up front; authors as batches mention them.
+	"""
+
+	def __init__(self):
+		self.users = {}
+		self.categories = dict(Category.all_objects.values_list('name', 'pk'))
+		self.tags = dict(Tag.all_objects.values_list('name', 'pk'))
+
+	def load_users(self, usernames):
+		missing = {name for name in usernames if name and name not in self.users}
+		if missing:
+			found = dict(get_user_model().objects.filter(username__in=missing).values_list('username', 'pk'))
+			for name in missing:
+				# Remember misses too, so an unknown author costs one lookup per run
+				self.users[name] = found.get(name)
+
+	def _ensure(self, model, known, names):
+		missing = {name for name in names if name not in known}
+		if missing:
+			# ignore_conflicts: the web app may create the same name meanwhile
+			model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+			created = dict(model.all_objects.filter(name__in=missing).values_list('name', 'pk'))
+			known.update(created)
+			if created:
+				counted_rows_bulk_created.send(sender=model, count=len(created))
+
+	def ensure_categories(self, names):
+		self._ensure(Category, self.categories, names)
+
+	def ensure_tags(self, names):
+		self._ensure(Tag, self.tags, names)
+
+
+def _imported(kind, source_ids):
+	"""{source id: object id} for records of `kind` imported before"""
+	if not source_ids:
+		return {}
+	return dict(
+		ImportedObject.objects.filter(kind=kind, source_id__in=source_ids).values_list('source_id', 'object_id')
+	)
+
+
+def _record_imported(kind, pairs):
+	ImportedObject.objects.bulk_create([
+		ImportedObject(kind=kind, source_id=source_id, object_id=object_id) for source_id, object_id in pairs
+	])
+
+
+def _source_id(record):
+	return _text(record, 'id', ImportedObject._meta.get_field('source_id').max_length)
+
+
+# -- batches ---------------------------------------------------------------
+# Each importer takes a list of records (None for unreadable ones) and
+# returns (imported objects' timestamps, Counter of skip reasons).
+
+def import_users(records, lookups):
+	User = get_user_model()
+	skipped = Counter()
+	names = [_text(record, 'username') for record in records if record]
+	taken = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+
+	users, profiles = [], []
+	for record in records:
+		try:
+			if record is None:
+				raise SkipRecord('unreadable record')
+			username = _required(record, 'username', 150)
+			if username in taken:
+				raise SkipRecord('username taken')
+			user = User(
+				username=username,
+				email=_text(record, 'email', 254),
+				first_name=_text(record, 'first_name', 150),
+				last_name=_text(record, 'last_name', 150),
+				password=_password(_text(record, 'password')),
+				is_active=_flag(record, 'is_active', True),
+				date_joined=_timestamp(record.get('date_joined'), timezone.now()),
+			)
+		except SkipRecord as exc:
+			skipped[str(exc)] += 1
+			continue
+		taken.add(username)
+		users.append(user)
+		profiles.append({field: _text(record, field) for field in PROFILE_FIELDS})
+
+	if users:
+		User.objects.bulk_create(users)
+		# What the post_save handlers would have created
+		UserProfile.objects.bulk_create([
+			UserProfile(user_id=user.pk, **fields) for user, fields in zip(users, profiles)
+		])
+		AuthorStats.rebuild([user.pk for user in users])
+		SiteCounters.bump(users=len(users))
+		lookups.users.update((user.username, user.pk) for user in users)
+	return [user.date_joined for user in users], skipped
+
+
+def import_posts(records, lookups):
+	skipped = Counter()
+	readable = [record for record in records if record]
+	done = _imported(ImportCheckpoint.KIND_POSTS, [_source_id(record) for record in readable if _source_id(record)])
+	lookups.load_users(_text(record, 'author') for record in readable)
+	category_field = Category._meta.get_field('name')
+	lookups.ensure_categories({
+		name for record in readable if (name := _text(record, 'category', category_field.max_length))
+	})
+	lookups.ensure_tags({name for record in readable for name in _tag_names(record.get('tags'))})
+
+	now = timezone.now()
+	statuses = {status for status, _ in Post.STATUS_CHOICES}
+	posts, tag_names, source_ids = [], [], []
+	for record in records:
+		try:
+			if record is None:
+				raise SkipRecord('unreadable record')
+			source_id = _source_id(record)
+			if source_id and (source_id in done or source_id in source_ids):
+				raise SkipRecord('already imported')
+			author_id = lookups.users.get(_required(record, 'author'))
+			if author_id is None:
+				raise SkipRecord('unknown author')
+			status = _text(record, 'status').lower() or Post.STATUS_PUBLISHED
+			if status not in statuses:
+				raise SkipRecord('unknown status')
+			category = _text(record, 'category', category_field.max_length)
+			created = _timestamp(record.get('created_at'), now)
+			post = Post(
+				author_id=author_id,
+				category_id=lookups.categories[category] if category else None,
+				title=_required(record, 'title', Post._meta.get_field('title').max_length),
+				content=_text(record, 'content'),
+				status=status,
+				created_at=created,
+				updated_at=_timestamp(record.get('updated_at'), created),
+			)
+		except SkipRecord as exc:
+			skipped[str(exc)] += 1
+			continue
+		posts.append(post)
+		tag_names.append(_tag_names(record.get('tags')))
+		source_ids.append(source_id)
+
+	if posts:
+		Post.objects.bulk_create(posts)
+		through = Post.tags.through
+		through.objects.bulk_create([
+			through(post_id=post.pk, tag_id=lookups.tags[name])
+			for post, names in zip(posts, tag_names) for name in names
+		])
+		_record_imported(ImportCheckpoint.KIND_POSTS, [
+			(source_id, post.pk) for source_id, post in zip(source_ids, posts) if source_id
+		])
+		search.index_posts([post.pk for post in posts])
+		Post.refresh_trending(Post.all_objects.filter(pk__in=[post.pk for post in posts]))
+		published = sum(post.status == Post.STATUS_PUBLISHED for post in posts)
+		SiteCounters.bump(posts=len(posts), published_posts=published, draft_posts=len(posts) - published)
+		AuthorStats.rebuild({post.author_id for post in posts})
+	return [post.created_at for post in posts], skipped
+
+
+def import_comments(records, lookups):
+	skipped = Counter()
+	readable = [record for record in records if record]
+	done = _imported(ImportCheckpoint.KIND_COMMENTS, [_source_id(record) for record in readable if _source_id(record)])
+	post_ids = _imported(ImportCheckpoint.KIND_POSTS, {_text(record, 'post') for record in readable} - {''})
+	lookups.load_users(_text(record, 'author') for record in readable)
+
+	now = timezone.now()
+	comments, source_ids = [], []
+	for record in records:
+		try:
+			if record is None:
+				raise SkipRecord('unreadable record')
+			source_id = _source_id(record)
+			if source_id and (source_id in done or source_id in source_ids):
+				raise SkipRecord('already imported')
+			post_id = post_ids.get(_required(record, 'post'))
+			if post_id is None:
+				raise SkipRecord('unknown post')
+			author = _text(record, 'author')
+			author_id = lookups.users.get(author) if author else None
+			if author and author_id is None:
+				raise SkipRecord('unknown author')
+			created = _timestamp(record.get('created_at'), now)
+			comment = Comment(
+				post_id=post_id,
+				author_id=author_id,
+				content=_required(record, 'content'),
+				approved=_flag(record, 'approved', True),
+				created_at=created,
+				updated_at=created,
+			)
+		except SkipRecord as exc:
+			skipped[str(exc)] += 1
+			continue
+		comments.append(comment)
+		source_ids.append(source_id)
+
+	if comments:
+		Comment.objects.bulk_create(comments)
+		_record_imported(ImportCheckpoint.KIND_COMMENTS, [
+			(source_id, comment.pk) for source_id, comment in zip(source_ids, comments) if source_id
+		])
+		touched = Post.all_objects.filter(pk__in={comment.post_id for comment in comments})
+		Post.rebuild_counters(touched)
+		Post.refresh_trending(touched)
+		SiteCounters.bump(comments=len(comments))
+		people = {comment.author_id for comment in comments if comment.author_id}
+		people.update(touched.values_list('author_id', flat=True))
+		AuthorStats.rebuild(people)
+	return [comment.created_at for comment in comments], skipped
+
+
+IMPORTERS = {
+	ImportCheckpoint.KIND_USERS: import_users,
+	ImportCheckpoint.KIND_POSTS: import_posts,
+	ImportCheckpoint.KIND_COMMENTS: import_comments,
+}
+
+
+# -- runs ------------------------------------------------------------------
+
+def import_file(kind, path, *, format=None, batch_size=1000, restart=False, progress=None):
+	"""
+	Import `path` as records of `kind`, resuming from its checkpoint unless
+	`restart`. progress(checkpoint, skipped) is called after every batch with
+	the run's Counter of skip reasons. Returns (checkpoint, skipped).
+	"""
+	if not connections[router.db_for_write(Post)].features.can_return_rows_from_bulk_insert:
+		raise RuntimeError('Importing needs a database that returns ids from bulk inserts')
+	source = path if path == '-' else os.path.abspath(path)
+	checkpoint, _ = ImportCheckpoint.objects.get_or_create(kind=kind, source=source)
+	if restart:
+		checkpoint.rows = checkpoint.imported = checkpoint.skipped = 0
+		checkpoint.first_created = checkpoint.last_created = checkpoint.finished_at = None
+		checkpoint.save()
+
+	import_batch = IMPORTERS[kind]
+	lookups = Lookups()
+	records = read_records(path, format, skip=checkpoint.rows)
+	skipped = Counter()
+	with explicit_timestamps(Post, Comment):
+		while batch := list(itertools.islice(records, batch_size)):
+			with immediate_atomic():
+				created, batch_skipped = import_batch(batch, lookups)
+				checkpoint.rows += len(batch)
+				checkpoint.imported += len(created)
+				checkpoint.skipped += sum(batch_skipped.values())
+				if created:
+					checkpoint.first_created = min(filter(None, [checkpoint.first_created, *created]))
+					checkpoint.last_created = max(filter(None, [checkpoint.last_created, *created]))
+				checkpoint.save()
+				page_cache.bump_version()
+			skipped.update(batch_skipped)
+			if progress:
+				progress(checkpoint, skipped)
+
+	if checkpoint.first_created:
+		DailyStats.rollup(
+			timezone.localdate(checkpoint.first_created), timezone.localdate(checkpoint.last_created),
+		)
+	checkpoint.finished_at = timezone.now()
+	checkpoint.save(update_fields=['finished_at', 'updated_at'])
+	return checkpoint, skipped
@@ -0,0 +1,97 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from posts.models import Post
+
+# Environment overrides for thoughtnest.database, one child process per mode
+MODES = {
+    'per-request': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'false'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'false'},
+    'pool': {'DB_POOL': 'true'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Measures what connection handling costs a request: opens/reuses the default '
+            'database through the request_started/request_finished cycle with a new '
+            'connection per request, persistent connections and (Postgres + psycopg 3) '
+            'the connection pool. Point DATABASE_URL at the server to measure, e.g. '
+            'DATABASE_URL=postgres://localhost/thoughtnest python manage.py benchmark_db_connections')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Simulated requests per mode.')
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+        parser.add_argument('--inner', choices=list(MODES), help='(internal) run one mode in this process.')
+
+    def handle(self, *args, **options):
+        if options['inner']:
+            self.stdout.write(json.dumps(self.measure(options['requests'])))
+            return
+
+        vendor = connection.vendor
+        self.stdout.write(f'Database: {vendor} {connection.settings_dict["NAME"]}')
+        self.stdout.write(f'{"mode":<12} {"p50 ms":>8} {"p99 ms":>8} {"mean ms":>8} {"connects":>9}')
+        for mode in options['modes']:
+            if mode == 'pool' and vendor != 'postgresql':
+                self.stdout.write(f'{mode:<12} skipped: pooling needs Postgres')
+                continue
+            result = self.run_child(mode, options['requests'])
+            if result is None:
+                continue
+            self.stdout.write(
+                f'{mode:<12} {result["p50"]:>8.3f} {result["p99"]:>8.3f} {result["mean"]:>8.3f} '
+                f'{result["connects"]:>9}'
+            )
+
+    def run_child(self, mode, requests):
+        env = {**os.environ, **MODES[mode]}
+        completed = subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_db_connections',
+             '--inner', mode, '--requests', str(requests)],
+            env=env, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1:] or ['unknown error']
+            self.stdout.write(self.style.WARNING(f'{mode:<12} failed: {error[0]}'))
+            return None
+        try:
+            return json.loads(completed.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            raise CommandError(f'Unexpected output from the {mode} run: {completed.stdout!r}')
+
+    def measure(self, requests):
+        connects = 0
+
+        def count_connect(**kwargs):
+            nonlocal connects
+            connects += 1
+
+        connection_created.connect(count_connect, weak=False)
+        # A small indexed read, like the first query of most pages
+        queryset = Post.objects.filter(status=Post.STATUS_PUBLISHED).order_by('-created_at').values_list('pk')[:10]
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            list(queryset.all())
+            request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+        connection.close()
+
+        timings.sort()
+        return {
+            'p50': statistics.median(timings),
+            'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+            'mean': statistics.fmean(timings),
+            'connects': connects,
+        }
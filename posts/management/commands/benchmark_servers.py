@@ -0,0 +1,146 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+
+from posts.models import Category, Post, Tag
+
+MODES = ('wsgi', 'asgi')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Starts gunicorn in WSGI mode and with uvicorn workers in ASGI mode (gunicorn.conf.py), '
+            'drives the async read views with concurrent anonymous requests and reports '
+            'p50/p99 latency and throughput for each. Seed data first (seed_data).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes per mode.')
+        parser.add_argument('--threads', type=int, default=1, help='Threads per sync (WSGI) worker.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight.')
+        parser.add_argument('--requests', type=int, default=2000, help='Timed requests per mode.')
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='URL path to request (may be repeated; default: the async views).')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Leave the anonymous page cache on (it would otherwise answer every request).')
+        parser.add_argument('--startup-timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or self.default_paths()
+        self.stdout.write(f'Paths: {", ".join(paths)}')
+        self.stdout.write(
+            f'{"mode":<6} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"max ms":>9} {"errors":>7}'
+        )
+        for mode in options['modes']:
+            port = free_port()
+            server = self.start_server(mode, port, options)
+            try:
+                base = f'http://127.0.0.1:{port}'
+                self.wait_until_up(base + paths[0], server, options['startup_timeout'])
+                self.run_load(base, paths, options['warmup'], options['concurrency'])
+                result = self.run_load(base, paths, options['requests'], options['concurrency'])
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+            self.stdout.write(
+                f'{mode:<6} {result["rps"]:>9.1f} {result["p50"]:>9.1f} {result["p99"]:>9.1f} '
+                f'{result["max"]:>9.1f} {result["errors"]:>7}'
+            )
+
+    def default_paths(self):
+        post = Post.objects.filter(status=Post.STATUS_PUBLISHED).order_by('-comment_count').first()
+        tag = Tag.objects.annotate(total=Count('posts')).order_by('-total').first()
+        category = Category.objects.annotate(total=Count('posts')).order_by('-total').first()
+        if post is None or tag is None or category is None:
+            raise CommandError('Not enough data to benchmark; run seed_data first or pass --path.')
+        return [
+            reverse('home'),
+            reverse('categories'),
+            reverse('post_detail', args=[post.pk]),
+            reverse('tag_posts', args=[tag.pk]),
+            reverse('category_posts', args=[category.pk]),
+        ]
+
+    def start_server(self, mode, port, options):
+        env = {
+            **os.environ,
+            'SERVER_MODE': mode,
+            'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'WEB_CONCURRENCY': str(options['workers']),
+            'GUNICORN_THREADS': str(options['threads']),
+            'PAGE_CACHE_ENABLED': 'true' if options['page_cache'] else 'false',
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'thoughtnest.settings'),
+        }
+        return subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', str(settings.BASE_DIR / 'gunicorn.conf.py')],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def wait_until_up(self, url, server, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Server exited with status {server.returncode}; is gunicorn installed?')
+            try:
+                with urllib.request.urlopen(url, timeout=2) as response:
+                    response.read()
+                return
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        raise CommandError(f'Server did not answer {url} within {timeout:.0f}s.')
+
+    def run_load(self, base, paths, total, concurrency):
+        def fetch(index):
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base + paths[index % len(paths)], timeout=30) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, ConnectionError):
+                ok = False
+            return (time.perf_counter() - started) * 1000, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = [ms for ms, ok in results if ok]
+        if not latencies:
+            raise CommandError('Every request failed.')
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies),
+            'errors': len(results) - len(latencies),
+        }
@@ -0,0 +1,130 @@
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from posts.models import Comment, Like, Post
+from thoughtnest.sqlite import immediate_atomic
+
+# "before" is SQLite's stock behaviour: rollback journal, deferred transactions
+# and only Python's default 5s lock wait; "after" is the configured tuning
+MODES = {
+    'before': {'SQLITE_TUNING': 'false'},
+    'after': {'SQLITE_TUNING': 'true'},
+}
+
+
+class Command(BaseCommand):
+    help = ('Runs like toggles and comment inserts from several processes at once against a '
+            'copy of the SQLite database, with stock SQLite settings and with the tuning in '
+            'thoughtnest.sqlite, and reports write throughput and "database is locked" errors.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--ops', type=int, default=300, help='Write transactions per process.')
+        parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+        parser.add_argument('--worker', choices=list(MODES), help='(internal) run one writer process.')
+        parser.add_argument('--seed', type=int, default=0, help='(internal) per-worker random seed.')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.work(options['worker'], options['ops'], options['seed'])))
+            return
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('benchmark_sqlite_writes needs a SQLite default database.')
+        if not Post.objects.exists() or not get_user_model().objects.exists():
+            raise CommandError('No posts or users to write against; run seed_data first.')
+        primary.close()
+
+        self.stdout.write(f'{options["processes"]} processes x {options["ops"]} write transactions')
+        self.stdout.write(f'{"mode":<8} {"writes/s":>9} {"ok":>7} {"locked":>7} {"p99 ms":>8}')
+        with tempfile.TemporaryDirectory() as scratch:
+            for mode in options['modes']:
+                result = self.run_mode(mode, Path(primary.settings_dict['NAME']), Path(scratch), options)
+                self.stdout.write(
+                    f'{mode:<8} {result["rate"]:>9.1f} {result["ok"]:>7} {result["locked"]:>7} '
+                    f'{result["p99"]:>8.1f}'
+                )
+
+    def run_mode(self, mode, source, scratch, options):
+        # A fresh copy per mode, so the real database is untouched and both start equal
+        target = scratch / f'{mode}.sqlite3'
+        shutil.copyfile(source, target)
+        with sqlite3.connect(target) as db:
+            db.execute('PRAGMA journal_mode = DELETE')
+
+        env = {**os.environ, **MODES[mode], 'DATABASE_URL': f'sqlite:///{target}', 'DATABASE_REPLICA_URLS': ''}
+        workers = [
+            subprocess.Popen(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_sqlite_writes',
+                 '--worker', mode, '--ops', str(options['ops']), '--seed', str(index)],
+                env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for index in range(options['processes'])
+        ]
+        results = []
+        for worker in workers:
+            stdout, stderr = worker.communicate()
+            if worker.returncode != 0:
+                raise CommandError(f'{mode} worker failed: {stderr.strip().splitlines()[-1:]}')
+            results.append(json.loads(stdout.strip().splitlines()[-1]))
+
+        elapsed = max(r['finished'] for r in results) - min(r['started'] for r in results)
+        latencies = sorted(ms for r in results for ms in r['latencies'])
+        ok = sum(r['ok'] for r in results)
+        return {
+            'rate': ok / elapsed if elapsed else 0.0,
+            'ok': ok,
+            'locked': sum(r['locked'] for r in results),
+            'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0,
+        }
+
+    def work(self, mode, ops, seed):
+        rng = random.Random(seed)
+        post_ids = list(Post.objects.values_list('pk', flat=True)[:200])
+        users = list(get_user_model().objects.all()[:200])
+        begin = immediate_atomic if mode == 'after' else transaction.atomic
+        ok = locked = 0
+        latencies = []
+
+        # Line the workers up so they really contend
+        connections[DEFAULT_DB_ALIAS].ensure_connection()
+        time.sleep(0.5)
+        started = time.time()
+        for op in range(ops):
+            post_id, user = rng.choice(post_ids), rng.choice(users)
+            op_started = time.perf_counter()
+            try:
+                if op % 2:
+                    Like.toggle(post_id, user) if mode == 'after' else self.toggle_deferred(post_id, user)
+                else:
+                    with begin():
+                        Comment.objects.create(post_id=post_id, author=user, content='Benchmark comment')
+                ok += 1
+                latencies.append((time.perf_counter() - op_started) * 1000)
+            except OperationalError as exc:
+                if 'locked' not in str(exc) and 'busy' not in str(exc):
+                    raise
+                locked += 1
+        return {'started': started, 'finished': time.time(), 'ok': ok, 'locked': locked, 'latencies': latencies}
+
+    def toggle_deferred(self, post_id, user):
+        """Like.toggle as it ran before: the same writes in a plain (deferred) transaction"""
+        with transaction.atomic():
+            if Like.objects.filter(post_id=post_id, user=user).exists():
+                Like.objects.filter(post_id=post_id, user=user).delete()
+            else:
+                Like.objects.create(post_id=post_id, user=user)
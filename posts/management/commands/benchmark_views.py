@@ -0,0 +1,258 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.backends.utils import CursorDebugWrapper
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from accounts import urls as accounts_urls
+from posts import urls as posts_urls
+from posts.exports import DATASETS
+from posts.models import Category, Comment, Post, Tag
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+# Views that only accept POST; they run inside a rolled-back transaction
+POST_ONLY = {
+    'post_add_comment': {'content': 'Benchmark comment'},
+    'post_toggle_like': {},
+    'post_delete': {},
+    'user_delete_comment': {},
+    'admin_delete_comment': {},
+    'admin_delete_tag': {},
+    'admin_delete_category': {},
+    'admin_delete_user': {},
+    'logout': {},
+}
+
+# Routes timed once per set of URL arguments instead of with url_kwargs()
+URL_VARIANTS = {
+    'admin_export': [{'dataset': dataset} for dataset in sorted(DATASETS)],
+}
+
+# Extra query strings worth timing on top of the bare URL
+VARIANTS = {
+    'search': ['?q=idea garden'],
+    'admin_posts': ['?search=idea'],
+    'admin_comments': ['?date_range=week'],
+    'admin_users_manage': ['?q=seed'],
+}
+
+
+class RowCounter:
+    """
+    Counts statements executed and rows handed back by fetchone/fetchmany/fetchall
+    while installed. connection.queries is capped at 9000 entries, so a view that
+    runs more than that cannot be measured from it.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def wrap(self, cursor, db):
+        counter = self
+
+        class Wrapper(CursorDebugWrapper):
+            def execute(self, sql, params=None):
+                counter.queries += 1
+                return super().execute(sql, params)
+
+            def executemany(self, sql, param_list):
+                counter.queries += 1
+                return super().executemany(sql, param_list)
+
+            def fetchone(self):
+                row = self.cursor.fetchone()
+                counter.rows += row is not None
+                return row
+
+            def fetchmany(self, size=None):
+                rows = self.cursor.fetchmany(size) if size is not None else self.cursor.fetchmany()
+                counter.rows += len(rows)
+                return rows
+
+            def fetchall(self):
+                rows = self.cursor.fetchall()
+                counter.rows += len(rows)
+                return rows
+
+        return Wrapper(cursor, db)
+
+
+class Command(BaseCommand):
+    help = ('Requests every URL in posts/urls.py and accounts/urls.py against the current '
+            'database and reports wall time, SQL query count and rows fetched, optionally '
+            'failing on regressions against a stored baseline. Seed data first (seed_data).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Staff username to request pages as (default: staff user with most posts).')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per URL; the median is reported.')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file.')
+        parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline.')
+        parser.add_argument('--time-threshold', type=float, default=0.5,
+                            help='Allowed relative slowdown before failing (default: 0.5 = +50%%).')
+        parser.add_argument('--rows-threshold', type=float, default=0.2,
+                            help='Allowed relative growth in rows fetched (default: 0.2).')
+        parser.add_argument('--query-slack', type=int, default=0,
+                            help='Extra queries allowed over the baseline (default: 0).')
+        parser.add_argument('--only', action='append', help='Only benchmark this URL name (may be repeated).')
+
+    def handle(self, *args, **options):
+        self.user = self.pick_user(options['user'])
+        self.samples = self.sample_objects()
+
+        results = {}
+        for name, url, method in self.targets(options['only']):
+            results[name] = self.measure(url, method, POST_ONLY.get(name.split('?')[0], {}), options['repeat'])
+            row = results[name]
+            self.stdout.write(
+                f'{name:<44} {row["ms"]:>9.1f} ms {row["queries"]:>5} queries {row["rows"]:>7} rows  {row["status"]}'
+            )
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+        if baseline_path.exists():
+            self.compare(results, json.loads(baseline_path.read_text()), options)
+
+    # -- setup ------------------------------------------------------------
+
+    def pick_user(self, username):
+        User = get_user_model()
+        if username:
+            user = User.objects.filter(username=username, is_staff=True).first()
+        else:
+            user = (
+                User.objects.filter(is_staff=True)
+                .select_related('author_stats')
+                .order_by('-author_stats__posts', 'pk')
+                .first()
+            )
+        if user is None:
+            raise CommandError('No staff user to benchmark as; run seed_data or pass --user.')
+        return user
+
+    def sample_objects(self):
+        """The heaviest object of each kind, so every page is measured at its worst"""
+        post = Post.objects.order_by('-comment_count', '-like_count').first()
+        other = (
+            get_user_model().objects.filter(is_active=True).exclude(pk=self.user.pk)
+            .order_by('-author_stats__posts', 'pk').first()
+        )
+        return {
+            'post': post.pk if post else 0,
+            'category': self.largest(Category),
+            'tag': self.largest(Tag),
+            'comment': Comment.objects.filter(author=self.user).values_list('pk', flat=True).first() or 0,
+            'any_comment': Comment.objects.values_list('pk', flat=True).first() or 0,
+            'username': self.user.username,
+            'other_user': other.pk if other else 0,
+        }
+
+    def largest(self, model):
+        return (
+            model.objects.annotate(post_total=Count('posts')).order_by('-post_total', 'pk')
+            .values_list('pk', flat=True).first() or 0
+        )
+
+    def url_kwargs(self, name, pattern):
+        converters = pattern.pattern.converters
+        if not converters:
+            return {}
+        if name in ('tag_posts', 'admin_delete_tag'):
+            return {'pk': self.samples['tag']}
+        if name in ('category_posts', 'admin_delete_category'):
+            return {'pk': self.samples['category']}
+        if name == 'user_delete_comment':
+            return {'pk': self.samples['comment']}
+        if name == 'admin_delete_comment':
+            return {'pk': self.samples['any_comment']}
+        if name == 'author_profile':
+            return {'username': self.samples['username']}
+        if name == 'admin_delete_user':
+            return {'pk': self.samples['other_user']}
+        return {'pk': self.samples['post']}
+
+    def targets(self, only):
+        for module in (accounts_urls, posts_urls):
+            for pattern in module.urlpatterns:
+                if not isinstance(pattern, URLPattern) or not pattern.name:
+                    continue
+                if only and pattern.name not in only:
+                    continue
+                method = 'post' if pattern.name in POST_ONLY else 'get'
+                if pattern.name in URL_VARIANTS:
+                    for kwargs in URL_VARIANTS[pattern.name]:
+                        label = '/'.join([pattern.name, *map(str, kwargs.values())])
+                        yield label, reverse(pattern.name, kwargs=kwargs), method
+                    continue
+                url = reverse(pattern.name, kwargs=self.url_kwargs(pattern.name, pattern))
+                yield pattern.name, url, method
+                for query in VARIANTS.get(pattern.name, []):
+                    yield f'{pattern.name}{query}', url + query, method
+
+    # -- measuring --------------------------------------------------------
+
+    def measure(self, url, method, data, repeat):
+        timings, queries, rows, status = [], 0, 0, None
+        for attempt in range(repeat + 1):
+            # A broken view is reported as a 500 row instead of aborting the run
+            client = Client(raise_request_exception=False)
+            client.force_login(self.user)
+            counter = RowCounter()
+            connection.make_debug_cursor = lambda cursor: counter.wrap(cursor, connection)
+            try:
+                with transaction.atomic():
+                    # Forces the debug cursor, which is what routes through make_debug_cursor
+                    with CaptureQueriesContext(connection):
+                        started = time.perf_counter()
+                        response = getattr(client, method)(url, data)
+                        if response.streaming:
+                            # Exports do their queries while the body is read
+                            for _ in response.streaming_content:
+                                pass
+                        elapsed = time.perf_counter() - started
+                    # Leave the database exactly as it was, whatever the view wrote
+                    transaction.set_rollback(True)
+            finally:
+                del connection.make_debug_cursor
+            if attempt == 0:
+                continue  # warm-up: template loading, per-process caches
+            timings.append(elapsed * 1000)
+            queries, rows, status = counter.queries, counter.rows, response.status_code
+        return {
+            'ms': round(statistics.median(timings), 2),
+            'queries': queries,
+            'rows': rows,
+            'status': status,
+        }
+
+    def compare(self, results, baseline, options):
+        failures = []
+        for name, row in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            if row['queries'] > base['queries'] + options['query_slack']:
+                failures.append(f'{name}: {base["queries"]} -> {row["queries"]} queries')
+            if row['rows'] > base['rows'] * (1 + options['rows_threshold']) + 1:
+                failures.append(f'{name}: {base["rows"]} -> {row["rows"]} rows fetched')
+            if row['ms'] > base['ms'] * (1 + options['time_threshold']) + 1:
+                failures.append(f'{name}: {base["ms"]:.1f} -> {row["ms"]:.1f} ms')
+        if failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f'REGRESSION {failure}'))
+            raise CommandError(f'{len(failures)} regression(s) against {options["baseline"]}.')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
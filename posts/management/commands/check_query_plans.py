@@ -0,0 +1,110 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from posts.models import Category, Comment, Like, Post, Tag
+
+# Plan lines that mean "read the whole table" or "sort the result in memory"
+BAD_PLAN_PATTERNS = {
+    'sqlite': [
+        re.compile(r'\bSCAN (?!.*\bUSING (?:COVERING )?INDEX\b)(?!CONSTANT ROW)\S+'),
+        re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    ],
+    'postgresql': [
+        re.compile(r'\bSeq Scan on\b'),
+        re.compile(r'^\s*(?:->\s*)?(?:Incremental )?Sort\b', re.MULTILINE),
+    ],
+}
+
+
+def hot_querysets():
+    """
+    The list/detail queries behind the busiest pages, built the same way the
+    views build them. Ids are placeholders: only the plan matters.
+    """
+    week_ago = timezone.now() - timedelta(days=7)
+    return {
+        'home: trending published posts': (
+            Post.objects.filter(status=Post.STATUS_PUBLISHED)
+            .select_related('author', 'category').order_by('-trending_score', '-id')[:10]
+        ),
+        'home: latest published posts': (
+            Post.objects.filter(status=Post.STATUS_PUBLISHED)
+            .select_related('author', 'category').order_by('-created_at')[:10]
+        ),
+        'post_detail: approved comments': (
+            Comment.objects.filter(post_id=1, approved=True)
+            .select_related('author').order_by('-created_at', '-id')[:20]
+        ),
+        'category_posts: published posts in a category': (
+            Post.objects.filter(category_id=1, status=Post.STATUS_PUBLISHED)
+            .select_related('author').order_by('-created_at')[:10]
+        ),
+        'user_manage_posts: own posts': (
+            Post.objects.filter(author_id=1).order_by('-created_at', '-id')[:10]
+        ),
+        'user_my_comments: own comments': (
+            Comment.objects.filter(author_id=1).select_related('post').order_by('-created_at', '-id')[:11]
+        ),
+        'user_my_likes: own likes': (
+            Like.objects.filter(user_id=1).select_related('post').order_by('-created_at', '-id')[:11]
+        ),
+        'admin_posts: newest posts': (
+            Post.objects.select_related('author', 'category').order_by('-created_at', '-id')[:16]
+        ),
+        'admin_comments: newest comments this week': (
+            Comment.objects.filter(created_at__gte=week_ago)
+            .select_related('author', 'post').order_by('-created_at', '-id')[:16]
+        ),
+        'admin_likes: newest likes this week': (
+            Like.objects.filter(created_at__gte=week_ago)
+            .select_related('user', 'post').order_by('-created_at', '-id')[:16]
+        ),
+        'admin_categories: newest categories': Category.objects.order_by('-created_at')[:15],
+        'admin_tags: newest tags': Tag.objects.order_by('-created_at')[:15],
+        'admin_dashboard: trending posts': (
+            Post.objects.filter(status=Post.STATUS_PUBLISHED)
+            .select_related('author').order_by('-trending_score', '-id')[:5]
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Runs EXPLAIN on the hot list/detail queries and fails when any of them '
+            'falls back to a full table scan or an in-memory sort.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Database alias to explain against (default: the read database for posts).')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failing ones.')
+
+    def handle(self, *args, **options):
+        using = options['database'] or router.db_for_read(Post)
+        vendor = connections[using].vendor
+        patterns = BAD_PLAN_PATTERNS.get(vendor)
+        if patterns is None:
+            raise CommandError(f'No plan rules for the {vendor} backend.')
+
+        failures = []
+        with transaction.atomic(using=using):
+            if vendor == 'postgresql':
+                # Small dev tables make a seq scan the cheapest plan; rule it out so
+                # the check reports whether an index *can* serve the query.
+                with connections[using].cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, queryset in hot_querysets().items():
+                plan = queryset.using(using).explain()
+                offending = [match.group(0).strip() for pattern in patterns for match in pattern.finditer(plan)]
+                if offending:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'FAIL  {name}: {", ".join(offending)}'))
+                else:
+                    self.stdout.write(f'ok    {name}')
+                if offending or options['verbose_plans']:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) regressed to a full scan or sort.')
+        self.stdout.write(self.style.SUCCESS('All query plans use indexes.'))
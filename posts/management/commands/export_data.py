@@ -0,0 +1,81 @@
+import resource
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.exports import DATASETS
+from thoughtnest.streaming import DEFAULT_FETCH_SIZE, FORMATS, encode_rows
+
+# Command-line options mapped onto the GET parameters of the admin list pages
+FILTER_OPTIONS = {
+    'search': 'search',
+    'category': 'category',
+    'status': 'status',
+    'user_search': 'user_search',
+    'post': 'post',
+    'date_range': 'date_range',
+    'q': 'q',
+    'joined_from': 'joined_date_from',
+    'joined_to': 'joined_date_to',
+}
+
+
+class Command(BaseCommand):
+    help = ('Streams posts, comments, likes or users as CSV or NDJSON, with the same filters as '
+            'the admin list pages. Rows are read in fetch batches and written as they arrive, '
+            'so memory stays flat however large the table is.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip.')
+        parser.add_argument('--output', '-o', default='-', help='File to write (default: stdout).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_FETCH_SIZE,
+                            help=f'Rows per database fetch (default: {DEFAULT_FETCH_SIZE}).')
+        filters = parser.add_argument_group('filters (as on the admin pages)')
+        filters.add_argument('--search', help='posts: title/content search or author name')
+        filters.add_argument('--category', help='posts: category id')
+        filters.add_argument('--status', choices=['published', 'draft'], help='posts: status')
+        filters.add_argument('--user-search', help='comments/likes: author or liker name')
+        filters.add_argument('--post', help='comments/likes: post id')
+        filters.add_argument('--date-range', choices=['today', 'week', 'month', 'year'],
+                             help='comments/likes: created within this range')
+        filters.add_argument('--q', help='users: username, email or name prefix')
+        filters.add_argument('--joined-from', help='users: joined on or after YYYY-MM-DD')
+        filters.add_argument('--joined-to', help='users: joined on or before YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        dataset = DATASETS[options['dataset']]
+        params = {
+            param: options[option] for option, param in FILTER_OPTIONS.items() if options[option]
+        }
+        counted = [0]
+
+        def rows():
+            for row in dataset.rows(params, options['chunk_size']):
+                counted[0] += 1
+                yield row
+
+        started = time.monotonic()
+        written = 0
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in encode_rows(dataset.names, rows(), options['format'], options['gzip']):
+                output.write(chunk)
+                written += len(chunk)
+            output.flush()
+        except BrokenPipeError:
+            # The reader went away (e.g. piped into head); not an error
+            return
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        seconds = time.monotonic() - started
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stderr.write(
+            f'{counted[0]} {options["dataset"]} rows, {written / 1e6:.1f} MB in {seconds:.2f}s '
+            f'({counted[0] / seconds if seconds else 0:.0f} rows/s, '
+            f'{written / 1e6 / seconds if seconds else 0:.1f} MB/s); peak RSS {peak_mb:.0f} MB'
+        )
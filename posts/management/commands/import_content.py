@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import IMPORTERS, import_file
+from posts.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = ('Bulk-imports users, posts (with categories and tags) or comments from a JSONL or CSV '
+            'file (.gz works too; "-" reads stdin) in batched transactions. Rerunning the same file '
+            'resumes after the last committed batch. Import users first, then posts, then comments. '
+            'See posts/importer.py for the record fields.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help='Input format (default: from the file name, else jsonl).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Records per transaction (default: 1000).')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the checkpoint and read the file from the start. Records with '
+                                 'an id that were imported before are still skipped.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path != '-' and not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        kind = options['kind']
+        source = path if path == '-' else os.path.abspath(path)
+        resumed = ImportCheckpoint.objects.filter(kind=kind, source=source).values_list('rows', flat=True).first()
+        if resumed and not options['restart']:
+            self.stdout.write(f'Resuming after {resumed} records.')
+
+        started = time.monotonic()
+        start_rows = 0 if options['restart'] else resumed or 0
+
+        def progress(checkpoint, skipped):
+            rows = checkpoint.rows - start_rows
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'  {kind}: {checkpoint.rows} records ({checkpoint.imported} imported, {checkpoint.skipped} skipped), '
+                f'{rows / elapsed if elapsed else 0:.0f} rows/s',
+                ending='\r',
+            )
+
+        try:
+            checkpoint, skipped = import_file(
+                kind, path, format=options['format'], batch_size=options['batch_size'],
+                restart=options['restart'], progress=progress,
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        elapsed = time.monotonic() - started
+        rows = checkpoint.rows - start_rows
+        self.stdout.write('')
+        for reason, count in skipped.most_common():
+            self.stdout.write(self.style.WARNING(f'  skipped {count}: {reason}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {rows} {kind} records in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s); '
+            f'{checkpoint.imported} imported and {checkpoint.skipped} skipped from this file so far.'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Shows hit/miss counters for the anonymous page cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them.')
+
+    def handle(self, *args, **options):
+        counts = page_cache.stats()
+        served = counts['hit'] + counts['stale'] + counts['miss']
+        for name, value in counts.items():
+            self.stdout.write(f'{name:>7}: {value}')
+        if served:
+            ratio = (counts['hit'] + counts['stale']) / served
+            self.stdout.write(self.style.SUCCESS(f'hit ratio: {ratio:.1%}'))
+        if options['reset']:
+            page_cache.reset_stats()
+            self.stdout.write('Counters reset.')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized like/comment counters on every post.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, action='append', dest='post_ids',
+                            help='Only rebuild the given post id (may be repeated).')
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.all()
+        if options['post_ids']:
+            queryset = queryset.filter(pk__in=options['post_ids'])
+
+        updated = Post.rebuild_counters(queryset)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {updated} post(s).'))
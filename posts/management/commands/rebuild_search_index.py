@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for posts from the posts table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=None,
+                            help='Database alias to rebuild (defaults to the Post write database).')
+
+    def handle(self, *args, **options):
+        backend = search.get_backend(options['database'])
+        if isinstance(backend, search.FallbackSearchBackend):
+            self.stdout.write(self.style.WARNING(
+                'No full-text index on this database; search uses icontains filtering.'
+            ))
+            return
+
+        indexed = search.rebuild_index(options['database'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} post(s) with the {backend.vendor} backend.'))
@@ -0,0 +1,225 @@
+import bisect
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from posts import page_cache, search
+from posts.importer import explicit_timestamps
+from posts.models import Category, Comment, Like, Post, Tag
+from stats.models import AuthorStats, DailyStats, SiteCounters
+
+WORDS = (
+    'idea garden reading notes habit morning craft design python travel quiet city river '
+    'music memory kitchen light code paper winter letter coffee mountain learning story '
+    'book walk window science history sketch friend distance balance practice question'
+).split()
+
+
+class Zipf:
+    """Sample indexes 0..n-1 with P(i) proportional to 1 / (i + 1) ** s"""
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        total = 0.0
+        self.cumulative = []
+        for rank in range(1, n + 1):
+            total += 1.0 / rank ** s
+            self.cumulative.append(total)
+        self.total = total
+
+    def sample(self):
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.total)
+
+
+class Command(BaseCommand):
+    help = ('Bulk-generates a skewed synthetic dataset (users, categories, tags, posts, '
+            'Zipf-distributed likes and comments) for benchmarking.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--categories', type=int, default=30)
+        parser.add_argument('--tags', type=int, default=300)
+        parser.add_argument('--likes', type=int, default=50000, help='Like rows to attempt (duplicates are skipped).')
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--tags-per-post', type=int, default=4, help='Upper bound of tags per post.')
+        parser.add_argument('--days', type=int, default=365, help='Spread timestamps over the last N days.')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for authors, posts and tags.')
+        parser.add_argument('--draft-ratio', type=float, default=0.1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='seed-password',
+                            help='Password for every generated user (hashed once).')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.span = timedelta(days=options['days']).total_seconds()
+        self.run = f'{int(time.time()):x}'  # keeps names unique across repeated runs
+        started = time.monotonic()
+
+        with explicit_timestamps(Category, Tag, Post, Comment, Like):
+            user_ids = self.create_users(options['users'], options['password'])
+            category_ids = self.create_named(Category, 'category', options['categories'])
+            tag_ids = self.create_named(Tag, 'tag', options['tags'])
+            post_ids = self.create_posts(options, user_ids, category_ids)
+            self.create_post_tags(options, post_ids, tag_ids)
+            self.create_likes(options, post_ids, user_ids)
+            self.create_comments(options, post_ids, user_ids)
+
+        self.rebuild_derived(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.monotonic() - started:.1f}s.'))
+
+    # -- helpers ----------------------------------------------------------
+
+    def timestamp(self):
+        # Skew toward recent activity: most rows land in the last part of the span
+        age = self.span * self.rng.random() ** 2
+        return self.now - timedelta(seconds=age)
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def insert(self, model, objs, label, **kwargs):
+        """bulk_create an iterable in batches, reporting progress"""
+        total = 0
+        iterator = iter(objs)
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size, **kwargs)
+            total += len(batch)
+            self.stdout.write(f'  {label}: {total}', ending='\r')
+        self.stdout.write(f'  {label}: {total}')
+        return total
+
+    def new_ids(self, model, before):
+        return list(model.objects.filter(pk__gt=before).order_by('pk').values_list('pk', flat=True))
+
+    def max_id(self, model):
+        return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    # -- generators -------------------------------------------------------
+
+    def create_users(self, count, password):
+        User = get_user_model()
+        before = self.max_id(User)
+        hashed = make_password(password)
+
+        def users():
+            for index in range(count):
+                yield User(
+                    # The most active (rank 0) user doubles as the benchmark staff account
+                    username=f'seed_{self.run}_{index}',
+                    email=f'seed_{self.run}_{index}@example.com',
+                    first_name=self.rng.choice(WORDS).title(),
+                    last_name=self.rng.choice(WORDS).title(),
+                    password=hashed,
+                    is_staff=index == 0,
+                    is_superuser=index == 0,
+                    date_joined=self.timestamp(),
+                )
+
+        self.insert(User, users(), 'users')
+        user_ids = self.new_ids(User, before)
+        # bulk_create skips the post_save handler that creates profiles
+        self.insert(UserProfile, (UserProfile(user_id=pk) for pk in user_ids), 'profiles')
+        return user_ids
+
+    def create_named(self, model, prefix, count):
+        before = self.max_id(model)
+        objs = (model(name=f'{prefix}-{self.run}-{index}', created_at=self.timestamp()) for index in range(count))
+        self.insert(model, objs, model._meta.verbose_name_plural)
+        return self.new_ids(model, before)
+
+    def create_posts(self, options, user_ids, category_ids):
+        before = self.max_id(Post)
+        authors = Zipf(len(user_ids), options['skew'], self.rng)
+        categories = Zipf(len(category_ids), options['skew'] / 2, self.rng) if category_ids else None
+
+        def posts():
+            for _ in range(options['posts']):
+                created = self.timestamp()
+                draft = self.rng.random() < options['draft_ratio']
+                yield Post(
+                    author_id=user_ids[authors.sample()],
+                    category_id=category_ids[categories.sample()] if categories else None,
+                    title=self.words(self.rng.randint(3, 8)).capitalize(),
+                    content='\n\n'.join(self.words(self.rng.randint(30, 90)) for _ in range(self.rng.randint(1, 4))),
+                    status=Post.STATUS_DRAFT if draft else Post.STATUS_PUBLISHED,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self.insert(Post, posts(), 'posts')
+        return self.new_ids(Post, before)
+
+    def create_post_tags(self, options, post_ids, tag_ids):
+        if not tag_ids or not options['tags_per_post']:
+            return
+        tags = Zipf(len(tag_ids), options['skew'], self.rng)
+        through = Post.tags.through
+
+        def links():
+            for post_id in post_ids:
+                chosen = {tag_ids[tags.sample()] for _ in range(self.rng.randint(0, options['tags_per_post']))}
+                for tag_id in chosen:
+                    yield through(post_id=post_id, tag_id=tag_id)
+
+        self.insert(through, links(), 'post tags', ignore_conflicts=True)
+
+    def create_likes(self, options, post_ids, user_ids):
+        posts = Zipf(len(post_ids), options['skew'], self.rng)
+        users = Zipf(len(user_ids), options['skew'] / 2, self.rng)
+
+        def likes():
+            for _ in range(options['likes']):
+                yield Like(
+                    post_id=post_ids[posts.sample()],
+                    user_id=user_ids[users.sample()],
+                    created_at=self.timestamp(),
+                )
+
+        # Popular posts draw repeated (post, user) pairs; the unique constraint drops them
+        self.insert(Like, likes(), 'likes', ignore_conflicts=True)
+
+    def create_comments(self, options, post_ids, user_ids):
+        posts = Zipf(len(post_ids), options['skew'], self.rng)
+        users = Zipf(len(user_ids), options['skew'] / 2, self.rng)
+
+        def comments():
+            for _ in range(options['comments']):
+                created = self.timestamp()
+                yield Comment(
+                    post_id=post_ids[posts.sample()],
+                    author_id=user_ids[users.sample()],
+                    content=self.words(self.rng.randint(5, 40)).capitalize(),
+                    approved=self.rng.random() > 0.05,
+                    created_at=created,
+                    updated_at=created,
+                )
+
+        self.insert(Comment, comments(), 'comments')
+
+    def rebuild_derived(self, days):
+        """bulk_create skips every signal, so recompute what they would have maintained"""
+        self.stdout.write('Rebuilding counters, trending scores, stats and the search index...')
+        Post.rebuild_counters()
+        Post.refresh_trending()
+        AuthorStats.rebuild()
+        SiteCounters.reconcile()
+        today = timezone.localdate()
+        DailyStats.rollup(today - timedelta(days=days), today)
+        search.rebuild_index()
+        page_cache.bump_version()
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+class Command(BaseCommand):
+    help = ('Checkpoints the SQLite write-ahead log and runs PRAGMA optimize on every SQLite '
+            'database. Schedule it (cron, or --every N) so the -wal file stays small and the '
+            'planner statistics stay current.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=CHECKPOINT_MODES, default='TRUNCATE',
+                            help='wal_checkpoint mode (default: TRUNCATE, which also empties the -wal file).')
+        parser.add_argument('--vacuum', action='store_true', help='Also VACUUM (rewrites the whole file; blocks writers).')
+        parser.add_argument('--every', type=float, help='Repeat every N seconds until interrupted.')
+
+    def handle(self, *args, **options):
+        aliases = [alias for alias in settings.DATABASES if connections[alias].vendor == 'sqlite']
+        if not aliases:
+            raise CommandError('No SQLite databases configured.')
+        while True:
+            for alias in aliases:
+                self.maintain(connections[alias], options)
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def maintain(self, connection, options):
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA wal_checkpoint({options["mode"]})')
+            busy, log_frames, checkpointed = cursor.fetchone()
+            # Bounded ANALYZE work per table, as the SQLite docs recommend for optimize
+            cursor.execute('PRAGMA analysis_limit = 400')
+            cursor.execute('PRAGMA optimize')
+            if options['vacuum']:
+                cursor.execute('VACUUM')
+        state = 'busy, partial' if busy else 'done'
+        self.stdout.write(
+            f'{connection.alias}: checkpoint {state} ({checkpointed}/{log_frames} WAL frames), '
+            f'optimize{", vacuum" if options["vacuum"] else ""} in {(time.monotonic() - started) * 1000:.0f} ms'
+        )
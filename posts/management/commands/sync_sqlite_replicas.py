@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Copies the SQLite primary into every SQLite replica in DATABASE_REPLICAS with the '
+            'online backup API, standing in for replication when trying the read-replica '
+            'router locally. --every N repeats the copy, which makes replica lag visible.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', action='append', dest='aliases', help='Only sync this replica alias.')
+        parser.add_argument('--every', type=float, help='Keep syncing every N seconds until interrupted.')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('The primary is not SQLite; use the database server\'s own replication.')
+        aliases = options['aliases'] or list(getattr(settings, 'DATABASE_REPLICAS', {}))
+        replicas = [alias for alias in aliases if connections[alias].vendor == 'sqlite']
+        if not replicas:
+            raise CommandError('No SQLite replicas configured (set DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3).')
+
+        while True:
+            for alias in replicas:
+                self.copy(primary.settings_dict['NAME'], connections[alias])
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def copy(self, source_path, replica):
+        # Drop Django's handle first so the copy is not blocked by an open read
+        replica.close()
+        started = time.monotonic()
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            with target:
+                source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        self.stdout.write(
+            f'{replica.alias}: copied {source_path} in {(time.monotonic() - started) * 1000:.0f} ms'
+        )
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import page_cache
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Recomputes the time-decayed trending score of posts from the last TRENDING_WINDOW_DAYS '
+            'days in short batched transactions, and zeroes older ones. Likes and comments nudge '
+            'the score as they happen; this pass applies the decay. Schedule it (cron, or --every N).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, help='Repeat every N seconds until interrupted.')
+        parser.add_argument('--window-days', type=int,
+                            help=f'Rescore posts this many days old or newer (default: {settings.TRENDING_WINDOW_DAYS}).')
+        parser.add_argument('--batch-size', type=int,
+                            help=f'Posts per UPDATE (default: {settings.TRENDING_BATCH_SIZE}).')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if options['window_days'] is not None and options['window_days'] < 1:
+            raise CommandError('--window-days must be at least 1.')
+
+        while True:
+            started = time.monotonic()
+            rescored, expired = Post.recompute_trending(
+                window_days=options['window_days'], batch_size=options['batch_size'],
+            )
+            page_cache.bump_version()
+            self.stdout.write(
+                f'Rescored {rescored} post(s) and expired {expired} in {time.monotonic() - started:.2f}s.'
+            )
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.11 on 2026-10-17 20:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Cast, Greatest, Power
+
+from posts.models import _HoursSince
+
+
+def backfill_trending(apps, schema_editor):
+    # Post.trending_expression() with the default gravity, written out so the
+    # migration does not depend on the current model class
+    Post = apps.get_model('posts', 'Post')
+    points = Cast(F('like_count') + F('approved_comment_count') * settings.TRENDING_COMMENT_WEIGHT + 1, models.FloatField())
+    age = Greatest(_HoursSince('created_at'), Value(0.0))
+    Post.objects.update(trending_score=points / Power(age + 2.0, Value(1.8)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_content_import'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_like_count_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='trending_gravity',
+            field=models.FloatField(default=1.8),
+        ),
+        migrations.RunPython(backfill_trending, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-trending_score', '-id'], name='post_published_trending_idx'),
+        ),
+    ]
@@ -1,15 +1,53 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Func, OuterRef, Q, Subquery, Value, Window
+from django.db.models.functions import Cast, Coalesce, Greatest, Power, RowNumber
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
+from thoughtnest.sqlite import immediate_atomic
+
+
+class LiveManager(models.Manager):
+	"""
+	Default manager that hides rows marked for deletion (see posts.deletion).
+	`all_objects` still sees them; so do forward relations, which go through
+	the plain base manager.
+	"""
+
+	def get_queryset(self):
+		return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+def live_post_count():
+	"""Count('posts') without posts queued for deletion, for Category/Tag/User annotations"""
+	return Count('posts', filter=Q(posts__deleted_at__isnull=True))
+
 
 class Category(models.Model):
 	name = models.CharField(max_length=120, unique=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+	# Set when the category is queued for deletion; it is then purged in the background
+	deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+	objects = LiveManager()
+	all_objects = models.Manager()
 
 	class Meta:
 		ordering = ['name']
 		verbose_name_plural = 'categories'
+		indexes = [
+			# admin_categories lists newest first
+			models.Index(fields=['-created_at'], name='category_created_idx'),
+		]
 
 
 	def __str__(self):
@@ -19,15 +57,40 @@ class Category(models.Model):
 class Tag(models.Model):
 	name = models.CharField(max_length=80, unique=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+	deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+	objects = LiveManager()
+	all_objects = models.Manager()
 
 	class Meta:
 		ordering = ['name']
+		indexes = [
+			# admin_tags lists newest first and filters on created_at ranges
+			models.Index(fields=['-created_at'], name='tag_created_idx'),
+		]
 
 
 	def __str__(self):
 		return self.name
 
 
+class _HoursSince(Func):
+	"""Hours from a timestamp column to now, as a float"""
+	output_field = models.FloatField()
+
+	def as_sqlite(self, compiler, connection, **extra_context):
+		template = "((julianday('now') - julianday(%(expressions)s)) * 24.0)"
+		return self.as_sql(compiler, connection, template=template, **extra_context)
+
+	def as_postgresql(self, compiler, connection, **extra_context):
+		template = '(EXTRACT(EPOCH FROM (STATEMENT_TIMESTAMP() - %(expressions)s)) / 3600.0)'
+		return self.as_sql(compiler, connection, template=template, **extra_context)
+
+
+def _trending_comment_weight():
+	return getattr(settings, 'TRENDING_COMMENT_WEIGHT', 2)
+
+
 class Post(models.Model):
 	STATUS_DRAFT = 'draft'
 	STATUS_PUBLISHED = 'published'
@@ -59,14 +122,270 @@ class Post(models.Model):
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	# Denormalized counters, maintained by the Like/Comment signal handlers below
+	like_count = models.PositiveIntegerField(default=0, editable=False)
+	comment_count = models.PositiveIntegerField(default=0, editable=False)
+	approved_comment_count = models.PositiveIntegerField(default=0, editable=False)
+	# Time-decayed popularity for the trending feed, see trending_expression().
+	# Nudged by the same handlers as the counters, recomputed by update_trending.
+	trending_score = models.FloatField(default=0, editable=False)
+
+	# Set when the post (or its author) is queued for deletion
+	deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+	objects = LiveManager()
+	all_objects = models.Manager()
+
 	class Meta:
 		ordering = ['-created_at']
+		indexes = [
+			# home / trending feeds: newest published posts
+			models.Index(
+				fields=['-created_at', '-id'],
+				condition=Q(status='published'),
+				name='post_published_created_idx',
+			),
+			# admin_posts keyset pagination and created_at range filters
+			models.Index(fields=['-created_at', '-id'], name='post_created_idx'),
+			# user_manage_posts and author pages
+			models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_idx'),
+			# category_posts and per-category latest posts
+			models.Index(fields=['category', 'status', '-created_at'], name='post_category_created_idx'),
+			# home "Trending" tab and the dashboard's trending posts
+			models.Index(
+				fields=['-trending_score', '-id'],
+				condition=Q(status='published'),
+				name='post_published_trending_idx',
+			),
+		]
 
 	# Removed slug logic
 
+	COUNTER_FIELDS = ('like_count', 'comment_count', 'approved_comment_count')
+
 	def __str__(self):
 		return self.title
 
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		# Remember the stored status so saves can tell a publish/unpublish apart
+		instance._loaded_status = instance.__dict__.get('status')
+		return instance
+
+	def save(self, *args, **kwargs):
+		# Counters and the trending score are only ever written with F() updates
+		# (and deleted_at by the deletion engine); never overwrite them with a
+		# possibly stale in-memory value when an existing post is saved.
+		if self.pk and not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+			kwargs['update_fields'] = [
+				field.attname for field in self._meta.concrete_fields
+				if not field.primary_key and field.attname not in (*self.COUNTER_FIELDS, 'trending_score', 'deleted_at')
+			]
+		elif self._state.adding and not self.trending_score:
+			age = (timezone.now() - self.created_at).total_seconds() / 3600 if self.created_at else 0.0
+			self.trending_score = self.trending_value(self.like_count, self.approved_comment_count, age)
+		super().save(*args, **kwargs)
+
+	@classmethod
+	def trending_expression(cls, gravity=None, likes=F('like_count'), comments=F('approved_comment_count')):
+		"""
+		SQL for the trending score, Hacker News style:
+
+			(likes + TRENDING_COMMENT_WEIGHT * approved comments + 1)
+			/ (hours since created + 2) ** SiteSettings.trending_gravity
+
+		Pass `likes` / `comments` to score the counter values an UPDATE is
+		setting at the same time (SET reads the old row).
+		"""
+		if gravity is None:
+			gravity = SiteSettings.get_cached().trending_gravity
+		points = Cast(likes + comments * _trending_comment_weight() + 1, models.FloatField())
+		age = Greatest(_HoursSince('created_at'), Value(0.0))
+		return points / Power(age + 2.0, Value(float(gravity)))
+
+	@staticmethod
+	def trending_value(likes, comments, age_hours, gravity=None):
+		"""trending_expression() in Python, for a post that is about to be inserted"""
+		if gravity is None:
+			gravity = SiteSettings.get_cached().trending_gravity
+		points = likes + comments * _trending_comment_weight() + 1
+		return points / (max(age_hours, 0.0) + 2) ** gravity
+
+	@classmethod
+	def refresh_trending(cls, queryset=None, gravity=None):
+		"""Recompute trending_score from the stored counters in one UPDATE"""
+		if queryset is None:
+			queryset = cls.all_objects.all()
+		return queryset.order_by().update(trending_score=cls.trending_expression(gravity))
+
+	@classmethod
+	def recompute_trending(cls, window_days=None, batch_size=None, gravity=None):
+		"""
+		The periodic pass behind update_trending. Scores decay with time, so
+		posts from the last TRENDING_WINDOW_DAYS are rescored, batch_size per
+		UPDATE and short transaction; older posts drop to 0 once. Returns
+		(rescored, expired).
+		"""
+		window_days = window_days or getattr(settings, 'TRENDING_WINDOW_DAYS', 14)
+		batch_size = batch_size or getattr(settings, 'TRENDING_BATCH_SIZE', 1000)
+		if gravity is None:
+			gravity = SiteSettings.get_cached().trending_gravity
+		cutoff = timezone.now() - timedelta(days=window_days)
+
+		def batches(queryset):
+			last = 0
+			while ids := list(queryset.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:batch_size]):
+				yield ids
+				last = ids[-1]
+
+		rescored = expired = 0
+		for ids in batches(cls.all_objects.filter(created_at__gte=cutoff)):
+			with immediate_atomic():
+				rescored += cls.refresh_trending(cls.all_objects.filter(pk__in=ids), gravity)
+		for ids in batches(cls.all_objects.filter(created_at__lt=cutoff, trending_score__gt=0)):
+			with immediate_atomic():
+				expired += cls.all_objects.filter(pk__in=ids).update(trending_score=0)
+		return rescored, expired
+
+	@classmethod
+	def rebuild_counters(cls, queryset=None):
+		"""Recompute like/comment counters from the source tables in one UPDATE"""
+		if queryset is None:
+			queryset = cls.objects.all()
+
+		def counted(model, **filters):
+			rows = (
+				model.objects.filter(post=OuterRef('pk'), **filters)
+				.order_by()
+				.values('post')
+				.annotate(total=Count('pk'))
+				.values('total')
+			)
+			return Coalesce(Subquery(rows), Value(0))
+
+		return queryset.order_by().update(
+			like_count=counted(Like),
+			comment_count=counted(Comment),
+			approved_comment_count=counted(Comment, approved=True),
+		)
+
+	@classmethod
+	def latest_by_category(cls, per_category, status=STATUS_PUBLISHED):
+		"""
+		{category_id: [newest posts]} with at most `per_category` posts each,
+		fetched in one ROW_NUMBER() OVER (PARTITION BY category_id) query.
+		"""
+		rank = Window(
+			RowNumber(),
+			partition_by=F('category_id'),
+			order_by=[F('created_at').desc(), F('id').desc()],
+		)
+		rows = (
+			cls.objects.filter(status=status, category__isnull=False)
+			.select_related('author')
+			.annotate(category_rank=rank)
+			.filter(category_rank__lte=per_category)
+			.order_by('category_id', 'category_rank')
+		)
+		latest = {}
+		for post in rows:
+			latest.setdefault(post.category_id, []).append(post)
+		return latest
+
+
+_counter_state = threading.local()
+
+# Sent after a bulk Comment/Like delete with sender=model, count=rows deleted,
+# per_post={post_id: rows} and per_actor={user_id: rows} (the liker / comment
+# author), since the per-row post_delete handlers are skipped for those rows.
+counted_rows_bulk_deleted = Signal()
+
+# Sent after rows are inserted with bulk_create (which skips post_save),
+# with sender=model and count=rows created.
+counted_rows_bulk_created = Signal()
+
+
+@contextmanager
+def _counters_suspended():
+	"""Skip the per-row counter signals while a bulk delete applies grouped deltas"""
+	previous = getattr(_counter_state, 'suspended', False)
+	_counter_state.suspended = True
+	try:
+		yield
+	finally:
+		_counter_state.suspended = previous
+
+
+def counters_active():
+	return not getattr(_counter_state, 'suspended', False)
+
+
+class CounterQuerySet(models.QuerySet):
+	"""
+	QuerySet for rows counted on Post. A bulk delete applies one grouped
+	F() update per post instead of one UPDATE per deleted row.
+	"""
+	counter_fields = ()
+	# Column holding the user who created the row (liker / comment author)
+	actor_field = None
+
+	def live(self):
+		"""Rows whose post is not queued for deletion (forward relations ignore LiveManager)"""
+		return self.filter(post__deleted_at__isnull=True)
+
+	def _counter_deltas(self):
+		aggregates = {'rows': Count('pk')}
+		for field, condition in self.counter_fields:
+			aggregates[field] = Count('pk', filter=condition) if condition is not None else Count('pk')
+		return self.order_by().values('post_id').annotate(**aggregates)
+
+	def _actor_deltas(self):
+		rows = self.order_by().values(self.actor_field).annotate(rows=Count('pk'))
+		return {row[self.actor_field]: row['rows'] for row in rows if row[self.actor_field] is not None}
+
+	def delete(self):
+		with transaction.atomic(), _counters_suspended():
+			deltas = list(self._counter_deltas())
+			per_actor = self._actor_deltas() if self.actor_field else {}
+			result = super().delete()
+			for row in deltas:
+				changes = {
+					field: F(field) - row[field]
+					for field, _ in self.counter_fields
+					if row[field]
+				}
+				if changes:
+					changes['trending_score'] = Post.trending_expression(
+						likes=F('like_count') - row.get('like_count', 0),
+						comments=F('approved_comment_count') - row.get('approved_comment_count', 0),
+					)
+					Post.objects.filter(pk=row['post_id']).update(**changes)
+			deleted = result[1].get(self.model._meta.label, 0)
+			if deleted:
+				counted_rows_bulk_deleted.send(
+					sender=self.model,
+					count=deleted,
+					per_post={row['post_id']: row['rows'] for row in deltas},
+					per_actor=per_actor,
+				)
+		return result
+
+
+class CommentQuerySet(CounterQuerySet):
+	counter_fields = (
+		('comment_count', None),
+		('approved_comment_count', Q(approved=True)),
+	)
+	actor_field = 'author_id'
+
+
+class LikeQuerySet(CounterQuerySet):
+	counter_fields = (
+		('like_count', None),
+	)
+	actor_field = 'user_id'
+
 
 class Comment(models.Model):
 	post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
@@ -82,26 +401,164 @@ class Comment(models.Model):
 	updated_at = models.DateTimeField(auto_now=True)
 	approved = models.BooleanField(default=True)
 
+	objects = CommentQuerySet.as_manager()
+
 	class Meta:
 		ordering = ['-created_at']
+		indexes = [
+			# post_detail: approved comments of one post, newest first
+			models.Index(
+				fields=['post', '-created_at', '-id'],
+				condition=Q(approved=True),
+				name='comment_post_approved_idx',
+			),
+			# admin_comments keyset pagination and created_at range filters
+			models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+			# user_my_comments and profile sidebars
+			models.Index(fields=['author', '-created_at', '-id'], name='comment_author_created_idx'),
+		]
 
 	def __str__(self):
 		return f"Comment on {self.post_id}"
 
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		# Remember the stored approval state so saves can adjust approved_comment_count
+		instance._loaded_approved = instance.__dict__.get('approved')
+		return instance
+
 
 class Like(models.Model):
 	post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='likes')
 	created_at = models.DateTimeField(auto_now_add=True)
 
+	objects = LikeQuerySet.as_manager()
+
 	class Meta:
 		constraints = [
 			models.UniqueConstraint(fields=['post', 'user'], name='unique_like_per_user'),
 		]
+		indexes = [
+			# admin_likes keyset pagination and created_at range filters
+			models.Index(fields=['-created_at', '-id'], name='like_created_idx'),
+			# user_my_likes and profile sidebars
+			models.Index(fields=['user', '-created_at', '-id'], name='like_user_created_idx'),
+		]
 
 	def __str__(self):
 		return f"Like {self.post_id} by {self.user_id}"
 
+	@classmethod
+	def toggle(cls, post_id, user):
+		"""
+		Unlike if `user` already likes the post, like it otherwise; returns
+		(liked, like_count). Relies on unique_like_per_user instead of a
+		read-then-write, so concurrent clicks cannot raise or double count.
+		"""
+		# IMMEDIATE: the delete-then-insert takes the SQLite write lock up front
+		with immediate_atomic():
+			with _counters_suspended():
+				_, deleted = models.QuerySet(cls).filter(post_id=post_id, user=user).delete()
+			removed = deleted.get(cls._meta.label, 0)
+			if removed:
+				# Adjust by the rows this statement actually removed, not a prior read
+				Post.objects.filter(pk=post_id).update(
+					like_count=F('like_count') - removed,
+					trending_score=Post.trending_expression(likes=F('like_count') - removed),
+				)
+				counted_rows_bulk_deleted.send(
+					sender=cls, count=removed, per_post={post_id: removed}, per_actor={user.pk: removed},
+				)
+				liked = False
+			else:
+				try:
+					with transaction.atomic():
+						cls.objects.create(post_id=post_id, user=user)
+				except IntegrityError:
+					pass  # a concurrent request created the same like first
+				liked = True
+		like_count = Post.objects.filter(pk=post_id).values_list('like_count', flat=True).first() or 0
+		return liked, like_count
+
+
+# Signals keeping the full-text search index in sync with Post rows
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+	"""Re-index a post when its searchable text may have changed"""
+	if raw:
+		return
+	if update_fields is not None and not {'title', 'content'} & set(update_fields):
+		return
+	from . import search
+	search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+	"""Drop a deleted post from the full-text search index"""
+	from . import search
+	search.remove_post(instance.pk)
+
+
+# Signals keeping Post counters in sync with Like / Comment rows
+@receiver(post_save, sender=Like)
+def like_created(sender, instance, created, **kwargs):
+	"""Increment Post.like_count (and nudge the trending score) when a Like is created"""
+	if created and counters_active():
+		Post.objects.filter(pk=instance.post_id).update(
+			like_count=F('like_count') + 1,
+			trending_score=Post.trending_expression(likes=F('like_count') + 1),
+		)
+
+
+@receiver(post_delete, sender=Like)
+def like_deleted(sender, instance, **kwargs):
+	"""Decrement Post.like_count when a Like is deleted (including cascades)"""
+	if counters_active():
+		Post.objects.filter(pk=instance.post_id).update(
+			like_count=F('like_count') - 1,
+			trending_score=Post.trending_expression(likes=F('like_count') - 1),
+		)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+	"""Keep comment counters in sync on create and approval changes"""
+	if not counters_active():
+		return
+	if created:
+		changes = {'comment_count': F('comment_count') + 1}
+		if instance.approved:
+			changes['approved_comment_count'] = F('approved_comment_count') + 1
+			changes['trending_score'] = Post.trending_expression(comments=F('approved_comment_count') + 1)
+		Post.objects.filter(pk=instance.post_id).update(**changes)
+	else:
+		previous = getattr(instance, '_loaded_approved', None)
+		if previous is not None and previous != instance.approved:
+			step = 1 if instance.approved else -1
+			Post.objects.filter(pk=instance.post_id).update(
+				approved_comment_count=F('approved_comment_count') + step,
+				trending_score=Post.trending_expression(comments=F('approved_comment_count') + step),
+			)
+	instance._loaded_approved = instance.approved
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+	"""Decrement comment counters when a Comment is deleted (including cascades)"""
+	if not counters_active():
+		return
+	changes = {'comment_count': F('comment_count') - 1}
+	approved = getattr(instance, '_loaded_approved', None)
+	if approved is None:
+		approved = instance.approved
+	if approved:
+		changes['approved_comment_count'] = F('approved_comment_count') - 1
+		changes['trending_score'] = Post.trending_expression(comments=F('approved_comment_count') - 1)
+	Post.objects.filter(pk=instance.post_id).update(**changes)
+
 class SiteSettings(models.Model):
 	site_name = models.CharField(max_length=100, default='ThoughtNest')
 	site_tagline = models.CharField(max_length=200, default='Gather ideas. Grow perspectives.')
@@ -113,6 +570,10 @@ class SiteSettings(models.Model):
 	moderate_comments = models.BooleanField(default=False)
 	allow_registration = models.BooleanField(default=True)
 	show_author = models.BooleanField(default=True)
+	# How fast the trending score decays with age (the exponent in Post.trending_expression)
+	trending_gravity = models.FloatField(default=1.8)
+	# Version stamp checked by get_cached()
+	updated_at = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return "Site Settings"
@@ -121,7 +582,207 @@ class SiteSettings(models.Model):
 		verbose_name = "Site Settings"
 		verbose_name_plural = "Site Settings"
 
+	def save(self, *args, **kwargs):
+		super().save(*args, **kwargs)
+		self.invalidate_cache()
+
+	def delete(self, *args, **kwargs):
+		result = super().delete(*args, **kwargs)
+		self.invalidate_cache()
+		return result
+
 	@classmethod
 	def load(cls):
 		obj, created = cls.objects.get_or_create(pk=1)
 		return obj
+
+	@classmethod
+	def get_cached(cls):
+		"""
+		Return the settings singleton, reading the row only when it changed.
+		Each process keeps its own copy for SITE_SETTINGS_CACHE_TTL seconds,
+		then compares updated_at with the database (a primary key lookup), so
+		a save in one gunicorn worker reaches the others whatever the cache
+		backend.
+		"""
+		ttl = getattr(settings, 'SITE_SETTINGS_CACHE_TTL', 5)
+		local = _site_settings_local
+		now = time.monotonic()
+		if local['obj'] is not None and now - local['checked_at'] < ttl:
+			return local['obj']
+
+		with _site_settings_lock:
+			if local['obj'] is not None and now - local['checked_at'] < ttl:
+				return local['obj']
+			version = cls.objects.filter(pk=1).values_list('updated_at', flat=True).first()
+			if version is None or version != local['version']:
+				obj = cls.load()
+				local.update(obj=obj, version=obj.updated_at)
+			local['checked_at'] = now
+			return local['obj']
+
+	@classmethod
+	async def aget_cached(cls):
+		"""get_cached() for async views; only leaves the event loop when the local copy is due a check"""
+		local = _site_settings_local
+		ttl = getattr(settings, 'SITE_SETTINGS_CACHE_TTL', 5)
+		if local['obj'] is not None and time.monotonic() - local['checked_at'] < ttl:
+			return local['obj']
+		return await sync_to_async(cls.get_cached)()
+
+	@classmethod
+	def invalidate_cache(cls):
+		"""Drop this process's copy once committed; other workers see the new updated_at"""
+		def clear():
+			with _site_settings_lock:
+				_site_settings_local.update(obj=None, version=None, checked_at=0.0)
+		transaction.on_commit(clear)
+
+
+_site_settings_local = {'obj': None, 'version': None, 'checked_at': 0.0}
+_site_settings_lock = threading.RLock()
+
+
+# Signals invalidating the anonymous page cache whenever public content changes
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=SiteSettings)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_page_cache(sender, **kwargs):
+	"""Bump the page cache version so cached public pages are regenerated"""
+	from . import page_cache
+	page_cache.bump_version()
+
+
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_post_pages(sender, instance, **kwargs):
+	"""A like or comment only changes its post's pages (list pages catch up within PAGE_CACHE_TTL)"""
+	from . import page_cache
+	page_cache.bump_version([instance.post_id])
+
+
+@receiver(counted_rows_bulk_deleted)
+def invalidate_post_pages_bulk(sender, per_post, **kwargs):
+	from . import page_cache
+	page_cache.bump_version(list(per_post))
+
+
+class DeletionRequest(models.Model):
+	"""
+	A user, post, category or tag (or every comment) being deleted in the
+	background by posts.deletion. The target is hidden as soon as the request
+	is made; `deleted` counts the dependent rows purged so far out of
+	`total`, re-counted at every purge slice, for the admin progress page.
+	"""
+	KIND_USER = 'user'
+	KIND_POST = 'post'
+	KIND_CATEGORY = 'category'
+	KIND_TAG = 'tag'
+	KIND_COMMENTS = 'comments'
+	KIND_CHOICES = [
+		(KIND_USER, 'User'),
+		(KIND_POST, 'Post'),
+		(KIND_CATEGORY, 'Category'),
+		(KIND_TAG, 'Tag'),
+		(KIND_COMMENTS, 'All comments'),
+	]
+	STATUS_PENDING = 'pending'
+	STATUS_RUNNING = 'running'
+	STATUS_DONE = 'done'
+	STATUS_CHOICES = [
+		(STATUS_PENDING, 'Pending'),
+		(STATUS_RUNNING, 'Running'),
+		(STATUS_DONE, 'Done'),
+	]
+
+	kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+	# The target's pk; for KIND_COMMENTS the highest comment id to delete
+	target_id = models.BigIntegerField(null=True, blank=True)
+	label = models.CharField(max_length=200)
+	status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+	requested_by = models.ForeignKey(
+		settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+	)
+	total = models.PositiveIntegerField(default=0)
+	deleted = models.PositiveIntegerField(default=0)
+	last_error = models.TextField(blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ['-created_at']
+		indexes = [
+			models.Index(fields=['kind', 'target_id'], name='deletion_target_idx'),
+		]
+
+	def __str__(self):
+		return f"Delete {self.get_kind_display().lower()} {self.label}"
+
+	@property
+	def progress(self):
+		"""Percent done; rows can be added between slices, so it is capped below 100 until finished"""
+		if self.status == self.STATUS_DONE:
+			return 100
+		if not self.total:
+			return 0
+		return min(99, self.deleted * 100 // self.total)
+
+
+class ImportCheckpoint(models.Model):
+	"""
+	Progress of one `manage.py import_content` source file. It is updated in
+	the same transaction as every imported batch, so a run that stops for any
+	reason resumes exactly after the last committed batch.
+	"""
+	KIND_USERS = 'users'
+	KIND_POSTS = 'posts'
+	KIND_COMMENTS = 'comments'
+	KIND_CHOICES = [
+		(KIND_USERS, 'Users'),
+		(KIND_POSTS, 'Posts'),
+		(KIND_COMMENTS, 'Comments'),
+	]
+
+	kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+	source = models.CharField(max_length=500)
+	# Input records consumed, whether imported or skipped
+	rows = models.PositiveBigIntegerField(default=0)
+	imported = models.PositiveBigIntegerField(default=0)
+	skipped = models.PositiveBigIntegerField(default=0)
+	# Oldest and newest imported timestamps, for the DailyStats rollup at the end
+	first_created = models.DateTimeField(null=True, blank=True)
+	last_created = models.DateTimeField(null=True, blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ['-created_at']
+		constraints = [
+			models.UniqueConstraint(fields=['kind', 'source'], name='import_checkpoint_source_unique'),
+		]
+
+	def __str__(self):
+		return f"Import {self.kind} from {self.source}"
+
+
+class ImportedObject(models.Model):
+	"""
+	The row an imported record became, keyed by the record's id on the source
+	platform: comments find their post through it, and records imported
+	before are skipped.
+	"""
+	kind = models.CharField(max_length=10, choices=ImportCheckpoint.KIND_CHOICES)
+	source_id = models.CharField(max_length=64)
+	object_id = models.BigIntegerField()
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['kind', 'source_id'], name='imported_object_source_unique'),
+		]
+
+	def __str__(self):
+		return f"{self.kind} {self.source_id} -> {self.object_id}"
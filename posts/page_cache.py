@@ -0,0 +1,272 @@
+"""
+Full-response micro-cache for anonymous readers.
+
+Anonymous GET/HEAD requests to the public pages (PAGE_CACHE_URL_NAMES) are
+answered from the cache before the session, auth or any view code runs, so a
+hit never touches the database. "Anonymous" means the request carries no
+session or messages cookie, which also keeps flash messages out of the cache.
+
+Entries are stamped with a global version that the signal handlers in
+posts.models bump whenever content changes. Likes and comments only bump the
+version of their post, which post_detail and post_comments entries are also
+stamped with; the like and comment counts on list pages may lag by up to
+PAGE_CACHE_TTL seconds rather than every write emptying the whole cache. A
+stale or outdated entry is
+regenerated by one worker at a time (guarded by a cache lock); the others keep
+serving the old copy for up to PAGE_CACHE_STALE_TTL seconds.
+"""
+import asyncio
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+VERSION_KEY = 'pagecache:version'
+POST_VERSION_KEY = 'pagecache:version:post:{}'
+STATS_KEY = 'pagecache:stats:{}'
+STAT_NAMES = ('hit', 'stale', 'miss', 'bypass')
+
+DEFAULT_URL_NAMES = ('home', 'categories', 'category_posts', 'tag_posts', 'post_detail', 'post_comments')
+# Pages of a single post, keyed by its pk, that also follow its own version
+POST_URL_NAMES = ('post_detail', 'post_comments')
+# Past this many posts one write bumps the global version instead
+MAX_POST_BUMPS = 50
+
+
+def _setting(name, default):
+	return getattr(settings, name, default)
+
+
+def current_version():
+	return cache.get(VERSION_KEY) or 0
+
+
+def bump_version(post_ids=None):
+	"""
+	Invalidate every cached page once the current transaction commits, or
+	only the pages of the posts in `post_ids`.
+	"""
+	if post_ids is None or len(post_ids) > MAX_POST_BUMPS:
+		keys = [VERSION_KEY]
+	else:
+		keys = [POST_VERSION_KEY.format(pk) for pk in post_ids]
+
+	def bump():
+		for key in keys:
+			try:
+				cache.incr(key)
+			except ValueError:
+				# incr() raises on a missing key; seed from time so it never repeats
+				cache.set(key, time.time_ns(), None)
+	transaction.on_commit(bump)
+
+
+def record(stat):
+	try:
+		cache.incr(STATS_KEY.format(stat))
+	except ValueError:
+		cache.add(STATS_KEY.format(stat), 1, None)
+
+
+async def arecord(stat):
+	try:
+		await cache.aincr(STATS_KEY.format(stat))
+	except ValueError:
+		await cache.aadd(STATS_KEY.format(stat), 1, None)
+
+
+def stats():
+	"""Hit/stale/miss/bypass counters from the shared cache"""
+	values = cache.get_many([STATS_KEY.format(name) for name in STAT_NAMES])
+	return {name: values.get(STATS_KEY.format(name), 0) for name in STAT_NAMES}
+
+
+def reset_stats():
+	cache.delete_many([STATS_KEY.format(name) for name in STAT_NAMES])
+
+
+class AnonymousPageCacheMiddleware:
+	"""
+	Place above SessionMiddleware so hits skip it and misses see every cookie
+	the inner middleware adds (responses that set cookies are never stored).
+	"""
+	header = 'X-Page-Cache'
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		self.is_async = iscoroutinefunction(get_response)
+		if self.is_async:
+			markcoroutinefunction(self)
+		self.enabled = _setting('PAGE_CACHE_ENABLED', True)
+		self.ttl = _setting('PAGE_CACHE_TTL', 10)
+		self.stale_ttl = _setting('PAGE_CACHE_STALE_TTL', 60)
+		self.lock_ttl = _setting('PAGE_CACHE_LOCK_TTL', 10)
+		self.wait = _setting('PAGE_CACHE_WAIT', 1.0)
+		self.url_names = frozenset(_setting('PAGE_CACHE_URL_NAMES', DEFAULT_URL_NAMES))
+
+	def __call__(self, request):
+		if self.is_async:
+			return self.__acall__(request)
+		match = self.enabled and self.cacheable_request(request)
+		if not match:
+			return self.get_response(request)
+
+		key = self.entry_key(request)
+		lock_key = f'{key}:lock'
+		version_keys = self.version_keys(match)
+		values = cache.get_many([*version_keys, key])
+		version = tuple(values.get(name) or 0 for name in version_keys)
+		entry = values.get(key)
+
+		if entry is not None and self.fresh(entry, version):
+			record('hit')
+			return self.build_response(entry, 'HIT')
+
+		locked = cache.add(lock_key, 1, self.lock_ttl)
+		if not locked:
+			if entry is not None:
+				# Out of date: another request is regenerating, serve the old copy
+				record('stale')
+				return self.build_response(entry, 'STALE')
+			# Cold miss: wait briefly for the request holding the lock
+			entry = self.wait_for_entry(key, version)
+			if entry is not None:
+				record('hit')
+				return self.build_response(entry, 'HIT')
+
+		try:
+			response = self.get_response(request)
+			if self.cacheable_response(request, response):
+				self.store(key, version, response)
+				record('miss')
+				response[self.header] = 'MISS'
+			else:
+				record('bypass')
+				response[self.header] = 'BYPASS'
+		finally:
+			if locked:
+				cache.delete(lock_key)
+		return response
+
+	async def __acall__(self, request):
+		# Same flow as __call__ with the async cache API, for ASGI deployments
+		match = self.enabled and self.cacheable_request(request)
+		if not match:
+			return await self.get_response(request)
+
+		key = self.entry_key(request)
+		lock_key = f'{key}:lock'
+		version_keys = self.version_keys(match)
+		values = await cache.aget_many([*version_keys, key])
+		version = tuple(values.get(name) or 0 for name in version_keys)
+		entry = values.get(key)
+
+		if entry is not None and self.fresh(entry, version):
+			await arecord('hit')
+			return self.build_response(entry, 'HIT')
+
+		locked = await cache.aadd(lock_key, 1, self.lock_ttl)
+		if not locked:
+			if entry is not None:
+				await arecord('stale')
+				return self.build_response(entry, 'STALE')
+			entry = await self.await_entry(key, version)
+			if entry is not None:
+				await arecord('hit')
+				return self.build_response(entry, 'HIT')
+
+		try:
+			response = await self.get_response(request)
+			if self.cacheable_response(request, response):
+				await cache.aset(key, self.entry(version, response), self.ttl + self.stale_ttl)
+				await arecord('miss')
+				response[self.header] = 'MISS'
+			else:
+				await arecord('bypass')
+				response[self.header] = 'BYPASS'
+		finally:
+			if locked:
+				await cache.adelete(lock_key)
+		return response
+
+	def fresh(self, entry, version):
+		stored_at, entry_version = entry[0], entry[1]
+		return entry_version == version and time.time() - stored_at < self.ttl
+
+	def wait_for_entry(self, key, version):
+		deadline = time.monotonic() + self.wait
+		while time.monotonic() < deadline:
+			time.sleep(0.05)
+			entry = cache.get(key)
+			if entry is not None and self.fresh(entry, version):
+				return entry
+		return None
+
+	async def await_entry(self, key, version):
+		deadline = time.monotonic() + self.wait
+		while time.monotonic() < deadline:
+			await asyncio.sleep(0.05)
+			entry = await cache.aget(key)
+			if entry is not None and self.fresh(entry, version):
+				return entry
+		return None
+
+	def cacheable_request(self, request):
+		"""The URL match when `request` may be served from the cache, else None"""
+		if request.method not in ('GET', 'HEAD'):
+			return None
+		if settings.SESSION_COOKIE_NAME in request.COOKIES:
+			return None
+		if _setting('MESSAGE_COOKIE_NAME', 'messages') in request.COOKIES:
+			return None
+		try:
+			match = resolve(request.path_info)
+		except Resolver404:
+			return None
+		if match.url_name not in self.url_names:
+			return None
+		return match
+
+	def version_keys(self, match):
+		if match.url_name in POST_URL_NAMES:
+			return [VERSION_KEY, POST_VERSION_KEY.format(match.kwargs['pk'])]
+		return [VERSION_KEY]
+
+	def cacheable_response(self, request, response):
+		if response.status_code != 200 or response.streaming:
+			return False
+		if response.cookies:
+			return False
+		cache_control = response.get('Cache-Control', '')
+		if 'private' in cache_control or 'no-store' in cache_control:
+			return False
+		return True
+
+	def entry_key(self, request):
+		raw = f'{request.get_host()}|{request.get_full_path()}'
+		return 'pagecache:entry:' + hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+	def entry(self, version, response):
+		headers = [
+			(name, value) for name, value in response.items()
+			if name.lower() not in ('set-cookie', self.header.lower())
+		]
+		return (time.time(), version, response.status_code, headers, response.content)
+
+	def store(self, key, version, response):
+		cache.set(key, self.entry(version, response), self.ttl + self.stale_ttl)
+
+	def build_response(self, entry, state):
+		_, _, status, headers, content = entry
+		response = HttpResponse(content, status=status)
+		for name, value in headers:
+			response[name] = value
+		response[self.header] = state
+		return response
@@ -0,0 +1,368 @@
+"""
+Full-text search over posts.
+
+SQLite uses an FTS5 table (posts_post_fts, rowid = post id) ranked with bm25();
+Postgres uses a tsvector side table (posts_postsearch) with a GIN index ranked
+with ts_rank(). Both are kept in sync by the Post signal handlers in models.py
+and can be rebuilt with `manage.py rebuild_search_index`. Any other database
+falls back to icontains filtering.
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+
+SQLITE_TABLE = 'posts_post_fts'
+POSTGRES_TABLE = 'posts_postsearch'
+POSTGRES_CONFIG = 'english'
+
+# Private-use markers survive escaping and are swapped for <mark> afterwards
+_HIGHLIGHT_START = '\ue000'
+_HIGHLIGHT_END = '\ue001'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _terms(query):
+	return _TERM_RE.findall(query or '')[:16]
+
+
+def _highlight(raw):
+	text = escape(raw or '')
+	return mark_safe(text.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>'))
+
+
+def _max_results():
+	return getattr(settings, 'SEARCH_MAX_RESULTS', 1000)
+
+
+@dataclass
+class SearchPage:
+	"""One page of ranked results; posts carry search_rank and search_snippet"""
+	query: str
+	posts: list = field(default_factory=list)
+	page: int = 1
+	per_page: int = 20
+	has_next: bool = False
+
+	@property
+	def has_previous(self):
+		return self.page > 1
+
+	@property
+	def next_page_number(self):
+		return self.page + 1
+
+	@property
+	def previous_page_number(self):
+		return self.page - 1
+
+	def __iter__(self):
+		return iter(self.posts)
+
+	def __len__(self):
+		return len(self.posts)
+
+
+class BaseSearchBackend:
+	vendor = None
+
+	def __init__(self, connection):
+		self.connection = connection
+
+	def available(self):
+		return True
+
+	def index_post(self, post):
+		pass
+
+	def index_posts(self, post_ids):
+		pass
+
+	def remove_post(self, post_id):
+		pass
+
+	def rebuild(self):
+		return 0
+
+	def _filters(self, status, category, tag, author):
+		# Posts queued for deletion are hidden everywhere (see posts.deletion)
+		clauses, params = ['p.deleted_at IS NULL'], []
+		if status:
+			clauses.append('p.status = %s')
+			params.append(status)
+		if category:
+			clauses.append('p.category_id = %s')
+			params.append(category)
+		if author:
+			clauses.append('p.author_id = %s')
+			params.append(author)
+		if tag:
+			clauses.append(
+				'EXISTS (SELECT 1 FROM posts_post_tags pt WHERE pt.post_id = p.id AND pt.tag_id = %s)'
+			)
+			params.append(tag)
+		return ''.join(f' AND {clause}' for clause in clauses), params
+
+	def ranked(self, terms, *, status=None, category=None, tag=None, author=None, limit=20, offset=0, snippets=True):
+		"""Return [(post_id, rank, raw_snippet)] best match first"""
+		raise NotImplementedError
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+	vendor = 'sqlite'
+	# bm25() weights per column: a title hit counts more than a body hit
+	title_weight = 10.0
+	content_weight = 1.0
+
+	def available(self):
+		with self.connection.cursor() as cursor:
+			cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_TABLE])
+			return cursor.fetchone() is not None
+
+	def index_post(self, post):
+		with self.connection.cursor() as cursor:
+			cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [post.pk])
+			cursor.execute(
+				f'INSERT INTO {SQLITE_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+				[post.pk, post.title, post.content],
+			)
+
+	def index_posts(self, post_ids):
+		placeholders = ', '.join(['%s'] * len(post_ids))
+		with self.connection.cursor() as cursor:
+			cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})', list(post_ids))
+			cursor.execute(
+				f'INSERT INTO {SQLITE_TABLE} (rowid, title, content) '
+				f'SELECT id, title, content FROM posts_post WHERE id IN ({placeholders})',
+				list(post_ids),
+			)
+
+	def remove_post(self, post_id):
+		with self.connection.cursor() as cursor:
+			cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [post_id])
+
+	def rebuild(self):
+		with self.connection.cursor() as cursor:
+			cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+			cursor.execute(
+				f'INSERT INTO {SQLITE_TABLE} (rowid, title, content) SELECT id, title, content FROM posts_post'
+			)
+			count = cursor.rowcount
+			cursor.execute(f"INSERT INTO {SQLITE_TABLE} ({SQLITE_TABLE}) VALUES ('optimize')")
+		return count
+
+	def match_expression(self, terms):
+		# Quote every term so user input can never be parsed as FTS5 syntax;
+		# the trailing * keeps search-as-you-type prefix matching.
+		return ' '.join('"{}"*'.format(term.replace('"', '')) for term in terms)
+
+	def ranked(self, terms, *, status=None, category=None, tag=None, author=None, limit=20, offset=0, snippets=True):
+		where, params = self._filters(status, category, tag, author)
+		snippet = (
+			f"snippet({SQLITE_TABLE}, 1, '{_HIGHLIGHT_START}', '{_HIGHLIGHT_END}', '…', 24)"
+			if snippets else "''"
+		)
+		sql = (
+			f'SELECT f.rowid, bm25({SQLITE_TABLE}, %s, %s) AS score, {snippet} '
+			f'FROM {SQLITE_TABLE} f JOIN posts_post p ON p.id = f.rowid '
+			f'WHERE {SQLITE_TABLE} MATCH %s{where} '
+			f'ORDER BY score LIMIT %s OFFSET %s'
+		)
+		with self.connection.cursor() as cursor:
+			cursor.execute(sql, [
+				self.title_weight, self.content_weight, self.match_expression(terms),
+				*params, limit, offset,
+			])
+			# bm25() is "lower is better"; flip it so higher always means more relevant
+			return [(row[0], -row[1], row[2]) for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+	vendor = 'postgresql'
+	document_sql = (
+		f"setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce(title, '')), 'A') || "
+		f"setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce(content, '')), 'B')"
+	)
+
+	def available(self):
+		with self.connection.cursor() as cursor:
+			cursor.execute('SELECT to_regclass(%s)', [POSTGRES_TABLE])
+			return cursor.fetchone()[0] is not None
+
+	def index_post(self, post):
+		with self.connection.cursor() as cursor:
+			cursor.execute(
+				f'INSERT INTO {POSTGRES_TABLE} (post_id, document) '
+				f'SELECT id, {self.document_sql} FROM posts_post WHERE id = %s '
+				f'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document',
+				[post.pk],
+			)
+
+	def index_posts(self, post_ids):
+		with self.connection.cursor() as cursor:
+			cursor.execute(
+				f'INSERT INTO {POSTGRES_TABLE} (post_id, document) '
+				f'SELECT id, {self.document_sql} FROM posts_post WHERE id = ANY(%s) '
+				f'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document',
+				[list(post_ids)],
+			)
+
+	def remove_post(self, post_id):
+		with self.connection.cursor() as cursor:
+			cursor.execute(f'DELETE FROM {POSTGRES_TABLE} WHERE post_id = %s', [post_id])
+
+	def rebuild(self):
+		with self.connection.cursor() as cursor:
+			cursor.execute(f'TRUNCATE {POSTGRES_TABLE}')
+			cursor.execute(
+				f'INSERT INTO {POSTGRES_TABLE} (post_id, document) '
+				f'SELECT id, {self.document_sql} FROM posts_post'
+			)
+			count = cursor.rowcount
+			cursor.execute(f'ANALYZE {POSTGRES_TABLE}')
+		return count
+
+	def match_expression(self, terms):
+		return ' & '.join(f'{term}:*' for term in terms)
+
+	def ranked(self, terms, *, status=None, category=None, tag=None, author=None, limit=20, offset=0, snippets=True):
+		where, params = self._filters(status, category, tag, author)
+		# ts_headline() is expensive, so only run it on the page that is returned
+		snippet = (
+			f"ts_headline('{POSTGRES_CONFIG}', p.content, hits.q, "
+			f"'StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_END}, MaxWords=35, MinWords=15')"
+			if snippets else "''"
+		)
+		sql = (
+			f'SELECT hits.id, hits.rank, {snippet} FROM ('
+			f'  SELECT p.id, ts_rank(s.document, q) AS rank, q'
+			f'  FROM {POSTGRES_TABLE} s JOIN posts_post p ON p.id = s.post_id,'
+			f"  to_tsquery('{POSTGRES_CONFIG}', %s) q"
+			f'  WHERE s.document @@ q{where}'
+			f'  ORDER BY rank DESC, p.id DESC LIMIT %s OFFSET %s'
+			f') hits JOIN posts_post p ON p.id = hits.id ORDER BY hits.rank DESC, hits.id DESC'
+		)
+		with self.connection.cursor() as cursor:
+			cursor.execute(sql, [self.match_expression(terms), *params, limit, offset])
+			return [tuple(row) for row in cursor.fetchall()]
+
+
+class FallbackSearchBackend(BaseSearchBackend):
+	"""Unindexed icontains search for databases without a full-text backend"""
+
+	def ranked(self, terms, *, status=None, category=None, tag=None, author=None, limit=20, offset=0, snippets=True):
+		posts = Post.objects.order_by('-created_at')
+		for term in terms:
+			posts = posts.filter(Q(title__icontains=term) | Q(content__icontains=term))
+		if status:
+			posts = posts.filter(status=status)
+		if category:
+			posts = posts.filter(category_id=category)
+		if author:
+			posts = posts.filter(author_id=author)
+		if tag:
+			posts = posts.filter(tags__id=tag)
+		return [(pk, 0.0, '') for pk in posts.values_list('pk', flat=True)[offset:offset + limit]]
+
+
+_BACKENDS = {
+	SQLiteSearchBackend.vendor: SQLiteSearchBackend,
+	PostgresSearchBackend.vendor: PostgresSearchBackend,
+}
+_availability = {}
+
+
+def get_backend(using=None):
+	"""Return the search backend for the database Post rows are read from"""
+	connection = connections[using or router.db_for_read(Post)]
+	backend_class = _BACKENDS.get(connection.vendor)
+	if backend_class is None:
+		return FallbackSearchBackend(connection)
+	backend = backend_class(connection)
+	if connection.alias not in _availability:
+		_availability[connection.alias] = backend.available()
+	if not _availability[connection.alias]:
+		return FallbackSearchBackend(connection)
+	return backend
+
+
+def index_post(post):
+	get_backend(router.db_for_write(Post)).index_post(post)
+
+
+def index_posts(post_ids):
+	"""Index many posts with one statement per backend, e.g. after a bulk_create"""
+	if post_ids:
+		get_backend(router.db_for_write(Post)).index_posts(post_ids)
+
+
+def remove_post(post_id):
+	get_backend(router.db_for_write(Post)).remove_post(post_id)
+
+
+def rebuild_index(using=None):
+	_availability.clear()
+	return get_backend(using or router.db_for_write(Post)).rebuild()
+
+
+def search_posts(query, *, status=Post.STATUS_PUBLISHED, category=None, tag=None, author=None, page=1, per_page=20):
+	"""Rank posts matching `query`, best first, and return one SearchPage"""
+	result = SearchPage(query=query, page=max(int(page or 1), 1), per_page=per_page)
+	terms = _terms(query)
+	if not terms:
+		return result
+
+	offset = (result.page - 1) * per_page
+	rows = get_backend().ranked(
+		terms, status=status, category=category, tag=tag, author=author,
+		limit=per_page + 1, offset=offset,
+	)
+	result.has_next = len(rows) > per_page
+	rows = rows[:per_page]
+
+	posts = Post.objects.select_related('author', 'category').in_bulk([row[0] for row in rows])
+	for post_id, rank, snippet in rows:
+		post = posts.get(post_id)
+		if post is None:
+			continue
+		post.search_rank = rank
+		post.search_snippet = _highlight(snippet) if snippet else None
+		result.posts.append(post)
+	return result
+
+
+def matching_post_ids(query, *, status=None, category=None, tag=None, author=None, limit=None):
+	"""Ranked ids of the best matches, capped at SEARCH_MAX_RESULTS"""
+	terms = _terms(query)
+	if not terms:
+		return []
+	rows = get_backend().ranked(
+		terms, status=status, category=category, tag=tag, author=author,
+		limit=limit or _max_results(), offset=0, snippets=False,
+	)
+	return [row[0] for row in rows]
+
+
+def filter_posts(queryset, query, *, order_by_rank=False, **filters):
+	"""
+	Restrict a Post queryset to full-text matches for `query`. Extra filters
+	(status, category, tag, author) are pushed into the index query so the
+	result cap applies after them.
+	"""
+	ids = matching_post_ids(query, **filters)
+	queryset = queryset.filter(pk__in=ids)
+	if order_by_rank and ids:
+		ranking = Case(
+			*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+			output_field=IntegerField(),
+		)
+		queryset = queryset.order_by(ranking)
+	return queryset
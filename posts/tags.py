@@ -0,0 +1,86 @@
+"""
+Tag resolution for the post create/edit forms.
+
+Turning a "python, #django, Python " input into Tag rows and M2M links costs a
+fixed number of queries however many tags are submitted: one IN lookup, one
+bulk insert (plus a re-read) for the missing names, and one delete / one insert
+for the links that actually changed. Input the forms should reject (too many
+tags, tags queued for deletion) raises InvalidTags.
+"""
+import re
+
+from django.db import transaction
+
+from .models import Post, Tag, counted_rows_bulk_created
+
+MAX_TAGS_PER_POST = 30
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class InvalidTags(ValueError):
+	"""Tag input that cannot be saved; the message is meant for the form"""
+
+
+def normalize_tag_name(raw):
+	"""Strip surrounding space and leading '#', collapse inner whitespace, cap the length"""
+	name = _WHITESPACE_RE.sub(' ', (raw or '').strip().lstrip('#').strip())
+	return name[:Tag._meta.get_field('name').max_length]
+
+
+def parse_tag_names(tags_input):
+	"""Comma separated form input -> unique normalized names in submitted order"""
+	names = []
+	seen = set()
+	for raw in (tags_input or '').split(','):
+		name = normalize_tag_name(raw)
+		if name and name not in seen:
+			seen.add(name)
+			names.append(name)
+	if len(names) > MAX_TAGS_PER_POST:
+		raise InvalidTags(f'A post can have at most {MAX_TAGS_PER_POST} tags.')
+	return names
+
+
+def resolve_tags(names):
+	"""Return {name: Tag} for `names`, creating the ones that do not exist yet"""
+	if not names:
+		return {}
+	# all_objects: a tag queued for deletion still owns its name
+	tags = {tag.name: tag for tag in Tag.all_objects.filter(name__in=names)}
+	missing = [name for name in names if name not in tags]
+	if missing:
+		# ignore_conflicts: a concurrent request may create the same name first
+		new_tags = Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+		created_at = {tag.name: tag.created_at for tag in new_tags}
+		inserted = 0
+		for tag in Tag.all_objects.filter(name__in=missing):
+			tags[tag.name] = tag
+			# Rows another request inserted first carry its timestamp, not ours
+			inserted += tag.created_at == created_at[tag.name]
+		if inserted:
+			counted_rows_bulk_created.send(sender=Tag, count=inserted)
+	deleted = sorted(name for name, tag in tags.items() if tag.deleted_at is not None)
+	if deleted:
+		raise InvalidTags(f'These tags are being deleted and cannot be used: {", ".join(deleted)}.')
+	return tags
+
+
+@transaction.atomic
+def set_post_tags(post, tags_input):
+	"""
+	Make `post`'s tags match the comma separated `tags_input`, touching only the
+	links that were added or removed. Returns (added, removed) counts.
+	"""
+	tags = resolve_tags(parse_tag_names(tags_input))
+	wanted = {tag.pk for tag in tags.values()}
+	through = Post.tags.through
+	current = set(through.objects.filter(post_id=post.pk).values_list('tag_id', flat=True))
+
+	removed = current - wanted
+	added = wanted - current
+	if removed:
+		post.tags.remove(*removed)
+	if added:
+		post.tags.add(*added)
+	return len(added), len(removed)
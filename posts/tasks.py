@@ -0,0 +1,34 @@
+from jobs.queue import enqueue, task
+
+from . import deletion, page_cache
+from .models import DeletionRequest, Post
+
+
+@task(max_attempts=10)
+def purge_deletion(request_id):
+	"""Purge one slice of a DeletionRequest and re-queue itself until it is done"""
+	request = DeletionRequest.objects.filter(pk=request_id).exclude(status=DeletionRequest.STATUS_DONE).first()
+	if request is None:
+		return
+	if not deletion.claim(request):
+		# Another purge is running; wait for its slice to end
+		enqueue(purge_deletion, {'request_id': request_id}, delay=5, key=f'deletion:{request_id}')
+		return
+	try:
+		finished = deletion.purge(request)
+	except Exception as exc:
+		# Shown on the progress page; the job queue retries with backoff
+		# and gives up the turn for the other purges meanwhile
+		DeletionRequest.objects.filter(pk=request_id).update(
+			status=DeletionRequest.STATUS_PENDING, last_error=repr(exc)[:1000],
+		)
+		raise
+	if not finished:
+		enqueue(purge_deletion, {'request_id': request_id}, key=f'deletion:{request_id}')
+
+
+@task
+def refresh_trending():
+	"""Rescore recent posts, e.g. after the trending gravity setting changed"""
+	Post.recompute_trending()
+	page_cache.bump_version()
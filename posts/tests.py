@@ -1,3 +1,377 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Q
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.views import ahome
+
+from . import deletion, views
+from .importer import import_file
+from .tags import InvalidTags, resolve_tags
+from .models import Category, Comment, DeletionRequest, ImportCheckpoint, Like, Post, Tag, live_post_count
+
+
+class PostCounterTests(TestCase):
+	"""Post.like_count / comment counters and trending_score always match a recount"""
+
+	def setUp(self):
+		User = get_user_model()
+		self.author = User.objects.create_user('author')
+		self.readers = [User.objects.create_user(f'reader{i}') for i in range(3)]
+		self.post = Post.objects.create(title='First', content='Text', author=self.author, status='published')
+
+	def assertCountersMatchRecount(self):
+		post = Post.all_objects.annotate(
+			like_total=Count('likes', distinct=True),
+			comment_total=Count('comments', distinct=True),
+			approved_total=Count('comments', filter=Q(comments__approved=True), distinct=True),
+			expected_score=Post.trending_expression(),
+		).get(pk=self.post.pk)
+		self.assertEqual(post.like_count, post.like_total)
+		self.assertEqual(post.comment_count, post.comment_total)
+		self.assertEqual(post.approved_comment_count, post.approved_total)
+		self.assertAlmostEqual(post.trending_score, post.expected_score, places=4)
+
+	def test_likes(self):
+		for reader in self.readers:
+			Like.objects.create(post=self.post, user=reader)
+		self.assertCountersMatchRecount()
+		Like.objects.get(post=self.post, user=self.readers[0]).delete()
+		self.assertCountersMatchRecount()
+
+	def test_toggle(self):
+		self.assertEqual(Like.toggle(self.post.pk, self.readers[0]), (True, 1))
+		self.assertEqual(Like.toggle(self.post.pk, self.readers[1]), (True, 2))
+		self.assertEqual(Like.toggle(self.post.pk, self.readers[0]), (False, 1))
+		self.assertCountersMatchRecount()
+
+	def test_comments_and_moderation(self):
+		approved = Comment.objects.create(post=self.post, author=self.readers[0], content='Hi')
+		pending = Comment.objects.create(post=self.post, author=self.readers[1], content='Hi', approved=False)
+		self.assertCountersMatchRecount()
+		pending.approved = True
+		pending.save()
+		approved = Comment.objects.get(pk=approved.pk)
+		approved.approved = False
+		approved.save()
+		self.assertCountersMatchRecount()
+		pending.delete()
+		self.assertCountersMatchRecount()
+
+	def test_bulk_deletes(self):
+		for reader in self.readers:
+			Like.objects.create(post=self.post, user=reader)
+			Comment.objects.create(post=self.post, author=reader, content='Hi', approved=reader != self.readers[0])
+		Like.objects.filter(user__in=self.readers[:2]).delete()
+		Comment.objects.filter(author__in=self.readers[:2]).delete()
+		self.assertCountersMatchRecount()
+
+
+class SoftDeletedPostTests(TestCase):
+	"""A post queued for deletion disappears from every list at once, before the purge"""
+
+	def setUp(self):
+		User = get_user_model()
+		self.staff = User.objects.create_user('staff', is_staff=True)
+		self.category = Category.objects.create(name='News')
+		self.tag = Tag.objects.create(name='ideas')
+		self.post = Post.objects.create(
+			title='Gone', content='Text', author=self.staff, category=self.category, status='published',
+		)
+		self.post.tags.add(self.tag)
+		Comment.objects.create(post=self.post, author=self.staff, content='Hidden comment')
+		Like.objects.create(post=self.post, user=self.staff)
+		Post.all_objects.filter(pk=self.post.pk).update(deleted_at=timezone.now())
+		self.client.force_login(self.staff)
+
+	def test_comments_and_likes_are_hidden(self):
+		self.assertFalse(Comment.objects.live().exists())
+		self.assertFalse(Like.objects.live().exists())
+		for name in ('admin_comments', 'user_my_comments', 'profile'):
+			self.assertNotContains(self.client.get(reverse(name)), 'Hidden comment')
+		self.assertNotContains(self.client.get(reverse('user_my_likes')), reverse('post_detail', args=[self.post.pk]))
+
+	def test_post_counts_leave_it_out(self):
+		self.assertEqual(Category.objects.annotate(post_count=live_post_count()).get().post_count, 0)
+		self.assertEqual(Tag.objects.annotate(post_count=live_post_count()).get().post_count, 0)
+
+
+class DeletionPurgeTests(TestCase):
+	"""Deferred deletes run one purge at a time, in chunks"""
+
+	def setUp(self):
+		User = get_user_model()
+		self.author = User.objects.create_user('author')
+		self.readers = [User.objects.create_user(f'reader{i}') for i in range(3)]
+		self.posts = [
+			Post.objects.create(title=f'Post {i}', content='Text', author=self.author, status='published')
+			for i in range(2)
+		]
+		for post in self.posts:
+			for reader in self.readers:
+				Comment.objects.create(post=post, author=reader, content='Hi')
+				Like.objects.create(post=post, user=reader)
+
+	def test_one_purge_at_a_time(self):
+		first, second = (deletion.schedule_post(post) for post in self.posts)
+		self.assertEqual((first.total, second.total), (7, 7))
+		self.assertTrue(deletion.claim(first))
+		self.assertFalse(deletion.claim(second))
+		# A slice that runs out of time hands the turn over
+		self.assertFalse(deletion.purge(first, time_slice=0))
+		self.assertTrue(deletion.claim(second))
+		self.assertTrue(deletion.purge(second, chunk_size=2))
+		self.assertTrue(deletion.claim(first))
+		self.assertTrue(deletion.purge(first, chunk_size=2))
+		self.assertFalse(Post.all_objects.exists())
+		self.assertFalse(Comment.objects.exists() or Like.objects.exists())
+		self.assertEqual(
+			set(DeletionRequest.objects.values_list('status', 'deleted', 'total')),
+			{(DeletionRequest.STATUS_DONE, 7, 7)},
+		)
+
+	def test_progress_counts_rows_added_after_scheduling(self):
+		request = deletion.schedule_user(self.readers[0])
+		# reader0's 2 comments and 2 likes, and the user row
+		self.assertEqual(request.total, 5)
+		Comment.objects.create(post=self.posts[0], author=self.readers[0], content='Late')
+		self.assertTrue(deletion.purge(request, chunk_size=1))
+		request.refresh_from_db()
+		self.assertEqual((request.deleted, request.total, request.progress), (6, 6, 100))
+
+
+class TagResolutionTests(TestCase):
+	"""Tag input is resolved in a fixed number of queries without losing or miscounting tags"""
+
+	def setUp(self):
+		from stats.models import SiteCounters
+		self.counters = SiteCounters
+		self.author = get_user_model().objects.create_user('author')
+		self.client.force_login(self.author)
+
+	def test_concurrently_created_tag_is_not_counted_twice(self):
+		real_bulk_create = Tag.objects.bulk_create
+
+		def bulk_create_after_someone_else(objs, **kwargs):
+			Tag.objects.create(name='race')
+			return real_bulk_create(objs, **kwargs)
+
+		with mock.patch.object(Tag.objects, 'bulk_create', bulk_create_after_someone_else):
+			tags = resolve_tags(['race', 'fresh'])
+		self.assertEqual(set(tags), {'race', 'fresh'})
+		stored = self.counters.load().tags
+		self.counters.reconcile()
+		self.assertEqual(stored, self.counters.load().tags)
+
+	def test_tags_queued_for_deletion_are_rejected(self):
+		Tag.objects.create(name='old', deleted_at=timezone.now())
+		with self.assertRaises(InvalidTags):
+			resolve_tags(['old', 'new'])
+		response = self.client.post(reverse('post_create'), {'title': 'T', 'content': 'C', 'tags': 'old'}, follow=True)
+		self.assertContains(response, 'being deleted')
+		self.assertFalse(Post.objects.exists())
+
+	def test_too_many_tags_is_a_form_error(self):
+		tags = ', '.join(f'tag{i}' for i in range(31))
+		response = self.client.post(reverse('post_create'), {'title': 'T', 'content': 'C', 'tags': tags}, follow=True)
+		self.assertContains(response, 'at most 30 tags')
+		self.assertFalse(Post.objects.exists())
+		self.assertFalse(Tag.objects.exists())
+
+
+class PageCacheTests(TestCase):
+	"""Likes and comments invalidate only their post's cached pages"""
+
+	def setUp(self):
+		cache.clear()
+		self.author = get_user_model().objects.create_user('author')
+		self.post = Post.objects.create(title='Cached', content='Text', author=self.author, status='published')
+		self.other = Post.objects.create(title='Other', content='Text', author=self.author, status='published')
+
+	def state(self, name, *args):
+		return self.client.get(reverse(name, args=args))['X-Page-Cache']
+
+	def test_like_only_invalidates_its_post(self):
+		pages = [('home',), ('post_detail', self.post.pk), ('post_detail', self.other.pk)]
+		for page in pages:
+			self.assertEqual(self.state(*page), 'MISS')
+		with self.captureOnCommitCallbacks(execute=True):
+			Like.objects.create(post=self.post, user=self.author)
+		self.assertEqual([self.state(*page) for page in pages], ['HIT', 'MISS', 'HIT'])
+
+	def test_post_change_invalidates_everything(self):
+		self.assertEqual(self.state('post_detail', self.other.pk), 'MISS')
+		with self.captureOnCommitCallbacks(execute=True):
+			Post.objects.create(title='New', content='Text', author=self.author, status='published')
+		self.assertEqual(self.state('post_detail', self.other.pk), 'MISS')
+
+
+class LikeToggleRaceTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.reader = User.objects.create_user('reader')
+		self.post = Post.objects.create(
+			title='First', content='Text', author=User.objects.create_user('author'), status='published',
+		)
+
+	def test_like_created_concurrently_between_check_and_insert(self):
+		# Another request likes the post after toggle() found no like to remove,
+		# just before toggle() inserts its own (the savepoint around the insert)
+		state = {'checked': False, 'raced': False}
+
+		def concurrent_like(execute, sql, params, many, context):
+			if state['checked'] and not state['raced'] and sql.startswith('SAVEPOINT'):
+				state['raced'] = True
+				Like.objects.create(post=self.post, user=self.reader)
+			elif sql.startswith('SELECT') and '"posts_like"' in sql:
+				state['checked'] = True
+			return execute(sql, params, many, context)
+
+		with connection.execute_wrapper(concurrent_like):
+			liked, like_count = Like.toggle(self.post.pk, self.reader)
+
+		self.assertTrue(state['raced'])
+		self.assertEqual((liked, like_count), (True, 1))
+		self.assertEqual(Like.objects.filter(post=self.post).count(), 1)
+
+
+class ConcurrentLikeToggleTests(TransactionTestCase):
+	def setUp(self):
+		if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+			self.skipTest('threads need a file or server test database')
+
+	def test_concurrent_toggles_keep_like_count_exact(self):
+		User = get_user_model()
+		post = Post.objects.create(title='First', content='Text', author=User.objects.create_user('author'), status='published')
+		# Every reader double-clicks: two toggles each, racing with everyone else's
+		readers = [User.objects.create_user(f'reader{i}') for i in range(4)]
+		errors = []
+
+		def toggle(user):
+			try:
+				Like.toggle(post.pk, user)
+			except Exception as exc:
+				errors.append(exc)
+			finally:
+				connection.close()
+
+		threads = [threading.Thread(target=toggle, args=(user,)) for user in readers * 2]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(errors, [])
+		post.refresh_from_db()
+		self.assertEqual(post.like_count, Like.objects.filter(post=post).count())
+
+
+class ImportResumeTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.authors = [User.objects.create_user(f'writer{i}') for i in range(2)]
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		self.posts_path = os.path.join(directory.name, 'posts.jsonl')
+		self.comments_path = os.path.join(directory.name, 'comments.jsonl')
+		self.write(self.posts_path, [
+			{'id': f'p{i}', 'title': f'Post {i}', 'content': 'Text', 'author': f'writer{i % 2}',
+			 'category': 'News', 'tags': ['one', 'two']}
+			for i in range(5)
+		])
+		self.write(self.comments_path, [
+			{'id': f'c{i}', 'post': f'p{i % 2}', 'author': 'writer1', 'content': 'Nice'}
+			for i in range(4)
+		])
+
+	def write(self, path, records):
+		with open(path, 'w') as f:
+			f.writelines(json.dumps(record) + '\n' for record in records)
+
+	def test_resume_after_interruption(self):
+		def crash(checkpoint, skipped):
+			raise KeyboardInterrupt
+
+		# The first batch commits, then the import dies
+		with self.assertRaises(KeyboardInterrupt):
+			import_file(ImportCheckpoint.KIND_POSTS, self.posts_path, batch_size=2, progress=crash)
+		self.assertEqual(Post.objects.count(), 2)
+
+		checkpoint, skipped = import_file(ImportCheckpoint.KIND_POSTS, self.posts_path, batch_size=2)
+		self.assertEqual((checkpoint.rows, checkpoint.imported, checkpoint.skipped), (5, 5, 0))
+		self.assertEqual(Post.objects.count(), 5)
+		self.assertEqual(Category.objects.count(), 1)
+		self.assertEqual(Tag.objects.count(), 2)
+		self.assertEqual(Post.tags.through.objects.count(), 10)
+
+		# Reading the file again from the start imports nothing twice
+		checkpoint, skipped = import_file(ImportCheckpoint.KIND_POSTS, self.posts_path, batch_size=2, restart=True)
+		self.assertEqual(skipped, {'already imported': 5})
+		self.assertEqual(Post.objects.count(), 5)
+
+	def test_comments_update_post_counters(self):
+		import_file(ImportCheckpoint.KIND_POSTS, self.posts_path)
+		import_file(ImportCheckpoint.KIND_COMMENTS, self.comments_path, batch_size=3)
+		for post in Post.objects.annotate(comment_total=Count('comments')):
+			self.assertEqual(post.comment_count, post.comment_total)
+			self.assertEqual(post.approved_comment_count, post.comment_total)
+
+
+class BenchmarkViewsSmokeTests(TestCase):
+	"""benchmark_views requests every named route, so new or changed routes must keep it working"""
+
+	def test_one_iteration_over_every_route(self):
+		User = get_user_model()
+		staff = User.objects.create_user('staff', is_staff=True, is_superuser=True)
+		reader = User.objects.create_user('reader')
+		category = Category.objects.create(name='News')
+		tag = Tag.objects.create(name='ideas')
+		post = Post.objects.create(
+			title='Idea garden', content='Text', author=staff, category=category, status='published',
+		)
+		post.tags.add(tag)
+		Comment.objects.create(post=post, author=staff, content='Hi')
+		Like.objects.create(post=post, user=reader)
+
+		out = StringIO()
+		with tempfile.TemporaryDirectory() as directory:
+			call_command(
+				'benchmark_views', repeat=1, baseline=os.path.join(directory, 'baseline.json'), stdout=out,
+			)
+
+		rows = [line.split() for line in out.getvalue().splitlines() if line.strip()]
+		self.assertIn('admin_export/posts', [row[0] for row in rows])
+		self.assertEqual([row for row in rows if row[-1] == '500'], [])
+
+
+class AsyncViewTests(TestCase):
+	"""The async versions of the read views, routed only when ASYNC_VIEWS is on"""
+
+	async def test_async_views_render(self):
+		author = await get_user_model().objects.acreate(username='author')
+		category = await Category.objects.acreate(name='News')
+		tag = await Tag.objects.acreate(name='ideas')
+		post = await Post.objects.acreate(
+			title='Async', content='Text', author=author, category=category, status='published',
+		)
+		await post.tags.aadd(tag)
+		for view, args in [
+			(ahome, ()), (views.acategories, ()), (views.apost_detail, (post.pk,)),
+			(views.atag_posts, (tag.pk,)), (views.acategory_posts, (category.pk,)),
+		]:
+			request = AsyncRequestFactory().get('/')
+			request.user = AnonymousUser()
+			response = await view(request, *args)
+			self.assertContains(response, 'Async', msg_prefix=view.__name__)
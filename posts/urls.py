@@ -1,13 +1,18 @@
 
+from django.conf import settings
 from django.urls import path
 
 
 from . import views
 
 urlpatterns = [
-	path('tag/<int:pk>/posts/', views.tag_posts, name='tag_posts'),
-	path('category/<int:pk>/posts/', views.category_posts, name='category_posts'),
-	path('categories/', views.categories, name='categories'),
+	path('tag/<int:pk>/posts/', views.atag_posts if settings.ASYNC_VIEWS else views.tag_posts, name='tag_posts'),
+	path(
+		'category/<int:pk>/posts/', views.acategory_posts if settings.ASYNC_VIEWS else views.category_posts,
+		name='category_posts',
+	),
+	path('categories/', views.acategories if settings.ASYNC_VIEWS else views.categories, name='categories'),
+	path('search/', views.post_search, name='search'),
 	path('posts/new/', views.post_create, name='post_create'),
 	path('posts/manage/', views.user_manage_posts, name='user_manage_posts'),
 	path('profile/comments/', views.user_my_comments, name='user_my_comments'),
@@ -17,7 +22,8 @@ urlpatterns = [
 	path('posts/<int:pk>/delete/', views.delete_post, name='post_delete'),
 	path('posts/<int:pk>/comment/', views.post_add_comment, name='post_add_comment'),
 	path('posts/<int:pk>/like/', views.post_toggle_like, name='post_toggle_like'),
-	path('posts/<int:pk>/', views.post_detail, name='post_detail'),
+	path('posts/<int:pk>/', views.apost_detail if settings.ASYNC_VIEWS else views.post_detail, name='post_detail'),
+	path('posts/<int:pk>/comments/', views.post_comments, name='post_comments'),
 	path('admin/posts/', views.admin_posts, name='admin_posts'),
 	path('admin/comments/', views.admin_comments, name='admin_comments'),
 	path('admin/likes/', views.admin_likes, name='admin_likes'),
@@ -29,4 +35,6 @@ urlpatterns = [
     path('admin/tags/', views.admin_tags, name='admin_tags'),
     path('admin/tag/delete/<int:pk>/', views.admin_delete_tag, name='admin_delete_tag'),
     path('admin/delete_comment/<int:pk>/', views.admin_delete_comment, name='admin_delete_comment'),
+    path('admin/deletions/', views.admin_deletions, name='admin_deletions'),
+    path('admin/export/<slug:dataset>/', views.admin_export, name='admin_export'),
 ]
@@ -1,18 +1,33 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib import messages
-from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Prefetch, Q
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils import timezone
 from django.views.decorators.http import require_POST
-from datetime import datetime, timedelta
 from django.core.paginator import Paginator
 
-from .models import Category, Comment, Like, Post, Tag, SiteSettings
+from jobs.queue import enqueue
+from thoughtnest.async_views import alist, arender, auser
+from thoughtnest.dates import date_bounds, date_range_start
+from thoughtnest.pagination import paginate_by_cursor
+from thoughtnest.sqlite import immediate_atomic
+from thoughtnest.streaming import FORMATS as EXPORT_FORMATS, export_response
+
+from . import deletion, page_cache
+from .exports import DATASETS
+from .filters import filter_admin_comments, filter_admin_likes, filter_admin_posts
+from .models import Category, Comment, DeletionRequest, Like, Post, Tag, SiteSettings, live_post_count
+from .search import filter_posts, search_posts
+from .tags import InvalidTags, set_post_tags
 
 
 
 def user_my_comments(request):
-    comments = Comment.objects.filter(author=request.user).select_related('post').order_by('-created_at')
+    comments = Comment.objects.live().filter(author=request.user).select_related('post').order_by('-created_at')
 
     # Filters
     search_query = request.GET.get('q', '').strip()
@@ -23,27 +38,15 @@ def user_my_comments(request):
         comments = comments.filter(content__icontains=search_query)
     if post_id:
         comments = comments.filter(post_id=post_id)
-    if date_range:
-        today = datetime.now().date()
-        if date_range == 'today':
-            comments = comments.filter(created_at__date=today)
-        elif date_range == 'week':
-            start_date = today - timedelta(days=7)
-            comments = comments.filter(created_at__date__gte=start_date)
-        elif date_range == 'month':
-            start_date = today - timedelta(days=30)
-            comments = comments.filter(created_at__date__gte=start_date)
-        elif date_range == 'year':
-            start_date = today - timedelta(days=365)
-            comments = comments.filter(created_at__date__gte=start_date)
+    range_start = date_range_start(date_range)
+    if range_start:
+        comments = comments.filter(created_at__gte=range_start)
 
     # For filter dropdowns
     posts = Post.objects.filter(comments__author=request.user).distinct().order_by('title')
 
-    # Pagination: 10 comments per page
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(comments, 10)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (created_at, id): 10 comments per page
+    paginator, page_obj = paginate_by_cursor(request, comments, 10)
 
     context = {
         'comments': page_obj,
@@ -60,7 +63,7 @@ def user_my_comments(request):
 
 @login_required
 def user_my_likes(request):
-    likes = Like.objects.filter(user=request.user).select_related('post').order_by('-created_at')
+    likes = Like.objects.live().filter(user=request.user).select_related('post', 'post__category').order_by('-created_at')
 
     # Filters
     search_query = request.GET.get('q', '').strip()
@@ -68,24 +71,12 @@ def user_my_likes(request):
 
     if search_query:
         likes = likes.filter(post__title__icontains=search_query)
-    if date_range:
-        today = datetime.now().date()
-        if date_range == 'today':
-            likes = likes.filter(created_at__date=today)
-        elif date_range == 'week':
-            start_date = today - timedelta(days=7)
-            likes = likes.filter(created_at__date__gte=start_date)
-        elif date_range == 'month':
-            start_date = today - timedelta(days=30)
-            likes = likes.filter(created_at__date__gte=start_date)
-        elif date_range == 'year':
-            start_date = today - timedelta(days=365)
-            likes = likes.filter(created_at__date__gte=start_date)
-
-    # Pagination: 10 likes per page
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(likes, 10)
-    page_obj = paginator.get_page(page_number)
+    range_start = date_range_start(date_range)
+    if range_start:
+        likes = likes.filter(created_at__gte=range_start)
+
+    # Keyset pagination on (created_at, id): 10 likes per page
+    paginator, page_obj = paginate_by_cursor(request, likes, 10)
 
     context = {
         'likes': page_obj,
@@ -113,44 +104,16 @@ def admin_likes(request):
         messages.error(request, 'You do not have permission.')
         return redirect('home')
 
-    User = get_user_model()
-    likes = Like.objects.select_related('user', 'post').order_by('-created_at')
+    likes = filter_admin_likes(Like.objects.select_related('user', 'post').order_by('-created_at'), request.GET)
 
-    # Filters
-    user_search = request.GET.get('user_search', '').strip()  # Filter by username / name
+    user_search = request.GET.get('user_search', '').strip()
     post_id = request.GET.get('post', '')
     date_range = request.GET.get('date_range', '')
 
-    if user_search:
-        likes = likes.filter(
-            Q(user__username__icontains=user_search) |
-            Q(user__first_name__icontains=user_search) |
-            Q(user__last_name__icontains=user_search)
-        )
-
-    if post_id:
-        likes = likes.filter(post_id=post_id)
-
-    if date_range:
-        today = datetime.now().date()
-        if date_range == 'today':
-            likes = likes.filter(created_at__date=today)
-        elif date_range == 'week':
-            start_date = today - timedelta(days=7)
-            likes = likes.filter(created_at__date__gte=start_date)
-        elif date_range == 'month':
-            start_date = today - timedelta(days=30)
-            likes = likes.filter(created_at__date__gte=start_date)
-        elif date_range == 'year':
-            start_date = today - timedelta(days=365)
-            likes = likes.filter(created_at__date__gte=start_date)
-
     posts = Post.objects.all().order_by('title')
 
-    # Pagination: 15 likes per page
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(likes, 15)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (created_at, id): 15 likes per page
+    paginator, page_obj = paginate_by_cursor(request, likes, 15)
 
     context = {
         'likes': page_obj,
@@ -165,49 +128,148 @@ def admin_likes(request):
     return render(request, 'admin/likes.html', context)
 
 
-def categories(request):
-    # Categories with post counts
-    categories_list = Category.objects.annotate(post_count=Count('posts')).order_by('-post_count', 'name')
+CATEGORY_RECENT_POSTS = 2
+
+
+def categories_overview():
+    """
+    Everything the categories page lists, built with a fixed number of queries
+    and cached as one unit until content changes (page cache version bump).
+    """
+    key = f'posts:categories_overview:{page_cache.current_version()}'
+    overview = cache.get(key)
+    if overview is not None:
+        return overview
+
+    # Categories with post counts, plus their latest posts in one window query
+    categories_list = list(Category.objects.annotate(post_count=live_post_count()).order_by('-post_count', 'name'))
+    latest = Post.latest_by_category(CATEGORY_RECENT_POSTS)
     for cat in categories_list:
-        cat.recent_posts = cat.posts.filter(status=Post.STATUS_PUBLISHED).select_related('author').order_by('-created_at')[:2]
+        cat.recent_posts = latest.get(cat.pk, [])
 
     # Tags with post counts
-    tags_qs = Tag.objects.annotate(post_count=Count('posts')).order_by('-post_count', 'name')
+    tags_list = list(Tag.objects.annotate(post_count=live_post_count()).order_by('-post_count', 'name'))
 
-    # Convert QuerySet to list of dicts for JSON serialization
-    tags_list = list(tags_qs.values('id', 'name'))
+    overview = {
+        'categories': categories_list,
+        'tags': tags_list,
+        # Plain dicts for JSON serialization (tag search)
+        'all_tags_json': [{'id': tag.id, 'name': tag.name} for tag in tags_list],
+    }
+    cache.set(key, overview, settings.CATEGORIES_CACHE_TTL)
+    return overview
 
-    # Site settings
-    settings_obj = SiteSettings.load()
 
+def categories(request):
     context = {
-        'categories': categories_list,
-        'tags': tags_qs,           # for displaying tags in template
-        'all_tags_json': tags_list, # for JS search
-        'site_settings': settings_obj,
+        **categories_overview(),
+        'site_settings': SiteSettings.get_cached(),
     }
     return render(request, 'pages/categories.html', context)
 
 
+async def acategories(request):
+    """categories() for ASYNC_VIEWS deployments"""
+    context = {
+        **await sync_to_async(categories_overview)(),
+        'site_settings': await SiteSettings.aget_cached(),
+    }
+    return await arender(request, 'pages/categories.html', context)
+
+
 def post_detail(request, pk):
-	from .models import SiteSettings
-	settings_obj = SiteSettings.load()
-	
 	post = get_object_or_404(Post.objects.prefetch_related('tags'), pk=pk)
-	comments = post.comments.filter(approved=True).select_related('author')
-	user_has_liked = False
-	if request.user.is_authenticated:
-		user_has_liked = Like.objects.filter(post=post, user=request.user).exists()
+	# Only the first page is rendered; the rest is fetched from post_comments.
+	# The total comes from the approved_comment_count counter.
+	_, comments = paginate_by_cursor(
+		request, _approved_comments(pk), settings.POST_COMMENTS_PER_PAGE, estimate_total=False,
+	)
+	user_has_liked = (
+		request.user.is_authenticated and Like.objects.filter(post_id=pk, user=request.user).exists()
+	)
 	
 	context = {
 		'post': post, 
 		'comments': comments, 
 		'user_has_liked': user_has_liked,
-		'site_settings': settings_obj,
+		'site_settings': SiteSettings.get_cached(),
 	}
 	return render(request, 'posts/post_detail.html', context)
 
 
+async def apost_detail(request, pk):
+	"""post_detail() for ASYNC_VIEWS deployments"""
+	post = await aget_object_or_404(Post.objects.prefetch_related('tags'), pk=pk)
+	_, comments = await sync_to_async(paginate_by_cursor)(
+		request, _approved_comments(pk), settings.POST_COMMENTS_PER_PAGE, estimate_total=False,
+	)
+	user = await auser(request)
+	user_has_liked = user.is_authenticated and await Like.objects.filter(post_id=pk, user=user).aexists()
+	
+	context = {
+		'post': post, 
+		'comments': comments, 
+		'user_has_liked': user_has_liked,
+		'site_settings': await SiteSettings.aget_cached(),
+	}
+	return await arender(request, 'posts/post_detail.html', context)
+
+
+def _approved_comments(post_id):
+	return Comment.objects.filter(post_id=post_id, approved=True).select_related('author')
+
+
+def post_comments(request, pk):
+	"""Next page of a post's approved comments as a rendered fragment plus cursor"""
+	get_object_or_404(Post.objects.only('pk'), pk=pk)
+	_, comments = paginate_by_cursor(
+		request, _approved_comments(pk), settings.POST_COMMENTS_PER_PAGE, estimate_total=False,
+	)
+	html = render_to_string('posts/comment_list.html', {'comments': comments}, request=request)
+	return JsonResponse({'html': html, 'next_cursor': comments.next_cursor})
+
+
+def post_search(request):
+	"""Public full-text search over posts, ranked by relevance"""
+	settings_obj = SiteSettings.get_cached()
+	search_query = request.GET.get('q', '').strip()
+
+	def id_param(name):
+		try:
+			return int(request.GET.get(name, ''))
+		except (TypeError, ValueError):
+			return None
+
+	category_id = id_param('category')
+	tag_id = id_param('tag')
+	page = id_param('page') or 1
+
+	# Drafts are only searchable by staff
+	status = Post.STATUS_PUBLISHED
+	if request.user.is_staff and request.GET.get('status') in (Post.STATUS_DRAFT, 'all'):
+		status = None if request.GET['status'] == 'all' else Post.STATUS_DRAFT
+
+	results = search_posts(
+		search_query,
+		status=status,
+		category=category_id,
+		tag=tag_id,
+		page=page,
+		per_page=settings_obj.posts_per_page,
+	)
+
+	context = {
+		'results': results,
+		'search_query': search_query,
+		'categories': Category.objects.all(),
+		'selected_category': category_id,
+		'selected_tag': Tag.objects.filter(pk=tag_id).first() if tag_id else None,
+		'selected_status': request.GET.get('status', ''),
+		'site_settings': settings_obj,
+	}
+	return render(request, 'pages/search.html', context)
+
+
 @login_required
 def post_create(request):
     if request.method == 'POST':
@@ -226,22 +288,23 @@ def post_create(request):
             messages.error(request, 'Content is required.')
             return redirect('post_create')
 
-        post = Post.objects.create(
-            author=request.user,
-            title=title,
-            content=content,
-            status=status,
-            category_id=category_id if category_id else None,
-            # featured_image removed
-        )
-
-        # Handle tags
-        if tags_input:
-            tag_names = [tag.strip().lstrip("#") for tag in tags_input.split(',')]
-            for tag_name in tag_names:
-                if tag_name:
-                    tag, _ = Tag.objects.get_or_create(name=tag_name)
-                    post.tags.add(tag)
+        try:
+            with immediate_atomic():
+                post = Post.objects.create(
+                    author=request.user,
+                    title=title,
+                    content=content,
+                    status=status,
+                    category_id=category_id if category_id else None,
+                    # featured_image removed
+                )
+
+                # Handle tags
+                if tags_input:
+                    set_post_tags(post, tags_input)
+        except InvalidTags as exc:
+            messages.error(request, str(exc))
+            return redirect('post_create')
 
         messages.success(request, 'Post created successfully!')
         return redirect('post_detail', pk=post.pk)
@@ -250,7 +313,7 @@ def post_create(request):
     context = {
         'mode': 'create',
         'categories': Category.objects.all(),
-        'popular_tags': Tag.objects.annotate(post_count=Count('posts')).order_by('-post_count', 'name')[:10],  # top 10 popular
+        'popular_tags': Tag.objects.annotate(post_count=live_post_count()).order_by('-post_count', 'name')[:10],  # top 10 popular
         'all_tags': Tag.objects.all().order_by('name'),  # fetch all for search/autocomplete later
         'all_tag_names': list(Tag.objects.order_by('name').values_list('name', flat=True)),  # for JS
     }
@@ -274,15 +337,13 @@ def post_edit(request, pk):
 
 		# Handle tags
 		tags_input = request.POST.get('tags', '').strip()
-		post.tags.clear()
-		if tags_input:
-			tag_names = [tag.strip() for tag in tags_input.split(',')]
-			for tag_name in tag_names:
-				if tag_name:
-					tag, _ = Tag.objects.get_or_create(name=tag_name)
-					post.tags.add(tag)
-
-		post.save()
+		try:
+			with immediate_atomic():
+				post.save()
+				set_post_tags(post, tags_input)
+		except InvalidTags as exc:
+			messages.error(request, str(exc))
+			return redirect('edit_post', pk=post.pk)
 		messages.success(request, 'Post updated successfully!')
 		return redirect('post_detail', pk=post.pk)
 
@@ -291,7 +352,7 @@ def post_edit(request, pk):
 		'post': post,
 		'categories': Category.objects.all(),
 		'tags': Tag.objects.all(),
-		'popular_tags': Tag.objects.annotate(post_count=Count('posts')).order_by('-post_count', 'name')[:10],
+		'popular_tags': Tag.objects.annotate(post_count=live_post_count()).order_by('-post_count', 'name')[:10],
 		'all_tag_names': list(Tag.objects.order_by('name').values_list('name', flat=True)),
 	}
 	return render(request, 'posts/post_form.html', context)
@@ -301,7 +362,7 @@ def post_edit(request, pk):
 @require_POST
 def post_add_comment(request, pk):
 	from .models import SiteSettings
-	settings_obj = SiteSettings.load()
+	settings_obj = SiteSettings.get_cached()
 	
 	if not settings_obj.allow_comments:
 		messages.error(request, 'Commenting is currently disabled site-wide.')
@@ -314,7 +375,9 @@ def post_add_comment(request, pk):
 		return redirect('post_detail', pk=post.pk)
 
 	approved = not settings_obj.moderate_comments
-	Comment.objects.create(post=post, author=request.user, content=content, approved=approved)
+	# One write transaction for the comment and the counters its signals bump
+	with immediate_atomic():
+		Comment.objects.create(post=post, author=request.user, content=content, approved=approved)
 	
 	if approved:
 		messages.success(request, 'Comment added.')
@@ -327,14 +390,17 @@ def post_add_comment(request, pk):
 @login_required
 @require_POST
 def post_toggle_like(request, pk):
-	post = get_object_or_404(Post, pk=pk)
-	like = Like.objects.filter(post=post, user=request.user).first()
-	if like:
-		like.delete()
-		messages.info(request, 'Like removed.')
-	else:
-		Like.objects.create(post=post, user=request.user)
+	post = get_object_or_404(Post.objects.only('pk'), pk=pk)
+	liked, like_count = Like.toggle(post.pk, request.user)
+
+	# fetch() callers get the new state instead of a redirect + page render
+	if 'application/json' in request.headers.get('Accept', ''):
+		return JsonResponse({'liked': liked, 'like_count': like_count})
+
+	if liked:
 		messages.success(request, 'You liked the post.')
+	else:
+		messages.info(request, 'Like removed.')
 
 	next_url = request.POST.get('next') or request.META.get('HTTP_REFERER')
 	if next_url:
@@ -343,15 +409,12 @@ def post_toggle_like(request, pk):
 
 @login_required
 def user_manage_posts(request):
-    posts = Post.objects.filter(author=request.user).select_related('category').prefetch_related('comments', 'likes', 'tags')
+    posts = Post.objects.filter(author=request.user).select_related('category').prefetch_related('tags')
     
     # Search functionality
     search_query = request.GET.get('q', '').strip()
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) | 
-            Q(content__icontains=search_query)
-        )
+        posts = filter_posts(posts, search_query, author=request.user.pk)
     
     # Filter by category
     category_id = request.GET.get('category', '')
@@ -368,38 +431,25 @@ def user_manage_posts(request):
     
     # Filter by date range
     date_range = request.GET.get('date_range', '')
-    if date_range:
-        today = datetime.now().date()
-        if date_range == 'today':
-            posts = posts.filter(created_at__date=today)
-        elif date_range == 'week':
-            start_date = today - timedelta(days=7)
-            posts = posts.filter(created_at__date__gte=start_date)
-        elif date_range == 'month':
-            start_date = today - timedelta(days=30)
-            posts = posts.filter(created_at__date__gte=start_date)
-        elif date_range == 'year':
-            start_date = today - timedelta(days=365)
-            posts = posts.filter(created_at__date__gte=start_date)
+    range_start = date_range_start(date_range)
+    if range_start:
+        posts = posts.filter(created_at__gte=range_start)
     
-    # Ordering
+    # Ordering (id breaks ties so every row has a unique keyset position)
     order_by = request.GET.get('order_by', '-created_at')
-    if order_by in ['-created_at', 'created_at', '-updated_at', 'updated_at', 'title']:
-        posts = posts.order_by(order_by)
-    else:
-        posts = posts.order_by('-created_at')
+    if order_by not in ['-created_at', 'created_at', '-updated_at', 'updated_at', 'title']:
+        order_by = '-created_at'
+    ordering = (order_by, '-id' if order_by.startswith('-') else 'id')
     
-    # Pagination: 10 posts per page
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(posts, 10)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: 10 posts per page
+    paginator, page_obj = paginate_by_cursor(request, posts, 10, ordering=ordering)
     
     # Categories for filter dropdown
     categories = Category.objects.all().order_by('name')
     
     # Sidebar context
-    my_comments = Comment.objects.filter(author=request.user).select_related('post').order_by('-created_at')[:5]
-    liked_post_ids = Like.objects.filter(user=request.user).order_by('-created_at').values_list('post_id', flat=True)[:5]
+    my_comments = Comment.objects.live().filter(author=request.user).select_related('post').order_by('-created_at')[:5]
+    liked_post_ids = Like.objects.live().filter(user=request.user).order_by('-created_at').values_list('post_id', flat=True)[:5]
     liked_posts = Post.objects.filter(id__in=liked_post_ids)
     
     context = {
@@ -425,7 +475,8 @@ def delete_post(request, pk):
 		messages.error(request, 'You do not have permission to delete this post.')
 		return redirect('post_detail', pk=post.pk)
 	
-	post.delete()
+	# Hidden now; its comments and likes are purged in the background
+	deletion.schedule_post(post, request.user)
 	messages.success(request, 'Post deleted successfully!')
 	return redirect('admin_posts' if request.user.is_staff else 'profile')
 
@@ -435,33 +486,16 @@ def admin_posts(request):
         messages.error(request, 'You do not have permission.')
         return redirect('home')
 
-    # Base queryset
-    posts = Post.objects.select_related('author', 'category').prefetch_related('comments', 'likes').order_by('-created_at')
+    posts = filter_admin_posts(Post.objects.select_related('author', 'category').order_by('-created_at'), request.GET)
 
-    # Filters
     search_query = request.GET.get('search', '').strip()
     category_id = request.GET.get('category', '').strip()
     status = request.GET.get('status', '').strip()
 
-    if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query) |
-            Q(author__username__icontains=search_query) |
-            Q(author__first_name__icontains=search_query) |
-            Q(author__last_name__icontains=search_query)
-        )
-
-    if category_id:
-        posts = posts.filter(category_id=category_id)
-    if status:
-        posts = posts.filter(status=status)
-
     categories = Category.objects.all().order_by('name')
 
-    # Pagination: 15 posts per page
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(posts, 15)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (created_at, id): 15 posts per page
+    paginator, page_obj = paginate_by_cursor(request, posts, 15)
 
     context = {
         'posts': page_obj,
@@ -482,47 +516,16 @@ def admin_comments(request):
         messages.error(request, 'You do not have permission.')
         return redirect('home')
 
-    User = get_user_model()
-    comments = Comment.objects.select_related('author', 'post').order_by('-created_at')
+    comments = filter_admin_comments(Comment.objects.select_related('author', 'post').order_by('-created_at'), request.GET)
 
-    # Filters
     user_search = request.GET.get('user_search', '').strip()
     post_id = request.GET.get('post', '')
     date_range = request.GET.get('date_range', '')
 
-    # Filter by user search (username or first/last name)
-    if user_search:
-        comments = comments.filter(
-            Q(author__username__icontains=user_search) |
-            Q(author__first_name__icontains=user_search) |
-            Q(author__last_name__icontains=user_search)
-        )
-
-    # Filter by post
-    if post_id:
-        comments = comments.filter(post_id=post_id)
-
-    # Filter by date range
-    if date_range:
-        today = datetime.now().date()
-        if date_range == 'today':
-            comments = comments.filter(created_at__date=today)
-        elif date_range == 'week':
-            start_date = today - timedelta(days=7)
-            comments = comments.filter(created_at__date__gte=start_date)
-        elif date_range == 'month':
-            start_date = today - timedelta(days=30)
-            comments = comments.filter(created_at__date__gte=start_date)
-        elif date_range == 'year':
-            start_date = today - timedelta(days=365)
-            comments = comments.filter(created_at__date__gte=start_date)
-
     posts = Post.objects.all().order_by('title')
 
-    # Pagination: 15 comments per page
-    page_number = request.GET.get('page', 1)
-    paginator = Paginator(comments, 15)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (created_at, id): 15 comments per page
+    paginator, page_obj = paginate_by_cursor(request, comments, 15)
 
     context = {
         'comments': page_obj,
@@ -561,21 +564,29 @@ def admin_settings(request):
 			try:
 				settings_obj.posts_per_page = int(request.POST.get('posts_per_page', 12))
 				settings_obj.excerpt_length = int(request.POST.get('excerpt_length', 25))
+				trending_gravity = float(request.POST.get('trending_gravity', settings_obj.trending_gravity))
 			except ValueError:
 				messages.error(request, 'Invalid numeric values for content settings.')
 				return redirect('admin_settings')
+			if not 0 < trending_gravity <= 5:
+				messages.error(request, 'Trending gravity must be between 0 and 5.')
+				return redirect('admin_settings')
+			gravity_changed = trending_gravity != settings_obj.trending_gravity
+			settings_obj.trending_gravity = trending_gravity
 				
 			settings_obj.allow_comments = request.POST.get('allow_comments') == 'on'
 			settings_obj.moderate_comments = request.POST.get('moderate_comments') == 'on'
 			settings_obj.allow_registration = request.POST.get('allow_registration') == 'on'
 			settings_obj.show_author = request.POST.get('show_author') == 'on'
 			settings_obj.save()
+			if gravity_changed:
+				# Existing scores were computed with the old gravity
+				enqueue('posts.tasks.refresh_trending', key='posts.refresh_trending')
 			messages.success(request, 'Content settings updated successfully!')
 		
 		elif action == 'clear_comments':
-			from .models import Comment
-			Comment.objects.all().delete()
-			messages.success(request, 'All comments have been cleared.')
+			deletion.schedule_comment_wipe(request.user)
+			messages.success(request, 'All comments are being cleared in the background; see Deletions for progress.')
 		
 		return redirect('admin_settings')
 	
@@ -596,7 +607,7 @@ def admin_categories(request):
     page_number = request.GET.get('page', 1)
 
     # Base queryset with post count
-    categories = Category.objects.annotate(post_count=Count('posts')).order_by('-created_at')
+    categories = Category.objects.annotate(post_count=live_post_count()).order_by('-created_at')
 
     # Apply search filter
     if category_search:
@@ -646,21 +657,30 @@ def admin_delete_category(request, pk):
 		return redirect('home')
 	
 	category = get_object_or_404(Category, pk=pk)
-	category.delete()
-	messages.success(request, 'Category deleted successfully!')
+	deletion.schedule_category(category, request.user)
+	messages.success(request, 'Category deleted; its posts are being uncategorized in the background.')
 	return redirect('admin_categories')
 
-def tag_posts(request, pk):
-    tag = get_object_or_404(Tag, pk=pk)
-    
+def _published_posts(request, filters, search_filters):
+    """
+    (published posts matching `filters`, newest first or ranked by ?q=, the
+    search query); `search_filters` are the same filters for filter_posts()
+    """
     posts = Post.objects.filter(
-        tags=tag, 
-        status=Post.STATUS_PUBLISHED
+        status=Post.STATUS_PUBLISHED, **filters
     ).select_related('author', 'category').order_by('-created_at')
     
     search_query = request.GET.get('q', '').strip()
     if search_query:
-        posts = posts.filter(title__icontains=search_query)
+        posts = filter_posts(
+            posts, search_query, order_by_rank=True,
+            status=Post.STATUS_PUBLISHED, **search_filters,
+        )
+    return posts, search_query
+
+def tag_posts(request, pk):
+    tag = get_object_or_404(Tag, pk=pk)
+    posts, search_query = _published_posts(request, {'tags': pk}, {'tag': pk})
     
     context = {
         'tag': tag,
@@ -670,17 +690,22 @@ def tag_posts(request, pk):
     
     return render(request, 'pages/tag_posts.html', context)
 
-def category_posts(request, pk):
-    category = get_object_or_404(Category, pk=pk)
+async def atag_posts(request, pk):
+    """tag_posts() for ASYNC_VIEWS deployments"""
+    tag = await aget_object_or_404(Tag, pk=pk)
+    posts, search_query = await sync_to_async(_published_posts)(request, {'tags': pk}, {'tag': pk})
     
-    posts = Post.objects.filter(
-        category=category,
-        status=Post.STATUS_PUBLISHED
-    ).select_related('author').order_by('-created_at')
+    context = {
+        'tag': tag,
+        'posts': await alist(posts),
+        'search_query': search_query,
+    }
     
-    search_query = request.GET.get('q', '').strip() 
-    if search_query:
-        posts = posts.filter(title__icontains=search_query)
+    return await arender(request, 'pages/tag_posts.html', context)
+
+def category_posts(request, pk):
+    category = get_object_or_404(Category, pk=pk)
+    posts, search_query = _published_posts(request, {'category': pk}, {'category': pk})
     
     context = {
         'category': category,
@@ -690,6 +715,49 @@ def category_posts(request, pk):
     
     return render(request, 'pages/category_posts.html', context)
 
+async def acategory_posts(request, pk):
+    """category_posts() for ASYNC_VIEWS deployments"""
+    category = await aget_object_or_404(Category, pk=pk)
+    posts, search_query = await sync_to_async(_published_posts)(request, {'category': pk}, {'category': pk})
+    
+    context = {
+        'category': category,
+        'posts': await alist(posts),
+        'search_query': search_query,
+    }
+    
+    return await arender(request, 'pages/category_posts.html', context)
+
+@login_required
+def admin_deletions(request):
+	if not request.user.is_staff:
+		messages.error(request, 'You do not have permission.')
+		return redirect('home')
+
+	deletions = list(DeletionRequest.objects.select_related('requested_by')[:50])
+	active = any(item.status != DeletionRequest.STATUS_DONE for item in deletions)
+	if 'application/json' in request.headers.get('Accept', ''):
+		return JsonResponse({'deletions': [
+			{'id': item.pk, 'status': item.status, 'progress': item.progress, 'deleted': item.deleted, 'total': item.total}
+			for item in deletions
+		]})
+	return render(request, 'admin/deletions.html', {'deletions': deletions, 'active': active})
+
+@login_required
+def admin_export(request, dataset):
+	"""Stream a staff list (?format=csv|ndjson, ?gzip=1) with the same filters as its admin page"""
+	if not request.user.is_staff:
+		messages.error(request, 'You do not have permission.')
+		return redirect('home')
+
+	export = DATASETS.get(dataset)
+	format = request.GET.get('format', 'csv')
+	if export is None or format not in EXPORT_FORMATS:
+		raise Http404('Unknown export')
+	rows = export.rows(request.GET, getattr(settings, 'EXPORT_FETCH_SIZE', 2000))
+	filename = f"{dataset}-{timezone.localdate():%Y%m%d}"
+	return export_response(request, export.names, rows, filename, format, compress=request.GET.get('gzip') == '1')
+
 def admin_delete_comment(request, pk):
 	if not request.user.is_staff:
 		messages.error(request, 'You do not have permission.')
@@ -706,7 +774,7 @@ def admin_delete_tag(request, pk):
 		return redirect('home')
 	
 	tag = get_object_or_404(Tag, pk=pk)
-	tag.delete()
+	deletion.schedule_tag(tag, request.user)
 	messages.success(request, 'Tag deleted successfully!')
 	return redirect('admin_tags')
 
@@ -726,12 +794,13 @@ def admin_tags(request):
     if tag_search:
         tags = tags.filter(name__icontains=tag_search)
 
-    if date_from:
-        tags = tags.filter(created_at__date__gte=date_from)
-    if date_to:
-        tags = tags.filter(created_at__date__lte=date_to)
+    created_from, created_to = date_bounds(date_from, date_to)
+    if created_from:
+        tags = tags.filter(created_at__gte=created_from)
+    if created_to:
+        tags = tags.filter(created_at__lt=created_to)
 
-    tags = tags.annotate(post_count=Count('posts')).order_by('-created_at')
+    tags = tags.annotate(post_count=live_post_count()).order_by('-created_at')
 
     # Pagination: 15 tags per page
     paginator = Paginator(tags, 15)
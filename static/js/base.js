@@ -84,6 +84,23 @@ function showNotification(message, type = 'info') {
     }, 3000);
 }
 
+// Utility: Submit a like form in the background.
+// Resolves with {liked, like_count}; rejects so callers can fall back to a normal submit.
+function submitLikeForm(form) {
+    return fetch(form.action, {
+        method: 'POST',
+        body: new FormData(form),
+        headers: { 'Accept': 'application/json' },
+        credentials: 'same-origin',
+    }).then(response => {
+        const type = response.headers.get('Content-Type') || '';
+        if (!response.ok || !type.includes('application/json')) {
+            throw new Error(`Like request failed (${response.status})`);
+        }
+        return response.json();
+    });
+}
+
 // Add animation styles
 const style = document.createElement('style');
 style.textContent = `
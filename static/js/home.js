@@ -20,11 +20,9 @@ document.addEventListener('DOMContentLoaded', function() {
         subscribeForm.addEventListener('submit', handleSubscribe);
     }
 
-    // Like button functionality (simple toggle without backend)
-    const postLikeButtons = document.querySelectorAll('.post-likes');
-    postLikeButtons.forEach(button => {
-        button.style.cursor = 'pointer';
-        button.addEventListener('click', function(e) {
+    // Like buttons: toggle in the background, keep the form as the no-JS fallback
+    document.querySelectorAll('.post-like-form').forEach(form => {
+        form.addEventListener('submit', function(e) {
             e.preventDefault();
             toggleLike(this);
         });
@@ -78,16 +76,16 @@ function handleSubscribe(e) {
     }
 }
 
-function toggleLike(element) {
-    const likesText = element.textContent;
-    const currentLikes = parseInt(likesText.match(/\d+/)[0]);
-    const isLiked = element.classList.contains('liked');
+function toggleLike(form) {
+    const button = form.querySelector('.post-likes-btn');
+    if (button.disabled) return;
+    button.disabled = true;
 
-    if (isLiked) {
-        element.textContent = `❤️ ${currentLikes - 1} likes`;
-        element.classList.remove('liked');
-    } else {
-        element.textContent = `❤️ ${currentLikes + 1} likes`;
-        element.classList.add('liked');
-    }
+    submitLikeForm(form)
+        .then(data => {
+            button.classList.toggle('liked', data.liked);
+            button.innerHTML = `<i class="fa-solid fa-heart"></i> ${data.like_count}`;
+        })
+        .catch(() => form.submit())
+        .finally(() => { button.disabled = false; });
 }
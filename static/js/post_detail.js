@@ -0,0 +1,70 @@
+// ========================================
+// Post Detail Page JavaScript
+// ========================================
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Like button: toggle in the background, keep the form as the no-JS fallback
+    const likeForm = document.querySelector('.like-form');
+    if (likeForm) {
+        likeForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+            toggleLike(this);
+        });
+    }
+
+    // Older comments: fetched page by page when the "load more" link scrolls into view
+    const loadMore = document.getElementById('loadMoreComments');
+    if (loadMore) {
+        loadMore.addEventListener('click', function(e) {
+            e.preventDefault();
+            loadMoreComments(this);
+        });
+        if ('IntersectionObserver' in window) {
+            const observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    loadMoreComments(loadMore);
+                }
+            }, { rootMargin: '200px' });
+            observer.observe(loadMore);
+        }
+    }
+});
+
+function loadMoreComments(link) {
+    if (link.dataset.loading || !link.dataset.cursor) return;
+    link.dataset.loading = '1';
+
+    const url = `${link.dataset.url}?cursor=${encodeURIComponent(link.dataset.cursor)}`;
+    fetch(url, { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+        .then(response => {
+            if (!response.ok) throw new Error(`Comments request failed (${response.status})`);
+            return response.json();
+        })
+        .then(data => {
+            document.getElementById('commentsList').insertAdjacentHTML('beforeend', data.html);
+            if (data.next_cursor) {
+                link.dataset.cursor = data.next_cursor;
+                link.href = `?cursor=${data.next_cursor}#commentsList`;
+            } else {
+                document.getElementById('commentsMore').remove();
+            }
+        })
+        .catch(() => { window.location.href = link.href; })
+        .finally(() => { delete link.dataset.loading; });
+}
+
+function toggleLike(form) {
+    const button = form.querySelector('.like-btn');
+    if (button.disabled) return;
+    button.disabled = true;
+
+    submitLikeForm(form)
+        .then(data => {
+            const label = `${data.like_count} like${data.like_count === 1 ? '' : 's'}`;
+            button.classList.toggle('liked', data.liked);
+            button.innerHTML = `<i class="fa-${data.liked ? 'solid' : 'regular'} fa-heart"></i>`;
+            document.querySelectorAll('[data-like-count]').forEach(el => { el.textContent = label; });
+        })
+        .catch(() => form.submit())
+        .finally(() => { button.disabled = false; });
+}
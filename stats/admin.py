@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import AuthorStats, DailyStats, SiteCounters
+
+# Register your models here.
+
+@admin.register(SiteCounters)
+class SiteCountersAdmin(admin.ModelAdmin):
+    list_display = ('posts', 'published_posts', 'comments', 'likes', 'users', 'reconciled_at')
+    readonly_fields = ('reconciled_at',)
+
+
+@admin.register(DailyStats)
+class DailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('date', 'new_posts', 'new_comments', 'new_likes', 'new_users', 'computed_at')
+    date_hierarchy = 'date'
+
+
+@admin.register(AuthorStats)
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'posts', 'published_posts', 'likes_received', 'comments_received', 'rebuilt_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    readonly_fields = ('rebuilt_at',)
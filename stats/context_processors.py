@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import AuthorStats
+
+
+def author_stats(request):
+    """
+    `author_stats` for the signed-in user. Lazy, so only templates that show
+    it (the profile sidebar) pay for the single-row lookup.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'author_stats': SimpleLazyObject(lambda: AuthorStats.for_user(user))}
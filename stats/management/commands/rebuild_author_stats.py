@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from stats.models import AuthorStats
+
+
+class Command(BaseCommand):
+    help = 'Recounts the per-user AuthorStats rows from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only rebuild the given user id (may be repeated).')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows upserted per statement (default: 500).')
+
+    def handle(self, *args, **options):
+        written = AuthorStats.rebuild(options['user_ids'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt author stats for {written} user(s).'))
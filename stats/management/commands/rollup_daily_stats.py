@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from posts.models import Comment, Like, Post
+from stats.models import DailyStats, SiteCounters
+
+
+class Command(BaseCommand):
+    help = 'Rolls up per-day activity into DailyStats (idempotent) and optionally recounts SiteCounters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2,
+                            help='Recompute the last N days including today (default: 2).')
+        parser.add_argument('--since', help='Recompute every day from this date (YYYY-MM-DD) to today.')
+        parser.add_argument('--backfill', action='store_true',
+                            help='Recompute every day since the first recorded activity.')
+        parser.add_argument('--reconcile', action='store_true',
+                            help='Also recount SiteCounters from the source tables.')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+
+        if options['backfill']:
+            start = self.first_activity_date() or today
+        elif options['since']:
+            try:
+                start = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format.')
+        else:
+            start = today - timedelta(days=max(options['days'], 1) - 1)
+
+        # Chunk long backfills so each upsert stays small
+        total = 0
+        chunk_start = start
+        while chunk_start <= today:
+            chunk_end = min(chunk_start + timedelta(days=89), today)
+            total += DailyStats.rollup(chunk_start, chunk_end)
+            chunk_start = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {total} day(s) from {start} to {today}.'))
+
+        if options['reconcile']:
+            counters = SiteCounters.reconcile()
+            self.stdout.write(self.style.SUCCESS(
+                f'Reconciled site counters: {counters.posts} posts, {counters.comments} comments, '
+                f'{counters.likes} likes, {counters.users} users.'
+            ))
+
+    def first_activity_date(self):
+        User = get_user_model()
+        firsts = [
+            Post.objects.aggregate(first=Min('created_at'))['first'],
+            Comment.objects.aggregate(first=Min('created_at'))['first'],
+            Like.objects.aggregate(first=Min('created_at'))['first'],
+            User.objects.aggregate(first=Min('date_joined'))['first'],
+        ]
+        firsts = [value for value in firsts if value is not None]
+        if not firsts:
+            return None
+        return timezone.localdate(min(firsts))
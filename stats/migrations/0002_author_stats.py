@@ -0,0 +1,79 @@
+# Generated by Django 5.2.11 on 2026-10-17 19:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def backfill_author_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Like = apps.get_model('posts', 'Like')
+    AuthorStats = apps.get_model('stats', 'AuthorStats')
+
+    def counted(model, field, **filters):
+        rows = (
+            model.objects.filter(**{field: OuterRef('pk')}, **filters)
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(rows), Value(0))
+
+    users = User.objects.order_by('pk').annotate(
+        posts_total=counted(Post, 'author'),
+        published_total=counted(Post, 'author', status='published'),
+        likes_received_total=counted(Like, 'post__author'),
+        comments_received_total=counted(Comment, 'post__author'),
+        likes_given_total=counted(Like, 'user'),
+        comments_given_total=counted(Comment, 'author'),
+    )
+    now = timezone.now()
+    AuthorStats.objects.bulk_create([
+        AuthorStats(
+            user_id=user.pk,
+            posts=user.posts_total,
+            published_posts=user.published_total,
+            likes_received=user.likes_received_total,
+            comments_received=user.comments_received_total,
+            likes_given=user.likes_given_total,
+            comments_given=user.comments_given_total,
+            rebuilt_at=now,
+        )
+        for user in users.iterator(chunk_size=500)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0008_query_indexes'),
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts', models.IntegerField(default=0)),
+                ('published_posts', models.IntegerField(default=0)),
+                ('likes_received', models.IntegerField(default=0)),
+                ('comments_received', models.IntegerField(default=0)),
+                ('likes_given', models.IntegerField(default=0)),
+                ('comments_given', models.IntegerField(default=0)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Author Stats',
+                'verbose_name_plural': 'Author Stats',
+            },
+        ),
+        migrations.RunPython(backfill_author_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,413 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from posts.models import (
+    Category, Comment, Like, Post, Tag, counted_rows_bulk_created, counted_rows_bulk_deleted, counters_active,
+)
+
+# Create your models here.
+
+class SiteCounters(models.Model):
+    """
+    Site-wide totals for the admin dashboard, kept as a single row (pk=1).
+    Signals below adjust it with F() updates; reconcile() recounts from scratch.
+    """
+    posts = models.IntegerField(default=0)
+    published_posts = models.IntegerField(default=0)
+    draft_posts = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    users = models.IntegerField(default=0)
+    categories = models.IntegerField(default=0)
+    tags = models.IntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Site Counters"
+        verbose_name_plural = "Site Counters"
+
+    def __str__(self):
+        return "Site Counters"
+
+    @classmethod
+    def load(cls):
+        """Return the counters row, creating and filling it on first use"""
+        obj = cls.objects.filter(pk=1).first()
+        if obj is None:
+            obj = cls.reconcile()
+        return obj
+
+    @classmethod
+    def reconcile(cls):
+        """
+        Recount every total from the source tables (full scans; run from a
+        command). Rows marked for deletion still count until they are purged,
+        matching the signal handlers, which only see the final delete.
+        """
+        User = get_user_model()
+        totals = {
+            'posts': Post.all_objects.count(),
+            'published_posts': Post.all_objects.filter(status=Post.STATUS_PUBLISHED).count(),
+            'draft_posts': Post.all_objects.filter(status=Post.STATUS_DRAFT).count(),
+            'comments': Comment.objects.count(),
+            'likes': Like.objects.count(),
+            'users': User.objects.count(),
+            'categories': Category.all_objects.count(),
+            'tags': Tag.all_objects.count(),
+            'reconciled_at': timezone.now(),
+        }
+        obj, _ = cls.objects.update_or_create(pk=1, defaults=totals)
+        return obj
+
+    @classmethod
+    def bump(cls, **deltas):
+        """Apply +/- deltas atomically, e.g. bump(posts=1, draft_posts=1)"""
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if changes and not cls.objects.filter(pk=1).update(**changes):
+            # First write ever: the recount already includes this change
+            cls.load()
+
+
+class DailyStats(models.Model):
+    """Per-day activity rollup, filled by `manage.py rollup_daily_stats`"""
+    date = models.DateField(unique=True)
+    new_posts = models.PositiveIntegerField(default=0)
+    new_comments = models.PositiveIntegerField(default=0)
+    new_likes = models.PositiveIntegerField(default=0)
+    new_users = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = "Daily Stats"
+        verbose_name_plural = "Daily Stats"
+
+    def __str__(self):
+        return f"Stats for {self.date}"
+
+    @classmethod
+    def rollup(cls, start, end):
+        """
+        (Re)compute rows for every day in [start, end] with one GROUP BY per
+        source table and upsert them. Safe to re-run over the same range.
+        """
+        User = get_user_model()
+        tz = timezone.get_current_timezone()
+        range_start = timezone.make_aware(datetime.combine(start, time.min), tz)
+        range_end = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+
+        sources = {
+            'new_posts': (Post.all_objects, 'created_at'),
+            'new_comments': (Comment.objects, 'created_at'),
+            'new_likes': (Like.objects, 'created_at'),
+            'new_users': (User.objects, 'date_joined'),
+        }
+        days = {}
+        day = start
+        while day <= end:
+            days[day] = {field: 0 for field in sources}
+            day += timedelta(days=1)
+
+        for field, (manager, date_field) in sources.items():
+            rows = (
+                manager.filter(**{f'{date_field}__gte': range_start, f'{date_field}__lt': range_end})
+                .order_by()
+                .annotate(day=TruncDate(date_field))
+                .values('day')
+                .annotate(total=Count('pk'))
+            )
+            for row in rows:
+                if row['day'] in days:
+                    days[row['day']][field] = row['total']
+
+        now = timezone.now()
+        objs = [cls(date=day, computed_at=now, **values) for day, values in days.items()]
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                objs,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['date'],
+                update_fields=[*sources, 'computed_at'],
+            )
+        return len(objs)
+
+    @classmethod
+    def recent(cls, days=8):
+        """
+        Rows for the last `days` days (today first). Today's row is computed
+        inline when missing; once older than STATS_STALENESS_SECONDS a refresh
+        is queued for the job worker and the current row is served meanwhile.
+        If that refresh has been due for STATS_STALENESS_SECONDS without a
+        worker taking it, today's row is recomputed inline instead.
+        """
+        from jobs.models import Job
+        from jobs.queue import enqueue
+
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
+        rows = {row.date: row for row in cls.objects.filter(date__gte=start)}
+        staleness = timedelta(seconds=getattr(settings, 'STATS_STALENESS_SECONDS', 300))
+        current = rows.get(today)
+        if current is None:
+            cls.rollup(today, today)
+            rows[today] = cls.objects.get(date=today)
+        elif timezone.now() - current.computed_at > staleness:
+            waiting = Job.objects.filter(
+                key='stats.rollup_today', status=Job.QUEUED, run_at__lt=timezone.now() - staleness,
+            )
+            if waiting.exists():
+                cls.rollup(today, today)
+                rows[today] = cls.objects.get(date=today)
+            else:
+                enqueue('stats.tasks.rollup_today', key='stats.rollup_today')
+        return [rows.get(start + timedelta(days=offset)) or cls(date=start + timedelta(days=offset))
+                for offset in range(days - 1, -1, -1)]
+
+
+class AuthorStats(models.Model):
+    """
+    Per-user totals for profile and author pages, one row per user. Signals
+    below adjust it with F() updates; rebuild() recounts from the source tables.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='author_stats',
+    )
+    posts = models.IntegerField(default=0)
+    published_posts = models.IntegerField(default=0)
+    likes_received = models.IntegerField(default=0)
+    comments_received = models.IntegerField(default=0)
+    likes_given = models.IntegerField(default=0)
+    comments_given = models.IntegerField(default=0)
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+
+    COUNTER_FIELDS = ('posts', 'published_posts', 'likes_received', 'comments_received', 'likes_given', 'comments_given')
+
+    class Meta:
+        verbose_name = "Author Stats"
+        verbose_name_plural = "Author Stats"
+
+    def __str__(self):
+        return f"Stats for user {self.user_id}"
+
+    @classmethod
+    def for_user(cls, user):
+        """Return the user's row, building it on first use"""
+        obj = cls.objects.filter(pk=user.pk).first()
+        if obj is None:
+            cls.rebuild([user.pk])
+            obj = cls.objects.get(pk=user.pk)
+        return obj
+
+    @classmethod
+    def rebuild(cls, user_ids=None, batch_size=500):
+        """
+        Recount rows for `user_ids` (every user when None) with correlated
+        subqueries and upsert them in batches. Returns the number of rows written.
+        """
+        User = get_user_model()
+
+        def counted(model, field, **filters):
+            rows = (
+                model._base_manager.filter(**{field: OuterRef('pk')}, **filters)
+                .order_by()
+                .values(field)
+                .annotate(total=Count('pk'))
+                .values('total')
+            )
+            return Coalesce(Subquery(rows), Value(0))
+
+        users = User.objects.order_by('pk')
+        if user_ids is not None:
+            users = users.filter(pk__in=user_ids)
+        users = users.annotate(
+            posts_total=counted(Post, 'author'),
+            published_total=counted(Post, 'author', status=Post.STATUS_PUBLISHED),
+            likes_received_total=counted(Like, 'post__author'),
+            comments_received_total=counted(Comment, 'post__author'),
+            likes_given_total=counted(Like, 'user'),
+            comments_given_total=counted(Comment, 'author'),
+        ).values_list(
+            'pk', 'posts_total', 'published_total', 'likes_received_total',
+            'comments_received_total', 'likes_given_total', 'comments_given_total',
+        )
+
+        now = timezone.now()
+        written = 0
+        batch = []
+        for pk, *totals in users.iterator(chunk_size=batch_size):
+            batch.append(cls(user_id=pk, rebuilt_at=now, **dict(zip(cls.COUNTER_FIELDS, totals))))
+            if len(batch) >= batch_size:
+                written += cls._upsert(batch)
+                batch = []
+        if batch:
+            written += cls._upsert(batch)
+        return written
+
+    @classmethod
+    def _upsert(cls, objs):
+        cls.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[*cls.COUNTER_FIELDS, 'rebuilt_at'],
+        )
+        return len(objs)
+
+    @classmethod
+    def bump(cls, user_id, **deltas):
+        """
+        Apply +/- deltas to one user's row. Missing rows are left alone:
+        for_user() / rebuild() create them with already-correct totals.
+        """
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if changes and user_id is not None:
+            cls.objects.filter(pk=user_id).update(**changes)
+
+    @classmethod
+    def bump_post_author(cls, post_id, **deltas):
+        """Apply deltas to the row of whoever wrote `post_id`, in one UPDATE"""
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if changes:
+            cls.objects.filter(pk__in=Post.all_objects.filter(pk=post_id).values('author_id')).update(**changes)
+
+
+# Signals keeping SiteCounters and AuthorStats in sync with created / deleted rows
+def _post_status_deltas(status, step):
+    if status == Post.STATUS_PUBLISHED:
+        return {'published_posts': step}
+    if status == Post.STATUS_DRAFT:
+        return {'draft_posts': step}
+    return {}
+
+
+def _author_status_deltas(status, step):
+    return {'published_posts': step} if status == Post.STATUS_PUBLISHED else {}
+
+
+@receiver(post_save, sender=Post)
+def count_post_saved(sender, instance, created, raw=False, **kwargs):
+    """Count new posts and moves between draft and published"""
+    if raw:
+        return
+    if created:
+        SiteCounters.bump(posts=1, **_post_status_deltas(instance.status, 1))
+        AuthorStats.bump(instance.author_id, posts=1, **_author_status_deltas(instance.status, 1))
+    else:
+        previous = getattr(instance, '_loaded_status', None)
+        if previous is not None and previous != instance.status:
+            deltas = _post_status_deltas(previous, -1)
+            deltas.update(_post_status_deltas(instance.status, 1))
+            SiteCounters.bump(**deltas)
+            author_deltas = _author_status_deltas(previous, -1)
+            author_deltas.update(_author_status_deltas(instance.status, 1))
+            AuthorStats.bump(instance.author_id, **author_deltas)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Post)
+def count_post_deleted(sender, instance, **kwargs):
+    # Likes/comments on the post are deleted first and adjust *_received themselves
+    status = getattr(instance, '_loaded_status', None) or instance.status
+    SiteCounters.bump(posts=-1, **_post_status_deltas(status, -1))
+    AuthorStats.bump(instance.author_id, posts=-1, **_author_status_deltas(status, -1))
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and counters_active():
+        SiteCounters.bump(comments=1)
+        AuthorStats.bump(instance.author_id, comments_given=1)
+        AuthorStats.bump_post_author(instance.post_id, comments_received=1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_deleted(sender, instance, **kwargs):
+    if counters_active():
+        SiteCounters.bump(comments=-1)
+        AuthorStats.bump(instance.author_id, comments_given=-1)
+        AuthorStats.bump_post_author(instance.post_id, comments_received=-1)
+
+
+@receiver(post_save, sender=Like)
+def count_like_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and counters_active():
+        SiteCounters.bump(likes=1)
+        AuthorStats.bump(instance.user_id, likes_given=1)
+        AuthorStats.bump_post_author(instance.post_id, likes_received=1)
+
+
+@receiver(post_delete, sender=Like)
+def count_like_deleted(sender, instance, **kwargs):
+    if counters_active():
+        SiteCounters.bump(likes=-1)
+        AuthorStats.bump(instance.user_id, likes_given=-1)
+        AuthorStats.bump_post_author(instance.post_id, likes_received=-1)
+
+
+@receiver(counted_rows_bulk_deleted)
+def count_bulk_deleted(sender, count, per_post=None, per_actor=None, **kwargs):
+    """Bulk Comment/Like deletes skip the per-row handlers above"""
+    field = {Comment: 'comments', Like: 'likes'}.get(sender)
+    if not field:
+        return
+    SiteCounters.bump(**{field: -count})
+
+    for user_id, rows in (per_actor or {}).items():
+        AuthorStats.bump(user_id, **{f'{field}_given': -rows})
+    received = {}
+    if per_post:
+        for author_id, post_id in Post.all_objects.filter(pk__in=per_post).values_list('author_id', 'pk'):
+            received[author_id] = received.get(author_id, 0) + per_post[post_id]
+    for user_id, rows in received.items():
+        AuthorStats.bump(user_id, **{f'{field}_received': -rows})
+
+
+@receiver(counted_rows_bulk_created)
+def count_bulk_created(sender, count, **kwargs):
+    """Rows inserted with bulk_create skip post_save"""
+    field = {Tag: 'tags', Category: 'categories'}.get(sender)
+    if field:
+        SiteCounters.bump(**{field: count})
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def count_user_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SiteCounters.bump(users=1)
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def count_user_deleted(sender, instance, **kwargs):
+    SiteCounters.bump(users=-1)
+
+
+@receiver(post_save, sender=Category)
+def count_category_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SiteCounters.bump(categories=1)
+
+
+@receiver(post_delete, sender=Category)
+def count_category_deleted(sender, instance, **kwargs):
+    SiteCounters.bump(categories=-1)
+
+
+@receiver(post_save, sender=Tag)
+def count_tag_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SiteCounters.bump(tags=1)
+
+
+@receiver(post_delete, sender=Tag)
+def count_tag_deleted(sender, instance, **kwargs):
+    SiteCounters.bump(tags=-1)
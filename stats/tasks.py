@@ -0,0 +1,12 @@
+from django.utils import timezone
+
+from jobs.queue import task
+
+from .models import DailyStats
+
+
+@task(priority=-1)
+def rollup_today():
+    """Recompute today's DailyStats row (queued by DailyStats.recent when it goes stale)"""
+    today = timezone.localdate()
+    DailyStats.rollup(today, today)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+
+from posts.models import Comment, Like, Post
+
+from .models import AuthorStats, DailyStats, SiteCounters
+
+
+class CounterConsistencyTests(TestCase):
+    """The incrementally maintained counters always equal a full recount"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create_user('author')
+        self.reader = User.objects.create_user('reader')
+        self.other = User.objects.create_user('other')
+        SiteCounters.load()
+        self.post = Post.objects.create(title='First', content='Text', author=self.author, status='published')
+        self.draft = Post.objects.create(title='Draft', content='Text', author=self.author, status='draft')
+
+    def assertCountersMatchRecount(self):
+        site_fields = [field.name for field in SiteCounters._meta.fields if field.name not in ('id', 'reconciled_at')]
+        stored = SiteCounters.objects.values(*site_fields).get(pk=1)
+        authors = {row['user_id']: row for row in AuthorStats.objects.values('user_id', *AuthorStats.COUNTER_FIELDS)}
+        SiteCounters.reconcile()
+        AuthorStats.rebuild()
+        self.assertEqual(stored, SiteCounters.objects.values(*site_fields).get(pk=1))
+        self.assertEqual(
+            authors,
+            {row['user_id']: row for row in AuthorStats.objects.values('user_id', *AuthorStats.COUNTER_FIELDS)},
+        )
+
+    def test_likes_and_toggle(self):
+        Like.objects.create(post=self.post, user=self.reader)
+        Like.toggle(self.post.pk, self.other)
+        self.assertCountersMatchRecount()
+        Like.toggle(self.post.pk, self.other)
+        Like.objects.get(post=self.post, user=self.reader).delete()
+        self.assertCountersMatchRecount()
+
+    def test_comments(self):
+        comment = Comment.objects.create(post=self.post, author=self.reader, content='Hi')
+        Comment.objects.create(post=self.draft, author=self.other, content='Hello', approved=False)
+        self.assertCountersMatchRecount()
+        comment.delete()
+        self.assertCountersMatchRecount()
+
+    def test_publishing_and_deleting_posts(self):
+        Like.objects.create(post=self.draft, user=self.reader)
+        Comment.objects.create(post=self.draft, author=self.reader, content='Hi')
+        self.draft.status = Post.STATUS_PUBLISHED
+        self.draft.save()
+        self.assertCountersMatchRecount()
+        self.draft.delete()
+        self.assertCountersMatchRecount()
+
+    def test_bulk_deletes(self):
+        for user in (self.reader, self.other):
+            Like.objects.create(post=self.post, user=user)
+            Comment.objects.create(post=self.post, author=user, content='Hi')
+        Like.objects.filter(post=self.post).delete()
+        Comment.objects.filter(author=self.reader).delete()
+        self.assertCountersMatchRecount()
+
+
+@override_settings(STATS_STALENESS_SECONDS=300)
+class DailyStatsRecentTests(TestCase):
+    def setUp(self):
+        self.author = get_user_model().objects.create_user('author')
+        DailyStats.recent()
+        Post.objects.create(title='New', content='Text', author=self.author)
+        self.age_today(minutes=10)
+
+    def age_today(self, minutes):
+        DailyStats.objects.filter(date=timezone.localdate()).update(
+            computed_at=timezone.now() - timedelta(minutes=minutes),
+        )
+
+    def test_stale_row_queues_a_refresh(self):
+        self.assertEqual(DailyStats.recent()[0].new_posts, 0)
+        self.assertTrue(Job.objects.filter(key='stats.rollup_today', status=Job.QUEUED).exists())
+
+    def test_refresh_no_worker_picked_up_is_done_inline(self):
+        DailyStats.recent()
+        Job.objects.filter(key='stats.rollup_today').update(run_at=timezone.now() - timedelta(minutes=6))
+        self.assertEqual(DailyStats.recent()[0].new_posts, 1)
@@ -2,6 +2,9 @@
 ASGI config for thoughtnest project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served by uvicorn workers when gunicorn runs with SERVER_MODE=asgi (see
+gunicorn.conf.py), which also turns on settings.ASYNC_VIEWS so the read-heavy
+views are served by their async versions.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,29 @@
+"""
+Helpers for the async read views.
+
+The async versions of the read views (used when settings.ASYNC_VIEWS is on)
+fetch their data with the async ORM and then render in a worker thread:
+template rendering, context processors and lazy objects such as request.user
+are sync code that may still touch the database. Django's async ORM still runs
+each query in a thread, so this saves tying up an ASGI worker per request, not
+query time.
+"""
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+
+async def auser(request):
+    """
+    request.user, resolved off the event loop. Unlike request.auser() this
+    fills the same lazy object templates read, so the user is loaded once.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def arender(request, template_name, context=None):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
@@ -0,0 +1,40 @@
+"""
+Date filter helpers shared by the list views.
+
+Filters are turned into aware datetime bounds so querysets compare the raw
+timestamp column (created_at__gte / __lt) and the timestamp indexes stay usable,
+unlike a __date lookup which wraps the column in a function.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+DATE_RANGE_DAYS = {'today': 0, 'week': 7, 'month': 30, 'year': 365}
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_range_start(date_range):
+    """Aware start datetime for a ?date_range= preset (today/week/month/year), or None"""
+    days = DATE_RANGE_DAYS.get(date_range)
+    if days is None:
+        return None
+    return _local_midnight(timezone.localdate() - timedelta(days=days))
+
+
+def _parse_day(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def date_bounds(date_from, date_to):
+    """Half-open [start, end) datetimes for inclusive YYYY-MM-DD inputs; bad input is ignored"""
+    first, last = _parse_day(date_from), _parse_day(date_to)
+    start = _local_midnight(first) if first else None
+    end = _local_midnight(last + timedelta(days=1)) if last else None
+    return start, end
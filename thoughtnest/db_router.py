@@ -0,0 +1,206 @@
+"""
+Read-replica routing.
+
+ReplicaRouter sends ORM reads to the aliases in DATABASE_REPLICAS (weighted
+random choice) and every write to "default". Reads only go to a replica while
+ReplicaPinningMiddleware is handling a request and nothing forces the
+primary; everything else (management commands, signal handlers outside a
+request, the sessions app) reads from the primary, so code that reads what it
+just wrote never sees replication lag.
+
+Inside a request the primary is used when:
+
+- the request is not GET/HEAD, or a write has already happened in it;
+- the connection to "default" is inside transaction.atomic();
+- the client wrote within the last REPLICA_PIN_SECONDS (read-your-writes):
+  any request that writes sets a short-lived cookie that pins its follow-up
+  requests, e.g. the redirect after liking or commenting;
+- no replica is healthy. Health is checked at most every
+  REPLICA_HEALTH_CHECK_INTERVAL seconds per process; on Postgres a replica
+  whose replay lags by more than REPLICA_MAX_LAG_SECONDS counts as unhealthy.
+
+To try it locally with SQLite, point DATABASE_REPLICA_URLS at a second file
+and copy the primary into it with `manage.py sync_sqlite_replicas`.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger('thoughtnest.db')
+
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_ONLY_APPS = frozenset({'sessions'})
+
+
+class _Routing:
+    __slots__ = ('replicas_allowed', 'wrote')
+
+    def __init__(self, replicas_allowed):
+        self.replicas_allowed = replicas_allowed
+        self.wrote = False
+
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+@contextmanager
+def use_primary():
+    """Force reads in this block (and anything it calls) onto the primary"""
+    token = _routing.set(_Routing(replicas_allowed=False))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+class ReplicaHealth:
+    """Per-process cache of which replicas answered their last check"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}  # alias -> (monotonic time, healthy)
+
+    def healthy(self, alias):
+        interval = _setting('REPLICA_HEALTH_CHECK_INTERVAL', 5)
+        checked = self.checked.get(alias)
+        if checked is not None and time.monotonic() - checked[0] < interval:
+            return checked[1]
+        with self.lock:
+            checked = self.checked.get(alias)
+            if checked is not None and time.monotonic() - checked[0] < interval:
+                return checked[1]
+            healthy = self.check(alias)
+            self.checked[alias] = (time.monotonic(), healthy)
+            return healthy
+
+    def check(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(
+                        'SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)'
+                    )
+                    lag = float(cursor.fetchone()[0] or 0)
+                    if lag > _setting('REPLICA_MAX_LAG_SECONDS', 10):
+                        logger.warning('Replica %s is %.1fs behind; reading from the primary', alias, lag)
+                        return False
+                else:
+                    cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            logger.warning('Replica %s failed its health check; reading from the primary', alias, exc_info=True)
+            connection.close()
+            return False
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    def _replicas(self):
+        return _setting('DATABASE_REPLICAS', {})
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related lookups stay on the database the instance came from
+            return instance._state.db
+        state = _routing.get()
+        if state is None or not state.replicas_allowed or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        replicas = self._replicas()
+        candidates = [alias for alias in replicas if health.healthy(alias)]
+        if not candidates:
+            return DEFAULT_DB_ALIAS
+        return random.choices(candidates, weights=[replicas[alias] for alias in candidates])[0]
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        group = {DEFAULT_DB_ALIAS, *self._replicas()}
+        if obj1._state.db in group and obj2._state.db in group:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        if db in self._replicas():
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Place above SessionMiddleware so session and auth reads see the routing
+    decision and the session save at the end of a request counts as a write.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not _setting('DATABASE_REPLICAS', {}):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = _setting('REPLICA_PIN_SECONDS', 5)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        replicas_allowed = request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+        state = _Routing(replicas_allowed)
+        return state, _routing.set(state)
+
+    def finish(self, state, response):
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=self.pin_seconds,
+                httponly=True, samesite='Lax', secure=_setting('SESSION_COOKIE_SECURE', False),
+            )
+        return response
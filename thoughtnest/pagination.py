@@ -0,0 +1,197 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by the ordering values of their boundary rows, so every
+page costs the same indexed range scan as the first one and no COUNT(*) or
+OFFSET is issued. Cursors are opaque url-safe tokens.
+"""
+import base64
+import datetime
+import json
+from collections.abc import Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+# Upper bound for the capped COUNT used as a total estimate outside Postgres
+ESTIMATE_CAP = 1000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder drops microseconds below milliseconds; keyset
+    # boundaries need the exact stored value or rows get skipped.
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def estimate_count(queryset, cap=ESTIMATE_CAP):
+    """
+    Cheap row-count estimate for a filtered queryset. Returns (count, is_estimate).
+    Postgres reads the planner's row estimate; other backends count at most
+    `cap` + 1 rows.
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows']), True
+    count = queryset[:cap + 1].count()
+    return min(count, cap), count > cap
+
+
+class CursorPaginator:
+    """
+    Paginate `queryset` by `ordering`; the last field must be unique (the
+    primary key) so every row has a distinct position.
+    """
+
+    def __init__(self, queryset, per_page, ordering=DEFAULT_ORDERING, estimate_total=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.estimate_total = estimate_total
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+        self._count = None
+
+    # -- totals -----------------------------------------------------------
+
+    def _load_count(self):
+        if self._count is None:
+            self._count = estimate_count(self.queryset)
+        return self._count
+
+    @property
+    def count(self):
+        """Estimated total, or None when estimate_total is off"""
+        if not self.estimate_total:
+            return None
+        return self._load_count()[0]
+
+    @property
+    def count_is_estimate(self):
+        return bool(self.estimate_total and self._load_count()[1])
+
+    @property
+    def count_display(self):
+        """Total for templates: "42", "1000+" for a capped count, "~5300" for a planner estimate"""
+        if not self.estimate_total:
+            return ''
+        count, is_estimate = self._load_count()
+        if not is_estimate:
+            return str(count)
+        if connections[self.queryset.db].vendor == 'postgresql':
+            return f'~{count}'
+        return f'{count}+'
+
+    # -- cursors ----------------------------------------------------------
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, name) for name, _ in self.fields]
+        payload = json.dumps([direction, values], cls=_CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            direction, raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if direction not in ('n', 'p') or len(raw_values) != len(self.fields):
+                raise ValueError
+            opts = self.queryset.model._meta
+            values = [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, raw_values)
+            ]
+        except Exception as exc:
+            raise InvalidCursor(token) from exc
+        return direction, values
+
+    def _seek(self, values, forward):
+        # (a, b) after (x, y) == a > x OR (a = x AND b > y), per field direction
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            equal = {self.fields[i][0]: values[i] for i in range(index)}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[index]})
+        return condition
+
+    # -- pages ------------------------------------------------------------
+
+    def page(self, cursor=None):
+        """Return the page after/before `cursor`; invalid cursors give the first page"""
+        direction, values = 'n', None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                direction, values = 'n', None
+
+        forward = direction == 'n'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[
+                name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering
+            ])
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        next_cursor = self.encode_cursor(rows[-1], 'n') if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], 'p') if rows and has_previous else None
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+class CursorPage(Sequence):
+    """Page of a CursorPaginator; mirrors the parts of Page the templates use"""
+    is_cursor_page = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_by_cursor(request, queryset, per_page, ordering=DEFAULT_ORDERING, estimate_total=True):
+    """Build a CursorPaginator for `queryset` and return (paginator, page) for ?cursor="""
+    paginator = CursorPaginator(queryset, per_page, ordering=ordering, estimate_total=estimate_total)
+    return paginator, paginator.page(request.GET.get('cursor'))
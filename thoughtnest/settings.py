@@ -21,6 +21,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from thoughtnest.database import database_from_env, replicas_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,11 +50,17 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',       
     'accounts',
     'posts',
+    'stats',
+    'jobs',
+    'notifications',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'thoughtnest.static_files.WhiteNoiseMiddleware',
+    'thoughtnest.sql_instrumentation.SqlInstrumentationMiddleware',
+    'thoughtnest.db_router.ReplicaPinningMiddleware',
+    'posts.page_cache.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -73,6 +81,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'stats.context_processors.author_stats',
             ],
         },
     },
@@ -80,17 +89,161 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'thoughtnest.wsgi.application'
 
+# The read-heavy public views (home, categories, post_detail, tag_posts,
+# category_posts) are routed to their async versions only when served over
+# ASGI (SERVER_MODE=asgi, see gunicorn.conf.py); under WSGI an async view
+# costs an event loop and thread hops per request for nothing.
+ASYNC_VIEWS = os.environ.get('SERVER_MODE', 'wsgi').lower() == 'asgi'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL (postgres://... or sqlite:///...) selects the backend; without
+# it the SQLite file below BASE_DIR is used. Connection reuse, health checks,
+# the optional psycopg 3 pool and server-side cursors are configured from
+# DB_* variables, see thoughtnest/database.py.
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_env(BASE_DIR),
 }
 
+# SQLite tuning (thoughtnest.sqlite), applied to every new SQLite connection.
+# SQLITE_TUNING=false leaves SQLite's defaults; cache_size < 0 is in KiB.
+if os.environ.get('SQLITE_TUNING', 'true').lower() == 'true':
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+        'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'memory'),
+    }
+else:
+    SQLITE_PRAGMAS = {}
+
+# Read replicas: DATABASE_REPLICA_URLS (comma separated) become replica1,
+# replica2, ... and DATABASE_REPLICA_WEIGHTS sets their share of reads.
+# thoughtnest.db_router sends request reads there, keeping writers on the
+# primary for REPLICA_PIN_SECONDS after they write.
+_replica_databases, DATABASE_REPLICAS = replicas_from_env(BASE_DIR)
+DATABASES.update(_replica_databases)
+DATABASE_ROUTERS = ['thoughtnest.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+REPLICA_HEALTH_CHECK_INTERVAL = int(os.environ.get('REPLICA_HEALTH_CHECK_INTERVAL', 5))
+REPLICA_MAX_LAG_SECONDS = int(os.environ.get('REPLICA_MAX_LAG_SECONDS', 10))
+
+
+# Cache
+# Set REDIS_URL to share cached data (cached pages and their version stamp)
+# between gunicorn workers. Without it each worker keeps its own in-memory
+# cache and relies on short TTLs.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a worker trusts its in-process SiteSettings copy before
+# re-checking its updated_at in the database.
+SITE_SETTINGS_CACHE_TTL = int(os.environ.get('SITE_SETTINGS_CACHE_TTL', 5))
+
+
+# Anonymous page micro-cache (posts.page_cache)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 10))
+PAGE_CACHE_STALE_TTL = int(os.environ.get('PAGE_CACHE_STALE_TTL', 60))
+
+
+# Full-text search: ranked ids fetched from the index when filtering list views
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 1000))
+
+
+# post_detail renders this many comments; older ones are loaded on scroll
+POST_COMMENTS_PER_PAGE = int(os.environ.get('POST_COMMENTS_PER_PAGE', 20))
+
+
+# Categories page data is cached as a unit until content changes, at most this long
+CATEGORIES_CACHE_TTL = int(os.environ.get('CATEGORIES_CACHE_TTL', 300))
+
+
+# Per-request SQL instrumentation (thoughtnest.sql_instrumentation). Off by
+# default; when on, a SAMPLE_RATE share of requests gets a Server-Timing header
+# and requests over budget or with an N+1 are logged on "thoughtnest.sql".
+SQL_INSTRUMENTATION_ENABLED = os.environ.get('SQL_INSTRUMENTATION_ENABLED', 'false').lower() == 'true'
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('SQL_INSTRUMENTATION_SAMPLE_RATE', 0.1))
+SQL_INSTRUMENTATION_BUDGET_MS = int(os.environ.get('SQL_INSTRUMENTATION_BUDGET_MS', 500))
+SQL_INSTRUMENTATION_QUERY_BUDGET = int(os.environ.get('SQL_INSTRUMENTATION_QUERY_BUDGET', 50))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+
+
+# Background jobs (jobs app), run by `manage.py run_worker`. A running job whose
+# worker has not finished it within JOB_LEASE_SECONDS is assumed dead and
+# retried; failures are retried after JOB_RETRY_BASE_SECONDS * 2^(attempt - 1),
+# at most JOB_RETRY_MAX_SECONDS. Done jobs are purged after JOB_RETENTION_DAYS.
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 600))
+JOB_RETRY_BASE_SECONDS = int(os.environ.get('JOB_RETRY_BASE_SECONDS', 10))
+JOB_RETRY_MAX_SECONDS = int(os.environ.get('JOB_RETRY_MAX_SECONDS', 3600))
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 7))
+
+# Deferred deletes (posts.deletion): at most DELETION_CHUNK_SIZE rows per
+# short transaction, fewer while a chunk takes over DELETION_CHUNK_SECONDS,
+# and seconds a purge job works before re-queueing itself
+DELETION_CHUNK_SIZE = int(os.environ.get('DELETION_CHUNK_SIZE', 100))
+DELETION_CHUNK_SECONDS = float(os.environ.get('DELETION_CHUNK_SECONDS', 0.25))
+DELETION_TIME_SLICE = int(os.environ.get('DELETION_TIME_SLICE', 20))
+
+# Staff exports (admin export links, export_data) read this many rows per
+# database fetch while streaming
+EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', 2000))
+
+# Trending feed (Post.trending_expression): an approved comment counts as
+# TRENDING_COMMENT_WEIGHT likes. `manage.py update_trending` rescores posts
+# from the last TRENDING_WINDOW_DAYS days, TRENDING_BATCH_SIZE per UPDATE.
+TRENDING_COMMENT_WEIGHT = float(os.environ.get('TRENDING_COMMENT_WEIGHT', 2))
+TRENDING_WINDOW_DAYS = int(os.environ.get('TRENDING_WINDOW_DAYS', 14))
+TRENDING_BATCH_SIZE = int(os.environ.get('TRENDING_BATCH_SIZE', 1000))
+
+
+# Email. With EMAIL_HOST set mail goes out over SMTP; otherwise it is printed
+# to the console. EMAIL_BACKEND overrides either (e.g. the locmem backend).
+EMAIL_HOST = os.environ.get('EMAIL_HOST', '')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'true').lower() == 'true'
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND') or (
+    'django.core.mail.backends.smtp.EmailBackend' if EMAIL_HOST
+    else 'django.core.mail.backends.console.EmailBackend'
+)
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'ThoughtNest <noreply@thoughtnest.local>')
+# Absolute links in emails
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+
+# Like/comment digests (notifications.digest), sent by `manage.py send_digests`.
+# Each author gets at most one digest per NOTIFICATION_DIGEST_INTERVAL seconds;
+# a run sends at most NOTIFICATION_MAX_EMAILS_PER_RUN emails, paced to
+# NOTIFICATION_EMAILS_PER_SECOND (0 = unpaced) over one SMTP connection.
+NOTIFICATION_DIGEST_INTERVAL = int(os.environ.get('NOTIFICATION_DIGEST_INTERVAL', 3600))
+NOTIFICATION_EMAILS_PER_SECOND = float(os.environ.get('NOTIFICATION_EMAILS_PER_SECOND', 10))
+NOTIFICATION_MAX_EMAILS_PER_RUN = int(os.environ.get('NOTIFICATION_MAX_EMAILS_PER_RUN', 1000))
+NOTIFICATION_EVENT_MAX_AGE_DAYS = int(os.environ.get('NOTIFICATION_EVENT_MAX_AGE_DAYS', 7))
+
+
+# Admin dashboard: a refresh of today's DailyStats row is queued when older than
+# this, and done inline when the queued refresh has waited this long for a worker
+STATS_STALENESS_SECONDS = int(os.environ.get('STATS_STALENESS_SECONDS', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
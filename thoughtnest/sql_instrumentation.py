@@ -0,0 +1,220 @@
+"""
+Opt-in per-request SQL instrumentation.
+
+Every database connection gets one execute wrapper (so it works with DEBUG
+off) that reports to the sampled request's RequestQueries through a context
+variable; asgiref copies the context into sync_to_async threads, so queries
+from async views are attributed too. Per request it records the query count,
+total SQL time and repeated statements:
+
+- an exact duplicate is the same SQL run again with the same parameters;
+- a repeated *shape* is the same SQL with different parameters (numbers and
+  IN lists normalized). SQL_N_PLUS_ONE_THRESHOLD repeats of one shape are
+  reported as an N+1, together with the view and template line that issued
+  the query that crossed the threshold.
+
+Sampled responses carry a Server-Timing header (db / app durations). Requests
+over the time or query budget, or with an N+1, are logged as one JSON line on
+the "thoughtnest.sql" logger.
+
+The per-query cost is a context variable lookup, plus a perf_counter pair
+and a dict update when sampled; stacks are only walked once per offending
+shape. Disabled by default; with SQL_INSTRUMENTATION_ENABLED off the
+middleware removes itself at startup.
+"""
+import json
+import logging
+import random
+import re
+import sys
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+import django
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('thoughtnest.sql')
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_DJANGO_DIR = str(Path(django.__file__).resolve().parent)
+_THIS_FILE = str(Path(__file__).resolve())
+
+_current = ContextVar('sql_instrumentation', default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def query_shape(sql):
+    """The statement with parameters, IN lists and inlined LIMIT/OFFSET collapsed"""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def _origin():
+    """
+    Where the current query came from: the innermost project frame outside
+    Django and this module, and the template line being rendered (if any).
+    """
+    base_dir = str(settings.BASE_DIR)
+    code_frame = template = None
+    frame = sys._getframe(2)
+    while frame is not None and (code_frame is None or template is None):
+        filename = frame.f_code.co_filename
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template = f'{origin.template_name}:{token.lineno}'
+        if (code_frame is None and filename.startswith(base_dir) and filename != _THIS_FILE
+                and not filename.startswith(_DJANGO_DIR) and 'site-packages' not in filename):
+            code_frame = f'{Path(filename).relative_to(base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return {'code': code_frame, 'template': template}
+
+
+class RequestQueries:
+    """Query statistics for one request, fed by the connection execute wrapper"""
+
+    def __init__(self, n_plus_one_threshold):
+        self.threshold = n_plus_one_threshold
+        self.count = 0
+        self.duration = 0.0
+        self.duplicates = 0
+        self.shapes = {}
+        self.seen = set()
+        self.n_plus_one = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.record(sql, params, many)
+
+    def record(self, sql, params, many):
+        self.count += 1
+        try:
+            key = (sql, repr(params)) if not many else None
+        except Exception:
+            key = None
+        if key is not None:
+            if key in self.seen:
+                self.duplicates += 1
+            else:
+                self.seen.add(key)
+
+        shape = query_shape(sql)
+        repeats = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = repeats
+        if repeats == self.threshold:
+            self.n_plus_one[shape] = _origin()
+
+    def report(self):
+        return [
+            {'sql': shape[:300], 'count': self.shapes[shape], **origin}
+            for shape, origin in self.n_plus_one.items()
+        ]
+
+
+def _execute(execute, sql, params, many, context):
+    queries = _current.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    return queries(execute, sql, params, many, context)
+
+
+def _install(connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+class SqlInstrumentationMiddleware:
+    """
+    Place near the top of MIDDLEWARE (below WhiteNoise so static files are not
+    sampled) to include queries made by the session/auth middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not _setting('SQL_INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(_install, dispatch_uid='thoughtnest.sql_instrumentation')
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        self.sample_rate = _setting('SQL_INSTRUMENTATION_SAMPLE_RATE', 1.0)
+        self.time_budget = _setting('SQL_INSTRUMENTATION_BUDGET_MS', 500) / 1000
+        self.query_budget = _setting('SQL_INSTRUMENTATION_QUERY_BUDGET', 50)
+        self.threshold = _setting('SQL_N_PLUS_ONE_THRESHOLD', 5)
+        self.server_timing = _setting('SQL_INSTRUMENTATION_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        queries = self.sample()
+        if queries is None:
+            return self.get_response(request)
+        token = _current.set(queries)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, queries, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        queries = self.sample()
+        if queries is None:
+            return await self.get_response(request)
+        token = _current.set(queries)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, queries, time.perf_counter() - started)
+
+    def sample(self):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        return RequestQueries(self.threshold)
+
+    def finish(self, request, response, queries, elapsed):
+        if self.server_timing:
+            response.headers['Server-Timing'] = (
+                f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries", '
+                f'app;dur={elapsed * 1000:.1f}'
+            )
+        n_plus_one = queries.report()
+        if elapsed > self.time_budget or queries.count > self.query_budget or n_plus_one:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'view': getattr(request.resolver_match, 'view_name', None),
+                'status': response.status_code,
+                'ms': round(elapsed * 1000, 1),
+                'db_ms': round(queries.duration * 1000, 1),
+                'queries': queries.count,
+                'duplicates': queries.duplicates,
+                'n_plus_one': n_plus_one,
+            }))
+        return response
@@ -0,0 +1,48 @@
+"""
+WhiteNoise middleware that can run in async mode.
+
+whitenoise's middleware is sync-only, and one sync-only middleware near the
+top of MIDDLEWARE makes Django run everything below it, async views included,
+in a worker thread per request. This subclass lets the ASGI stack stay async:
+lookups are in-memory, and static files are streamed with an async reader so
+the ASGI handler does not have to consume a sync iterator.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+async def _read_chunks(filelike, block_size):
+    read = sync_to_async(filelike.read, thread_sensitive=False)
+    try:
+        while chunk := await read(block_size):
+            yield chunk
+    finally:
+        filelike.close()
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        response = await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        if response.file_to_stream is not None:
+            response.streaming_content = _read_chunks(response.file_to_stream, response.block_size)
+        return response
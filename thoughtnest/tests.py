@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts.models import Post
+
+from .pagination import CursorPaginator
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        author = get_user_model().objects.create_user('author')
+        Post.objects.bulk_create([Post(title=f'Post {i}', content='Text', author=author) for i in range(25)])
+        # Ties on created_at (broken by id) and sub-millisecond precision in the cursor
+        Post.objects.filter(pk__in=list(Post.objects.order_by('pk').values_list('pk', flat=True)[5:15])).update(
+            created_at=datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc),
+        )
+        self.expected = list(Post.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def walk_forward(self, paginator):
+        pages, page = [], paginator.page()
+        pages.append(page)
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            pages.append(page)
+        return pages
+
+    def test_forward_pages_cover_every_row_once(self):
+        pages = self.walk_forward(CursorPaginator(Post.objects.all(), 10))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([post.pk for page in pages for post in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(pages[-1].has_previous())
+
+    def test_previous_cursor_returns_the_same_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first, second, third = self.walk_forward(paginator)
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual([post.pk for post in back], [post.pk for post in second])
+        back = paginator.page(back.previous_cursor)
+        self.assertEqual([post.pk for post in back], [post.pk for post in first])
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_gives_first_page(self):
+        page = CursorPaginator(Post.objects.all(), 10).page('not-a-cursor')
+        self.assertEqual([post.pk for post in page], self.expected[:10])
+
+    def test_capped_count_estimate(self):
+        paginator = CursorPaginator(Post.objects.all(), 10, estimate_total=True)
+        self.assertEqual((paginator.count, paginator.count_is_estimate), (25, False))